@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+""" Compare the legacy `sys.path` based plugin import against the spec based
+`plugin_manager.import_module`, with 1,000 entries on `sys.path`.
+
+    PYTHONPATH=. python benchmarks/bench_import_module.py [--paths 1000] [--modules 200]
+"""
+
+import argparse
+import importlib
+import pathlib
+import sys
+import tempfile
+import time
+
+from xappt.managers import plugin_manager
+
+
+def legacy_import_module(module_name: str, path: pathlib.Path) -> bool:
+    path_str = str(path)
+    old_sys_path = sys.path.copy()
+    if path_str not in sys.path:
+        sys.path.append(path_str)
+    try:
+        importlib.import_module(module_name)
+    except ImportError:
+        sys.path = old_sys_path
+    else:
+        return True
+    return False
+
+
+def make_plugins(root: pathlib.Path, prefix: str, count: int):
+    for i in range(count):
+        module_path = root.joinpath(f"module_{i:04d}")
+        module_path.mkdir(parents=True)
+        module_path.joinpath(f"{prefix}_{i:04d}.py").write_text(f"VALUE = {i}\n")
+
+
+def bench(import_fn, root: pathlib.Path, prefix: str, count: int) -> float:
+    start = time.perf_counter()
+    for i in range(count):
+        assert import_fn(f"{prefix}_{i:04d}", root.joinpath(f"module_{i:04d}"))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--paths', type=int, default=1000, help="Number of extra sys.path entries")
+    parser.add_argument('--modules', type=int, default=200, help="Number of plugin modules to import")
+    options = parser.parse_args()
+
+    original_sys_path = list(sys.path)
+    with tempfile.TemporaryDirectory() as tmp:
+        root = pathlib.Path(tmp)
+        sys.path.extend(str(root.joinpath("missing", str(i))) for i in range(options.paths))
+
+        make_plugins(root.joinpath("legacy"), "xappt_bench_legacy", options.modules)
+        make_plugins(root.joinpath("spec"), "xappt_bench_spec", options.modules)
+
+        legacy_time = bench(legacy_import_module, root.joinpath("legacy"), "xappt_bench_legacy", options.modules)
+        spec_time = bench(plugin_manager.import_module, root.joinpath("spec"), "xappt_bench_spec", options.modules)
+        sys_path_growth = len(sys.path) - len(original_sys_path) - options.paths
+
+    sys.path[:] = original_sys_path
+
+    print(f"sys.path entries: {len(original_sys_path) + options.paths}, modules: {options.modules}")
+    print(f"legacy import_module: {legacy_time * 1000:8.1f} ms ({sys_path_growth} entries added to sys.path)")
+    print(f"spec import_module:   {spec_time * 1000:8.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
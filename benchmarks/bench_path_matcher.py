@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+""" Compare the throughput of `PathMatcher` against the single `fnmatch`
+alternation regex that `search_files` used to build on every call.
+
+    PYTHONPATH=. python benchmarks/bench_path_matcher.py [--names 1000000]
+"""
+
+import argparse
+import fnmatch
+import random
+import re
+import time
+
+from xappt.utilities.path.matcher import PathMatcher, get_matcher
+
+EXTENSIONS = (".exr", ".py", ".txt", ".json", ".tar.gz", ".mov", ".abc", ".usd", "")
+
+PATTERN_SETS = {
+    'extensions': ("*.exr", "*.py", "*.usd"),
+    'names and suffixes': ("README.md", "*.tar.gz", "*.json"),
+    'mixed': ("*.exr", "shot_[0-9][0-9][0-9]*.mov", "*_v??.abc"),
+    'many extensions': tuple(f"*.ext{i}" for i in range(40)) + ("*.exr", "*.usd"),
+}
+
+
+def legacy_matcher(patterns):
+    return re.compile('|'.join([fnmatch.translate(p) for p in patterns])).match
+
+
+def bench(name: str, match_fn, names) -> float:
+    start = time.perf_counter()
+    count = sum(1 for n in names if match_fn(n))
+    elapsed = time.perf_counter() - start
+    print(f"    {name:<24} {elapsed:7.3f} s  {len(names) / elapsed / 1e6:6.2f} M names/s  ({count} matches)")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--names', type=int, default=1_000_000, help="Number of file names to match")
+    options = parser.parse_args()
+
+    rng = random.Random(0)
+    names = [f"shot_{rng.randrange(1000):03d}_v{rng.randrange(100):02d}{rng.choice(EXTENSIONS)}"
+             for _ in range(options.names)]
+
+    for label, patterns in PATTERN_SETS.items():
+        shown = patterns if len(patterns) <= 5 else patterns[:3] + (f"... {len(patterns)} patterns", )
+        print(f"{label}: {', '.join(shown)}")
+        bench("fnmatch regex", legacy_matcher(patterns), names)
+        bench("PathMatcher", PathMatcher(patterns).match, names)
+
+    iterations = 10_000
+    start = time.perf_counter()
+    for _ in range(iterations):
+        legacy_matcher(PATTERN_SETS['mixed'])
+    legacy_build = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(iterations):
+        get_matcher(PATTERN_SETS['mixed'])
+    cached_build = time.perf_counter() - start
+    print(f"building a matcher {iterations} times: fnmatch regex {legacy_build * 1000:.1f} ms, "
+          f"get_matcher {cached_build * 1000:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
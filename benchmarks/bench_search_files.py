@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+""" Compare the original `os.walk` based `search_files` against the `scandir`
+based implementation, serially, with a thread pool and with a `FileIndex`, on a
+generated tree.
+
+    PYTHONPATH=. python benchmarks/bench_search_files.py [--files 1000000] [--per-dir 1000] [--workers 8]
+
+Creating a tree of 1M files takes a while. Pass `--path` to reuse a tree
+created by an earlier run.
+"""
+
+import argparse
+import fnmatch
+import os
+import pathlib
+import re
+import shutil
+import tempfile
+import time
+
+from typing import Generator, Sequence, Union
+
+from xappt.utilities.path.file_index import FileIndex
+from xappt.utilities.path.misc import search_files
+
+EXTENSIONS = (".exr", ".py", ".txt", ".json")
+
+
+def legacy_search_files(search_path: pathlib.Path, **kwargs) -> Generator[pathlib.Path, None, None]:
+    patterns: Union[str, Sequence] = kwargs['patterns']
+    recursive: bool = kwargs.get('recursive', False)
+
+    if isinstance(patterns, str):
+        patterns = [patterns]
+    pattern_regex = re.compile('|'.join([fnmatch.translate(p) for p in patterns]))
+
+    if recursive:
+        for root, dirs, files in os.walk(search_path):
+            root_path = pathlib.Path(root)
+            for f in files:
+                if pattern_regex.match(f):
+                    yield root_path.joinpath(f)
+    else:
+        for item in search_path.iterdir():
+            if not item.is_file():
+                continue
+            if pattern_regex.match(item.name):
+                yield item
+
+
+def make_tree(root: pathlib.Path, file_count: int, per_dir: int):
+    """ Build a two level tree, with `per_dir` files in each leaf directory. """
+    dir_count = max(1, file_count // per_dir)
+    for d in range(dir_count):
+        leaf = root.joinpath(f"group_{d // 100:04d}", f"dir_{d:06d}")
+        leaf.mkdir(parents=True)
+        for f in range(per_dir):
+            open(os.path.join(leaf, f"file_{f:05d}{EXTENSIONS[f % len(EXTENSIONS)]}"), "wb").close()
+    # a FileIndex doesn't trust directories modified in the last few seconds
+    old = time.time() - 60
+    for dir_path, _, _ in os.walk(root):
+        os.utime(dir_path, (old, old))
+
+
+def bench(name: str, search_fn, root: pathlib.Path, **kwargs):
+    start = time.perf_counter()
+    count = sum(1 for _ in search_fn(root, patterns="*.exr", recursive=True, **kwargs))
+    print(f"{name:<28} {time.perf_counter() - start:8.3f} s  ({count} matches)")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--files', type=int, default=1_000_000, help="Number of files to create")
+    parser.add_argument('--per-dir', type=int, default=1000, help="Number of files in each directory")
+    parser.add_argument('--workers', type=int, default=8, help="Threads for the threaded search")
+    parser.add_argument('--path', help="Use (or create) the tree at this path, and keep it afterwards")
+    options = parser.parse_args()
+
+    if options.path is not None:
+        root = pathlib.Path(options.path)
+        root.mkdir(parents=True, exist_ok=True)
+        keep = True
+    else:
+        root = pathlib.Path(tempfile.mkdtemp())
+        keep = False
+
+    try:
+        if not any(root.iterdir()):
+            print(f"creating {options.files} files in {root}")
+            make_tree(root, options.files, options.per_dir)
+
+        bench("legacy search_files", legacy_search_files, root)
+        bench("search_files", search_files, root)
+        bench(f"search_files workers={options.workers}", search_files, root, workers=options.workers)
+        bench("search_files exclude_dirs", search_files, root, exclude_dirs="group_000[1-9]")
+
+        with tempfile.TemporaryDirectory() as index_path:
+            index = FileIndex(pathlib.Path(index_path))
+            bench("search_files index (cold)", search_files, root, index=index)
+            bench("search_files index (memory)", search_files, root, index=index)
+            bench("search_files index (disk)", search_files, root, index=FileIndex(pathlib.Path(index_path)))
+    finally:
+        if not keep:
+            shutil.rmtree(root)
+
+
+if __name__ == '__main__':
+    main()
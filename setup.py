@@ -30,6 +30,7 @@ def main():
         'long_description': README_PATH.read_text("utf8"),
         'long_description_content_type': 'text/markdown',
         'packages': setup_helpers.build_package_list('xappt'),
+        'py_modules': ['xapptc'],
         'include_package_data': True,
         'zip_safe': False,
         'license': 'MIT',
@@ -48,7 +49,10 @@ def main():
             'Programming Language :: Python :: 3.9',
         ],
         'entry_points': {
-            'console_scripts': ['xappt=xappt.cli:entry_point'],
+            'console_scripts': [
+                'xappt=xappt.cli:entry_point',
+                'xapptc=xapptc:entry_point',
+            ],
         },
     }
 
@@ -3,6 +3,7 @@ import logging
 import os
 import pathlib
 import shutil
+import sys
 import unittest
 
 from typing import Generator, Optional, Type
@@ -190,6 +191,158 @@ class TestPluginManager(unittest.TestCase):
                 # ToolPlugin03 has a bad import... it should not load
                 self.assertNotIn("toolplugin03", all_tool_plugins)
 
+    def test_discover_plugins_preload(self):
+        with temporary_path() as tmp:
+            shutil.unpack_archive(TEST_PLUGINS_ARCHIVE, tmp)
+            with patch.dict('os.environ', {PLUGIN_PATH_ENV: str(tmp)}):
+                plugin_manager.discover_plugins(force=True, preload=True)
+                all_tool_plugins = [p[0] for p in plugin_manager.registered_tools()]
+                self.assertIn("toolplugin01", all_tool_plugins)
+            self.assertTrue(tmp.joinpath("xappt_test_plugins", "__pycache__").is_dir())
+
+    def test_preload_modules_timeout(self):
+        with temporary_path() as tmp:
+            shutil.unpack_archive(TEST_PLUGINS_ARCHIVE, tmp)
+            try:
+                plugin_manager.preload_modules([tmp.joinpath("xappt_test_plugins")], timeout=0.0)
+            except Exception as e:
+                self.fail(f"preloading should not raise: {e}")
+
+    def test_import_times(self):
+        with temporary_path() as tmp:
+            module_path = tmp.joinpath("xappt_import_time_test.py")
+            module_path.write_text("")
+            try:
+                self.assertTrue(plugin_manager.import_module("xappt_import_time_test", tmp))
+            finally:
+                sys.modules.pop("xappt_import_time_test", None)
+            self.assertIn("xappt_import_time_test", plugin_manager.IMPORT_TIMES)
+            self.assertGreaterEqual(plugin_manager.IMPORT_TIMES["xappt_import_time_test"], 0.0)
+
+    def test_import_module_sys_path(self):
+        with temporary_path() as tmp:
+            package_path = tmp.joinpath("xappt_spec_import_test", "plugins")
+            package_path.mkdir(parents=True)
+            package_path.parent.joinpath("__init__.py").write_text("")
+            package_path.joinpath("__init__.py").write_text("VALUE = 1\n")
+            sys_path = list(sys.path)
+            try:
+                self.assertTrue(plugin_manager.import_module("xappt_spec_import_test.plugins", tmp))
+                self.assertEqual(1, sys.modules["xappt_spec_import_test.plugins"].VALUE)
+                self.assertListEqual(sys_path, sys.path)
+            finally:
+                sys.modules.pop("xappt_spec_import_test.plugins", None)
+                sys.modules.pop("xappt_spec_import_test", None)
+
+    def test_import_module_missing(self):
+        with temporary_path() as tmp:
+            sys_path = list(sys.path)
+            self.assertFalse(plugin_manager.import_module("xappt_missing_module", tmp))
+            self.assertNotIn("xappt_missing_module", sys.modules)
+            self.assertIn("xappt_missing_module", plugin_manager.IMPORT_ERRORS)
+            self.assertListEqual(sys_path, sys.path)
+
+    def test_discovery_report(self):
+        with temporary_path() as tmp:
+            shutil.unpack_archive(TEST_PLUGINS_ARCHIVE, tmp)
+            with patch.dict('os.environ', {PLUGIN_PATH_ENV: str(tmp)}):
+                plugin_manager.discover_plugins(force=True)
+            report = plugin_manager.discovery_report()
+            self.assertEqual(tmp, report[0].path)
+            self.assertGreaterEqual(report[0].scan_time, 0.0)
+            self.assertEqual(1, len(report[0].modules))
+            module_report = report[0].modules[0]
+            self.assertEqual("xappt_test_plugins", module_report.name)
+            # ToolPlugin03 has a bad import... the error should be reported
+            self.assertFalse(module_report.imported)
+            self.assertIn("trigger_an_import_error", module_report.error)
+            self.assertEqual([module_report], report[0].failed_modules)
+
+    def test_discovery_budget_defer(self):
+        with temporary_path() as tmp:
+            for i in range(2):
+                tmp.joinpath(f"xappt_budget_test_{i}.py").write_text(
+                    "import xappt\n"
+                    "@xappt.register_plugin\n"
+                    f"class BudgetTestTool{i}(xappt.BaseTool):\n"
+                    "    def execute(self, **kwargs):\n"
+                    "        return 0\n")
+            try:
+                with patch.dict('os.environ', {PLUGIN_PATH_ENV: str(tmp)}):
+                    plugin_manager.discover_plugins(force=True, budget=0.0, defer=True)
+                modules = plugin_manager.discovery_report()[0].modules
+                self.assertEqual(["xappt_budget_test_0", "xappt_budget_test_1"], sorted(m.name for m in modules))
+                self.assertFalse(modules[0].deferred)
+                self.assertTrue(modules[1].deferred)
+                deferred_tool = f"budgettesttool{modules[1].name[-1]}"
+                self.assertNotIn(deferred_tool, [p[0] for p in plugin_manager.registered_tools()])
+                self.assertIsNotNone(plugin_manager.get_tool_plugin(deferred_tool))
+                self.assertFalse(modules[1].deferred)
+                self.assertEqual(1, modules[1].plugins)
+            finally:
+                for i in range(2):
+                    sys.modules.pop(f"xappt_budget_test_{i}", None)
+                    plugin_manager.PLUGIN_REGISTRY[PLUGIN_TYPE_TOOL].pop(f"budgettesttool{i}", None)
+
+    def test_rediscover_plugins(self):
+        def write_module(path: pathlib.Path, *class_names: str):
+            source = "import xappt\n"
+            for class_name in class_names:
+                source += f"@xappt.register_plugin\nclass {class_name}(xappt.BaseTool):\n" \
+                          "    def execute(self, **kwargs):\n        return 0\n"
+            path.write_text(source)
+
+        changes = []
+
+        def on_changed(**kwargs):
+            changes.append(kwargs)
+
+        plugin_manager.on_registry_changed.add(on_changed)
+        with temporary_path() as tmp:
+            module_path = tmp.joinpath("xappt_rediscover_test.py")
+            write_module(module_path, "RediscoverToolA")
+            try:
+                with patch.dict('os.environ', {PLUGIN_PATH_ENV: str(tmp)}):
+                    plugin_manager.discover_plugins(force=True)
+                    self.assertIsNotNone(plugin_manager.get_tool_plugin("rediscovertoola"))
+
+                    result = plugin_manager.rediscover_plugins()
+                    self.assertDictEqual({'added': [], 'removed': [], 'reloaded': []}, result)
+                    self.assertListEqual([], changes)
+
+                    write_module(module_path, "RediscoverToolA", "RediscoverToolB")
+                    mtime = module_path.stat().st_mtime + 10
+                    os.utime(module_path, (mtime, mtime))
+                    result = plugin_manager.rediscover_plugins()
+                    self.assertDictEqual({'added': ["rediscovertoolb"], 'removed': [],
+                                          'reloaded': ["rediscovertoola"]}, result)
+                    self.assertListEqual([result], changes)
+                    tool_a = plugin_manager.get_tool_plugin("rediscovertoola")
+                    self.assertEqual("xappt_rediscover_test", tool_a.__module__)
+
+                    new_module_path = tmp.joinpath("xappt_rediscover_test_new.py")
+                    write_module(new_module_path, "RediscoverToolC")
+                    result = plugin_manager.rediscover_plugins()
+                    self.assertListEqual(["rediscovertoolc"], result['added'])
+
+                    module_path.unlink()
+                    result = plugin_manager.rediscover_plugins()
+                    self.assertDictEqual({'added': [], 'removed': ["rediscovertoola", "rediscovertoolb"],
+                                          'reloaded': []}, result)
+                    self.assertNotIn("xappt_rediscover_test", sys.modules)
+                    with self.assertRaises(ValueError):
+                        plugin_manager.get_tool_plugin("rediscovertoola")
+            finally:
+                plugin_manager.unload_module("xappt_rediscover_test")
+                plugin_manager.unload_module("xappt_rediscover_test_new")
+                plugin_manager.on_registry_changed.remove(on_changed)
+
+    def test_unregister_plugin(self):
+        with temp_register(RealToolPlugin) as name:
+            self.assertTrue(plugin_manager.unregister_plugin(RealToolPlugin))
+            self.assertNotIn(name, plugin_manager.PLUGIN_REGISTRY[PLUGIN_TYPE_TOOL])
+            self.assertFalse(plugin_manager.unregister_plugin(name))
+
     def test_discover_no_plugins(self):
         with patch.dict('os.environ', values={}, clear=True):
             plugin_manager.discover_plugins()
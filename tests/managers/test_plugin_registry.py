@@ -0,0 +1,91 @@
+import unittest
+
+from xappt.managers import plugin_manager
+from xappt.managers.plugin_registry import PluginTable
+from xappt.models import BaseTool
+
+from tests.managers.test_plugin_manager import temp_register
+
+
+def make_tool(name: str, collection: str):
+    return type(name, (BaseTool, ), {
+        'collection': classmethod(lambda cls: collection),
+        'execute': lambda self, **kwargs: 0,
+    })
+
+
+class TestPluginTable(unittest.TestCase):
+    def setUp(self) -> None:
+        self.table = PluginTable()
+        self.alpha = make_tool("Alpha", "first")
+        self.alphabet = make_tool("Alphabet", "first")
+        self.beta = make_tool("Beta", "second")
+        self.table["alpha"] = {'class': self.alpha, 'visible': True}
+        self.table["alphabet"] = {'class': self.alphabet, 'visible': False}
+        self.table["beta"] = {'class': self.beta, 'visible': True}
+
+    def test_collections(self):
+        self.assertListEqual(["first", "second"], self.table.collections())
+
+    def test_in_collection(self):
+        self.assertDictEqual({'alpha': self.alpha}, self.table.in_collection("first"))
+        self.assertDictEqual({'alpha': self.alpha, 'alphabet': self.alphabet},
+                             self.table.in_collection("first", include_hidden=True))
+        self.assertDictEqual({}, self.table.in_collection("missing"))
+
+    def test_visible(self):
+        self.assertListEqual(["alpha", "beta"], list(self.table.visible()))
+
+    def test_delete(self):
+        del self.table["beta"]
+        self.assertListEqual(["first"], self.table.collections())
+        self.assertNotIn("beta", self.table.visible())
+        self.assertListEqual(["alpha"], self.table.sorted_names())
+
+    def test_pop(self):
+        self.assertIs(self.alpha, self.table.pop("alpha")['class'])
+        self.assertIsNone(self.table.pop("alpha", None))
+        with self.assertRaises(KeyError):
+            self.table.pop("alpha")
+        self.assertListEqual(["alphabet"], self.table.sorted_names("first", include_hidden=True))
+
+    def test_replace(self):
+        self.table["beta"] = {'class': make_tool("Beta", "third"), 'visible': False}
+        self.assertListEqual(["first", "third"], self.table.collections())
+        self.assertNotIn("beta", self.table.visible())
+
+    def test_clear(self):
+        self.table.clear()
+        self.assertListEqual([], self.table.collections())
+        self.assertListEqual([], self.table.sorted_names(include_hidden=True))
+
+    def test_sorted_names_cache(self):
+        self.assertListEqual(["alpha", "beta"], self.table.sorted_names())
+        self.table["aardvark"] = {'class': make_tool("Aardvark", "second"), 'visible': True}
+        self.assertListEqual(["aardvark", "alpha", "beta"], self.table.sorted_names())
+
+    def test_search_prefix(self):
+        self.assertListEqual(["alpha"], self.table.search("al"))
+        self.assertListEqual(["alpha", "alphabet"], self.table.search("al", include_hidden=True))
+        self.assertListEqual(["alpha"], self.table.search("al", include_hidden=True, limit=1))
+        self.assertListEqual([], self.table.search("z"))
+
+    def test_search_fuzzy(self):
+        self.assertEqual("alpha", self.table.search("alpah", fuzzy=True)[0])
+
+
+class TestPluginManagerQueries(unittest.TestCase):
+    def test_tools_in_collection(self):
+        tool_b = make_tool("CollectionToolB", "test-collection")
+        tool_a = make_tool("CollectionToolA", "test-collection")
+        with temp_register(tool_b), temp_register(tool_a):
+            self.assertIn("test-collection", plugin_manager.tool_collections())
+            self.assertListEqual([("collectiontoola", tool_a), ("collectiontoolb", tool_b)],
+                                 plugin_manager.tools_in_collection("test-collection"))
+        self.assertNotIn("test-collection", plugin_manager.tool_collections())
+
+    def test_search_tools(self):
+        tool = make_tool("SearchableTool", "test-collection")
+        with temp_register(tool):
+            self.assertIn(("searchabletool", tool), plugin_manager.search_tools("searchable"))
+            self.assertIn(("searchabletool", tool), plugin_manager.search_tools("searchabeltool", fuzzy=True))
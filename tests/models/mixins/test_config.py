@@ -1,10 +1,13 @@
 import json
+import pathlib
 import tempfile
 import unittest
 
 from unittest import mock
 
-from xappt.models.mixins.config import ConfigMixin
+from xappt.models.mixins.config import ConfigMixin, flush_deferred_configs
+from xappt.utilities.config_store import FileConfigStore, SqliteConfigStore, get_config_store, set_config_store
+from xappt.utilities.path.atomic import atomic_write
 from xappt.utilities.path.temp_path import temporary_path
 
 
@@ -104,3 +107,94 @@ class TestConfigMixin(unittest.TestCase):
                 cm.load_config()
             except RuntimeError:
                 self.fail("No errors should be raised.")
+
+    def test_save_config_unchanged(self):
+        cm = ConfigMixin()
+        cm.add_config_item(key="test-int", saver=lambda: 123, loader=lambda x: x, default=456)
+        with temporary_path() as tmp:
+            cm.config_path = tmp.joinpath("config")
+            cm.save_config()
+            with mock.patch("xappt.utilities.config_store.atomic_write") as write_mock:
+                cm.save_config()
+                self.assertFalse(write_mock.called)
+                cm.config_path.unlink()
+                cm.save_config()
+                self.assertTrue(write_mock.called)
+
+    def test_save_config_deferred(self):
+        values = {'value': 1}
+        cm = ConfigMixin()
+        cm.add_config_item(key="test-int", saver=lambda: values['value'], loader=lambda x: x, default=0)
+        with temporary_path() as tmp:
+            cm.config_path = tmp.joinpath("config")
+            with mock.patch("xappt.utilities.config_store.atomic_write", wraps=atomic_write) as write_mock:
+                for i in range(5):
+                    values['value'] = i
+                    cm.save_config(deferred=True)
+                self.assertFalse(cm.config_path.exists())
+                flush_deferred_configs()
+                self.assertEqual(1, write_mock.call_count)
+            with cm.config_path.open("r") as fp:
+                self.assertEqual(4, json.load(fp)["test-int"])
+            self.assertListEqual(["config", "config.lock"], sorted(p.name for p in tmp.iterdir()))
+
+    def test_sqlite_store(self):
+        loaded = []
+        cm = ConfigMixin()
+        cm.add_config_item(key="test-int", saver=lambda: 123, loader=loaded.append, default=456)
+        default_store = get_config_store()
+        with temporary_path() as tmp:
+            store = SqliteConfigStore(tmp.joinpath("config.db"))
+            set_config_store(store)
+            try:
+                cm.config_path = tmp.joinpath("config")
+                cm.load_config()
+                cm.save_config()
+                self.assertFalse(cm.config_path.exists())
+                store.invalidate()
+                cm.load_config()
+                store.close()
+            finally:
+                set_config_store(default_store)
+        self.assertListEqual([456, 123], loaded)
+
+    def test_load_config_cached(self):
+        loaded = []
+        cm = ConfigMixin()
+        cm.add_config_item(key="test-int", saver=lambda: 123, loader=loaded.append, default=456)
+        default_store = get_config_store()
+        set_config_store(FileConfigStore())
+        try:
+            with temporary_path() as tmp:
+                cm.config_path = tmp.joinpath("config")
+                cm.save_config()
+                with mock.patch("pathlib.Path.open", autospec=True, side_effect=pathlib.Path.open) as open_mock:
+                    for _ in range(3):
+                        cm.load_config()
+                    self.assertEqual(0, open_mock.call_count)
+                    # modified by another process
+                    with open(str(cm.config_path), "w") as fp:
+                        json.dump({"test-int": 789000}, fp)
+                    cm.load_config()
+                    self.assertEqual(1, open_mock.call_count)
+        finally:
+            set_config_store(default_store)
+        self.assertListEqual([123, 123, 123, 789000], loaded)
+
+    def test_load_config_not_shared(self):
+        loaded = []
+        default_store = get_config_store()
+        set_config_store(FileConfigStore())
+        try:
+            with temporary_path() as tmp:
+                config_path = tmp.joinpath("config")
+                config_path.write_text(json.dumps({"items": [1, 2]}))
+                for _ in range(2):
+                    cm = ConfigMixin()
+                    cm.add_config_item(key="items", saver=lambda: [], loader=loaded.append, default=[])
+                    cm.config_path = config_path
+                    cm.load_config()
+                    loaded[-1].append(99)
+        finally:
+            set_config_store(default_store)
+        self.assertListEqual([[1, 2, 99], [1, 2, 99]], loaded)
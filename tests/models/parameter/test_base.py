@@ -0,0 +1,82 @@
+import unittest
+
+from xappt.models.parameter.base import BaseParameterPlugin
+from xappt.models.parameter.errors import ParameterValidationError
+from xappt.models.parameter.model import Parameter, ParamSetupDict
+from xappt.models.parameter.parameters import *
+
+
+class EagerPlugin(BaseParameterPlugin):
+    name_param = ParamString(default="name")
+    count = ParamInt(default=3, minimum=0, maximum=10)
+    mode = ParamString(choices=("fast", "slow"), default="fast")
+    enabled = ParamBool()
+    required = ParamString(required=True)
+
+
+class LazyPlugin(EagerPlugin):
+    @classmethod
+    def lazy_parameters(cls) -> bool:
+        return True
+
+
+def materialized(plugin, name) -> bool:
+    return getattr(type(plugin), name).is_materialized(plugin)
+
+
+class TestLazyParameters(unittest.TestCase):
+    def test_param_dict_matches_eager(self):
+        for kwargs in ({}, {'count': 5, 'mode': "slow", 'enabled': "yes"}, {'name_param': None}):
+            with self.subTest(kwargs=kwargs):
+                eager = EagerPlugin(**kwargs)
+                lazy = LazyPlugin(**kwargs)
+                self.assertDictEqual(eager.param_dict(), lazy.param_dict())
+                for param_name in LazyPlugin._parameters_:
+                    self.assertFalse(materialized(lazy, param_name))
+                    self.assertEqual(getattr(eager, param_name).value, getattr(lazy, param_name).value)
+
+    def test_materialized_on_access(self):
+        plugin = LazyPlugin(count=7)
+        self.assertFalse(materialized(plugin, "count"))
+        param = plugin.count
+        self.assertIsInstance(param, Parameter)
+        self.assertIs(param, plugin.count)
+        self.assertTrue(materialized(plugin, "count"))
+        self.assertFalse(materialized(plugin, "mode"))
+        self.assertEqual(7, param.value)
+
+        changes = []
+
+        def on_value_changed(param):
+            changes.append(param.value)
+
+        param.on_value_changed.add(on_value_changed)
+        param.value = 8
+        self.assertEqual([8], changes)
+        self.assertEqual(8, plugin.param_dict()['count'])
+
+    def test_validation_errors(self):
+        for plugin_class in (EagerPlugin, LazyPlugin):
+            with self.subTest(plugin_class=plugin_class.__name__):
+                with self.assertRaises(ParameterValidationError):
+                    plugin_class(count=20)
+                with self.assertRaises(ParameterValidationError):
+                    plugin_class(mode="other")
+                plugin_class(required="value").validate()
+
+    def test_setup_dict(self):
+        plugin = LazyPlugin(mode=ParamSetupDict(choices=("fast", "slow", "other"), value="other"))
+        self.assertTrue(materialized(plugin, "mode"))
+        self.assertEqual("other", plugin.mode.value)
+        self.assertEqual("other", plugin.param_dict()['mode'])
+
+
+class TestGetParameter(unittest.TestCase):
+    def test_get_parameter(self):
+        for plugin_class in (EagerPlugin, LazyPlugin):
+            with self.subTest(plugin_class=plugin_class.__name__):
+                plugin = plugin_class(count=4)
+                self.assertIs(plugin.count, plugin.get_parameter("count"))
+                self.assertEqual(4, plugin.get_parameter("count").value)
+                with self.assertRaises(KeyError):
+                    plugin.get_parameter("missing")
@@ -39,3 +39,60 @@ class TestParamMeta(unittest.TestCase):
         self.assertListEqual(['param1'], tm._parameters_)
         self.assertIsInstance(tm.param1, Parameter)
         self.assertIs(tm.param1.data_type, int)
+
+    def test_metaclass_parameter_table(self):
+        class TestMetaA(metaclass=ParamMeta):
+            param1 = ParamString()
+            param2 = ParamString()
+
+        class TestMetaB(TestMetaA, metaclass=ParamMeta):
+            param1 = ParamInt()
+            param3 = ParamBool()
+
+        self.assertListEqual(['param1', 'param2', 'param3'], list(TestMetaB._parameter_table_))
+        self.assertListEqual(['param1', 'param2', 'param3'], TestMetaB._parameters_)
+        self.assertIs(TestMetaB.__dict__['param1'], TestMetaB._parameter_table_['param1'])
+        self.assertIs(TestMetaA.__dict__['param1'], TestMetaA._parameter_table_['param1'])
+
+    def test_metaclass_diamond(self):
+        class TestMetaA(metaclass=ParamMeta):
+            param1 = ParamString()
+
+        class TestMetaB(TestMetaA, metaclass=ParamMeta):
+            param1 = ParamInt()
+
+        class TestMetaC(TestMetaA, metaclass=ParamMeta):
+            param2 = ParamBool()
+
+        class TestMetaD(TestMetaC, TestMetaB, metaclass=ParamMeta):
+            pass
+
+        self.assertListEqual(['param1', 'param2'], TestMetaD._parameters_)
+        # resolved through the mro, like attribute access
+        self.assertIs(TestMetaB.__dict__['param1'], TestMetaD._parameter_table_['param1'])
+
+    def test_metaclass_override_non_parameter(self):
+        class TestMetaA(metaclass=ParamMeta):
+            param1 = ParamString()
+            param2 = ParamString()
+
+        class TestMetaB(TestMetaA, metaclass=ParamMeta):
+            param1 = None
+
+        self.assertListEqual(['param2'], TestMetaB._parameters_)
+
+    def test_metaclass_shared_descriptor_name(self):
+        shared = ParamString()
+
+        class TestMetaA(metaclass=ParamMeta):
+            param1 = shared
+
+        class TestMetaB(metaclass=ParamMeta):
+            param1 = shared
+
+        self.assertEqual("param1", shared.param_setup_args['name'])
+        self.assertIs(shared, TestMetaB._parameter_table_['param1'])
+
+        with self.assertRaises(TypeError):
+            class TestMetaC(metaclass=ParamMeta):
+                other_name = shared
@@ -0,0 +1,85 @@
+import argparse
+import json
+import pathlib
+import unittest
+
+from xappt.models.parameter import convert
+from xappt.models.parameter.base import BaseParameterPlugin
+from xappt.models.parameter.model import ParameterDescriptor
+from xappt.models.parameter.parameters import *
+from xappt.models.parameter.schema import *
+
+
+class SchemaPlugin(BaseParameterPlugin):
+    count = ParamInt(default=2, minimum=1, maximum=10, description="How many")
+    mode = ParamString(choices=("fast", "slow"))
+    index = ParamInt(choices=("a", "b", "c"))
+    items = ParamList(choices=("x", "y", "z"), required=True, options={'short_name': "i"})
+    flag = ParamBool(hidden=True)
+
+    @classmethod
+    def help(cls) -> str:
+        return "A tool for testing schemas"
+
+
+class TestParameterSchema(unittest.TestCase):
+    def test_schema_built_once(self):
+        schema = SchemaPlugin.parameter_schema()
+        self.assertIs(schema, SchemaPlugin.parameter_schema())
+        self.assertEqual(['count', 'mode', 'index', 'items', 'flag'], [param.name for param in schema])
+        count = schema[0]
+        self.assertEqual(("int", 2, False, {'minimum': 1, 'maximum': 10}),
+                         (count.type, count.default, count.required, count.options))
+
+    def test_subclass_schema(self):
+        class SubPlugin(SchemaPlugin):
+            extra = ParamFloat()
+
+        self.assertEqual(len(SchemaPlugin.parameter_schema()) + 1, len(SubPlugin.parameter_schema()))
+        self.assertEqual("float", SubPlugin.parameter_schema()[-1].type)
+
+    def test_dict_round_trip(self):
+        schema = SchemaPlugin.parameter_schema()
+        serialized = json.loads(json.dumps(schema_to_dict(schema)))
+        self.assertEqual(schema, schema_from_dict(serialized))
+
+    def test_argument_dict(self):
+        for descriptor, param in zip(SchemaPlugin.class_parameters(), SchemaPlugin.parameter_schema()):
+            with self.subTest(param=param.name):
+                args, kwargs = convert.to_argument_dict(descriptor.param_setup_args)
+                schema_args, schema_kwargs = to_argument_dict(param)
+                self.assertEqual(args, schema_args)
+                if kwargs.get('choices') is not None:
+                    kwargs['choices'] = tuple(kwargs['choices'])
+                self.assertEqual(kwargs, schema_kwargs)
+
+        parser = argparse.ArgumentParser()
+        for param in SchemaPlugin.parameter_schema():
+            args, kwargs = to_argument_dict(param)
+            parser.add_argument(*args, **kwargs)
+        options = parser.parse_args(["-i", "x", "y", "--mode", "slow"])
+        self.assertEqual((["x", "y"], "slow", 2), (options.items, options.mode, options.count))
+
+    def test_json_schema(self):
+        json_schema = SchemaPlugin.json_schema()
+        self.assertEqual("schemaplugin", json_schema['title'])
+        self.assertEqual("A tool for testing schemas", json_schema['description'])
+        self.assertEqual(['items'], json_schema['required'])
+        properties = json_schema['properties']
+        self.assertEqual({'type': "integer", 'minimum': 1, 'maximum': 10},
+                         {k: properties['count'][k] for k in ("type", "minimum", "maximum")})
+        self.assertEqual(["fast", "slow"], properties['mode']['enum'])
+        self.assertEqual(2, len(properties['index']['anyOf']))
+        self.assertEqual("array", properties['items']['type'])
+        self.assertTrue(properties['flag']['x-hidden'])
+        self.assertNotIn('x-type', properties['count'])
+        json.dumps(json_schema)
+
+    def test_custom_type(self):
+        class PathPlugin(BaseParameterPlugin):
+            path = ParameterDescriptor(data_type=pathlib.Path)
+
+        param = PathPlugin.parameter_schema()[0]
+        self.assertEqual("pathlib.Path", param.type)
+        prop = PathPlugin.json_schema()['properties']['path']
+        self.assertEqual({'type': "string", 'x-type': "pathlib.Path"}, prop)
@@ -4,9 +4,14 @@ import unittest
 from typing import Optional
 from unittest import mock
 
+from xappt.models.parameter.parameters import ParamString
+from xappt.models.parameter.validators import ValidateFileExists
 from xappt.models.plugins.interface import BaseInterface
 from xappt.models.plugins.tool import BaseTool
+from xappt.utilities.incremental import IncrementalState
 from xappt.utilities.path.temp_path import temporary_path
+from xappt.utilities.profiling import TraceRecorder
+from xappt.utilities.result_cache import ResultCache
 
 from tests.managers.test_plugin_manager import temp_register
 
@@ -60,6 +65,40 @@ class ToolPluginB(BaseTool):
         return 1
 
 
+class CachedToolPlugin(BaseTool):
+    input_file = ParamString(validators=[ValidateFileExists])
+    execute_count = 0
+
+    @classmethod
+    def cacheable(cls) -> bool:
+        return True
+
+    def execute(self, **kwargs) -> int:
+        CachedToolPlugin.execute_count += 1
+        self.interface.message(f"read {self.input_file.value}")
+        return 0
+
+
+class CopyToolPlugin(BaseTool):
+    source = ParamString()
+    destination = ParamString()
+    execute_count = 0
+
+    @classmethod
+    def input_path_params(cls):
+        return "source",
+
+    @classmethod
+    def output_path_params(cls):
+        return "destination",
+
+    def execute(self, **kwargs) -> int:
+        CopyToolPlugin.execute_count += 1
+        with open(self.source.value, "r") as src, open(self.destination.value, "w") as dst:
+            dst.write(src.read())
+        return 0
+
+
 class TestBaseInterface(unittest.TestCase):
     def test_run(self):
         iface = InterfacePlugin()
@@ -134,3 +173,76 @@ class TestBaseInterface(unittest.TestCase):
             result = iface.run_subprocess(mkdir_cmd, cwd=tmp, shell=False)
             self.assertEqual(0, result)
             self.assertTrue(tmp.joinpath(test_directory_name).is_dir())
+
+    def test_execute_tool_cached(self):
+        iface = InterfacePlugin()
+        with temporary_path() as tmp:
+            input_file = tmp.joinpath("input.txt")
+            input_file.write_text("first")
+            iface.result_cache = ResultCache(tmp.joinpath("cache"))
+            CachedToolPlugin.execute_count = 0
+
+            for _ in range(2):
+                tool = CachedToolPlugin(interface=iface, input_file=str(input_file))
+                self.assertEqual(0, iface.execute_tool(tool))
+            self.assertEqual(1, CachedToolPlugin.execute_count)
+            # the recorded message is replayed on a cache hit
+            self.assertEqual(2, len(iface.tool_data['message']['called']))
+
+            input_file.write_text("second")
+            tool = CachedToolPlugin(interface=iface, input_file=str(input_file))
+            self.assertEqual(0, iface.execute_tool(tool))
+            self.assertEqual(2, CachedToolPlugin.execute_count)
+
+    def test_execute_tool_not_cacheable(self):
+        iface = InterfacePlugin()
+        with temporary_path() as tmp:
+            iface.result_cache = ResultCache(tmp)
+            tool = ToolPluginB(interface=iface)
+            self.assertEqual(1, iface.execute_tool(tool))
+            self.assertEqual(0, len(list(tmp.iterdir())))
+
+    def test_execute_tool_incremental(self):
+        iface = InterfacePlugin()
+        with temporary_path() as tmp:
+            source = tmp.joinpath("source.txt")
+            destination = tmp.joinpath("destination.txt")
+            source.write_text("first")
+            iface.incremental = IncrementalState(tmp.joinpath("state"))
+            CopyToolPlugin.execute_count = 0
+
+            for _ in range(2):
+                tool = CopyToolPlugin(interface=iface, source=str(source), destination=str(destination))
+                self.assertEqual(0, iface.execute_tool(tool))
+            self.assertEqual(1, CopyToolPlugin.execute_count)
+
+            source.write_text("second")
+            destination_mtime = destination.stat().st_mtime_ns
+            os.utime(source, ns=(destination_mtime + 1, destination_mtime + 1))
+            tool = CopyToolPlugin(interface=iface, source=str(source), destination=str(destination))
+            self.assertEqual(0, iface.execute_tool(tool))
+            self.assertEqual(2, CopyToolPlugin.execute_count)
+            self.assertEqual("second", destination.read_text())
+
+    def test_profile_events(self):
+        recorder = TraceRecorder()
+        iface = InterfacePlugin()
+        iface.on_profile_event.add(recorder.record)
+        iface.add_tool(ToolPluginA)
+        iface.run()
+        event_names = [event.name for event in recorder.events]
+        self.assertListEqual(["construct", "prompt"], event_names)
+        for event in recorder.events:
+            self.assertEqual("toolplugina", event.args['tool'])
+            self.assertGreaterEqual(event.duration, 0.0)
+
+    def test_profile_events_execute(self):
+        recorder = TraceRecorder()
+        iface = InterfacePlugin()
+        iface.on_profile_event.add(recorder.record)
+        iface.execute_tool(ToolPluginA(interface=iface))
+        if os.name == "posix":
+            iface.run_subprocess(("true", ))
+            self.assertListEqual(["execute", "subprocess"], [event.name for event in recorder.events])
+        else:
+            self.assertListEqual(["execute"], [event.name for event in recorder.events])
@@ -0,0 +1,69 @@
+import argparse
+import contextlib
+import io
+import pathlib
+import sys
+import unittest
+
+from unittest.mock import patch
+
+from xappt.cli import _build_main_parser, _names_unknown_plugin, add_tool_args, cli_main
+from xappt.models import BaseTool
+from xappt.models.parameter.model import ParameterDescriptor
+from xappt.constants import *
+from xappt.managers import plugin_manager
+from xappt.utilities.path import temporary_path
+
+
+class PathTool(BaseTool):
+    path = ParameterDescriptor(data_type=pathlib.Path)
+
+    def execute(self, **kwargs) -> int:
+        return 0
+
+
+class TestCli(unittest.TestCase):
+    def test_custom_type_argument(self):
+        for _ in range(2):  # built, then cached
+            parser = argparse.ArgumentParser()
+            add_tool_args(parser, PathTool)
+            options = parser.parse_args(["--path", "some/file"])
+            self.assertEqual(pathlib.Path("some/file"), options.path)
+
+    def test_names_unknown_plugin(self):
+        parser = _build_main_parser()
+        parser.add_argument('--new-option', metavar='VALUE')
+        tool_name = next(iter(plugin_manager.registered_tools()))[1].name()
+        self.assertFalse(_names_unknown_plugin(parser, ["--new-option", "value", tool_name]))
+        self.assertFalse(_names_unknown_plugin(parser, ["--new-option=value", "--list"]))
+        self.assertTrue(_names_unknown_plugin(parser, ["--new-option", "value", "notatool"]))
+        self.assertTrue(_names_unknown_plugin(parser, ["--serve", "--interface=notaninterface"]))
+
+    def test_deferred_tool(self):
+        with temporary_path() as tmp:
+            for i in range(2):
+                tmp.joinpath(f"xappt_cli_defer_test_{i}.py").write_text(
+                    "import xappt\n"
+                    "@xappt.register_plugin\n"
+                    f"class CliDeferTestTool{i}(xappt.BaseTool):\n"
+                    "    def execute(self, **kwargs):\n"
+                    f"        return {i + 10}\n")
+            try:
+                with patch.dict('os.environ', {PLUGIN_PATH_ENV: str(tmp)}):
+                    plugin_manager.discover_plugins(force=True, budget=0.0, defer=True)
+                deferred = [m for m in plugin_manager.discovery_report()[0].modules if m.deferred]
+                self.assertEqual(1, len(deferred))
+                i = int(deferred[0].name[-1])
+                output = io.StringIO()
+                with contextlib.redirect_stdout(output):
+                    self.assertEqual(0, cli_main("--list"))
+                self.assertIn(deferred[0].name, output.getvalue())
+                self.assertTrue(deferred[0].deferred)
+                with patch.dict('os.environ', {INTERFACE_ENV: INTERFACE_DEFAULT}):
+                    self.assertEqual(i + 10, cli_main(f"clidefertesttool{i}"))
+                self.assertFalse(deferred[0].deferred)
+            finally:
+                for i in range(2):
+                    sys.modules.pop(f"xappt_cli_defer_test_{i}", None)
+                    plugin_manager.PLUGIN_REGISTRY[PLUGIN_TYPE_TOOL].pop(f"clidefertesttool{i}", None)
+                plugin_manager.DEFERRED_MODULES.clear()
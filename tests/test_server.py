@@ -0,0 +1,140 @@
+import os
+import socket
+import stat
+import threading
+import unittest
+
+from typing import List, Tuple
+from unittest import mock
+
+import xappt
+
+from xappt.__version__ import __version__
+from xappt.server import XapptServer, ForkingXapptServer, send_frame, recv_frame, forwarded_environment
+from xappt.utilities.path import temporary_path
+
+from tests.managers.test_plugin_manager import temp_register
+
+
+class ProcessIdTool(xappt.BaseTool):
+    def execute(self, **kwargs) -> int:
+        self.interface.message(str(os.getpid()))
+        return 0
+
+
+@unittest.skipUnless(hasattr(socket, "AF_UNIX"), "Unix sockets are not available")
+class TestServer(unittest.TestCase):
+    server_class = XapptServer
+
+    def setUp(self) -> None:
+        self._tmp = temporary_path()
+        self.tmp = self._tmp.__enter__()
+        self.socket_path = str(self.tmp.joinpath("xappt.sock"))
+        self.server = self.server_class(self.socket_path)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def tearDown(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+        self._tmp.__exit__(None, None, None)
+
+    def request(self, *argv, **kwargs) -> Tuple[int, List[dict]]:
+        request = {'argv': list(argv), 'env': dict(os.environ), 'cwd': os.getcwd()}
+        request.update(kwargs)
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.connect(self.socket_path)
+            send_frame(sock, request)
+            frames = []
+            while True:
+                frame = recv_frame(sock)
+                self.assertIsNotNone(frame)
+                if 'exit' in frame:
+                    return frame['exit'], frames
+                frames.append(frame)
+
+    def test_run(self):
+        result, frames = self.request("--version")
+        self.assertEqual(0, result)
+        stdout = "".join(f['data'] for f in frames if f['stream'] == "stdout")
+        self.assertIn(__version__, stdout)
+
+    def test_exit_code(self):
+        result, frames = self.request("--not-an-option")
+        self.assertEqual(2, result)
+        self.assertTrue(any(f['stream'] == "stderr" for f in frames))
+
+    def test_environment_restored(self):
+        cwd = os.getcwd()
+        result, _ = self.request("--version", env={'XAPPT_SERVER_TEST': "1"}, cwd=str(self.tmp))
+        self.assertEqual(0, result)
+        self.assertEqual(cwd, os.getcwd())
+        self.assertNotIn('XAPPT_SERVER_TEST', os.environ)
+
+    def test_environment_overlay(self):
+        os.environ['XAPPT_SERVER_TEST'] = "server"
+        try:
+            result, _ = self.request("--version", env={})
+            self.assertEqual(0, result)
+            self.assertEqual("server", os.environ['XAPPT_SERVER_TEST'])
+        finally:
+            del os.environ['XAPPT_SERVER_TEST']
+
+    def test_socket_permissions(self):
+        self.assertEqual(0o600, stat.S_IMODE(os.stat(self.socket_path).st_mode))
+
+    def test_socket_dir_not_private(self):
+        shared = self.tmp.joinpath("shared")
+        shared.mkdir()
+        shared.chmod(0o777)
+        with self.assertRaises(PermissionError):
+            XapptServer(str(shared.joinpath("xappt.sock")))
+
+    def test_socket_dir_created(self):
+        socket_path = self.tmp.joinpath("private", "xappt.sock")
+        server = XapptServer(str(socket_path))
+        server.server_close()
+        self.assertEqual(0o700, stat.S_IMODE(socket_path.parent.stat().st_mode))
+
+    def test_other_user_refused(self):
+        with mock.patch("xappt.server.peer_uid", return_value=os.getuid() + 1):
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.connect(self.socket_path)
+                try:
+                    frame = recv_frame(sock)
+                except ConnectionResetError:
+                    frame = None
+                self.assertIsNone(frame)
+
+    def test_socket_in_use(self):
+        with self.assertRaises(RuntimeError):
+            XapptServer(self.socket_path)
+
+    def test_socket_removed(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.assertFalse(os.path.exists(self.socket_path))
+
+
+class TestForwardedEnvironment(unittest.TestCase):
+    def test_filtered(self):
+        environ = {'PATH': "/bin", 'XAPPT_DEBUG': "1", 'LC_ALL': "C", 'AWS_SECRET_ACCESS_KEY': "secret"}
+        self.assertEqual({'PATH': "/bin", 'XAPPT_DEBUG': "1", 'LC_ALL': "C"}, forwarded_environment(environ))
+
+    def test_extra_names(self):
+        environ = {'PROJECT_ROOT': "/show", 'TOKEN': "secret", 'XAPPT_SERVER_ENV': "PROJECT_ROOT, OTHER"}
+        self.assertEqual({'PROJECT_ROOT': "/show", 'XAPPT_SERVER_ENV': "PROJECT_ROOT, OTHER"},
+                         forwarded_environment(environ))
+
+
+@unittest.skipUnless(hasattr(os, "fork") and hasattr(socket, "AF_UNIX"), "os.fork is not available")
+class TestForkingServer(TestServer):
+    server_class = ForkingXapptServer
+
+    def test_run_in_child(self):
+        with temp_register(ProcessIdTool):
+            result, frames = self.request("processidtool")
+        self.assertEqual(0, result)
+        stdout = "".join(f['data'] for f in frames if f['stream'] == "stdout")
+        self.assertNotEqual(os.getpid(), int(stdout.strip()))
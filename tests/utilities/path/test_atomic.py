@@ -0,0 +1,42 @@
+import threading
+import time
+import unittest
+
+from xappt.utilities.path import atomic_write, file_lock
+from xappt.utilities.path import temporary_path
+
+
+class TestAtomic(unittest.TestCase):
+    def test_atomic_write_replace(self):
+        with temporary_path() as tmp:
+            path = tmp.joinpath("data.txt")
+            path.write_text("old")
+            atomic_write(path, "new")
+            self.assertEqual("new", path.read_text())
+            self.assertListEqual([path], list(tmp.iterdir()))
+
+    def test_atomic_write_failure(self):
+        with temporary_path() as tmp:
+            path = tmp.joinpath("data.txt")
+            path.write_text("old")
+            with self.assertRaises(TypeError):
+                atomic_write(path, 123)  # noqa
+            self.assertEqual("old", path.read_text())
+            self.assertListEqual([path], list(tmp.iterdir()))
+
+    def test_file_lock(self):
+        events = []
+
+        def hold_lock(lock_path):
+            with file_lock(lock_path):
+                events.append("thread")
+
+        with temporary_path() as tmp:
+            lock_path = tmp.joinpath("data.lock")
+            with file_lock(lock_path):
+                thread = threading.Thread(target=hold_lock, args=(lock_path, ))
+                thread.start()
+                time.sleep(0.1)
+                events.append("main")
+            thread.join()
+        self.assertListEqual(["main", "thread"], events)
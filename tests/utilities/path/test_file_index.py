@@ -0,0 +1,66 @@
+import os
+import time
+import unittest
+
+from unittest import mock
+
+from xappt.utilities.path import FileIndex, search_files
+from xappt.utilities.path import temporary_path
+
+
+class TestFileIndex(unittest.TestCase):
+    @staticmethod
+    def age_directories(root):
+        """ Backdate directory mtimes, so that the index trusts them. """
+        old = time.time() - 60
+        for dir_path, _, _ in os.walk(root):
+            os.utime(dir_path, (old, old))
+
+    def make_tree(self, root):
+        for name in ("a/file01.txt", "a/file02.py", "a/b/file03.txt", "c/file04.txt", "file05.txt"):
+            path = root.joinpath(*name.split("/"))
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.touch()
+        self.age_directories(root)
+
+    def search(self, root, index, **kwargs):
+        return sorted(search_files(root, index=index, **kwargs))
+
+    def test_matches_search_files(self):
+        with temporary_path() as tmp:
+            data = tmp.joinpath("data")
+            self.make_tree(data)
+            index = FileIndex(tmp.joinpath("index"))
+            for kwargs in ({'recursive': True}, {'recursive': False}, {'recursive': True, 'max_depth': 1},
+                           {'recursive': True, 'exclude_dirs': "b"}):
+                expected = sorted(search_files(data, patterns="*.txt", **kwargs))
+                self.assertListEqual(expected, self.search(data, index, patterns="*.txt", **kwargs))
+
+    def test_unchanged_directories_not_listed(self):
+        with temporary_path() as tmp:
+            data = tmp.joinpath("data")
+            self.make_tree(data)
+            index_path = tmp.joinpath("index")
+            self.assertEqual(4, len(self.search(data, FileIndex(index_path), patterns="*.txt", recursive=True)))
+
+            # a new index instance loads the snapshot from disk
+            index = FileIndex(index_path)
+            with mock.patch("os.scandir", wraps=os.scandir) as scandir_mock:
+                self.assertEqual(4, len(self.search(data, index, patterns="*.txt", recursive=True)))
+                self.assertEqual(0, scandir_mock.call_count)
+
+                data.joinpath("a", "b", "file06.txt").touch()
+                results = self.search(data, index, patterns="*.txt", recursive=True)
+                self.assertIn(data.joinpath("a", "b", "file06.txt"), results)
+                self.assertEqual(1, scandir_mock.call_count)
+
+    def test_removed_directories(self):
+        with temporary_path() as tmp:
+            data = tmp.joinpath("data")
+            self.make_tree(data)
+            index = FileIndex(tmp.joinpath("index"))
+            self.assertEqual(4, len(self.search(data, index, patterns="*.txt", recursive=True)))
+            data.joinpath("c", "file04.txt").unlink()
+            data.joinpath("c").rmdir()
+            self.assertEqual(3, len(self.search(data, index, patterns="*.txt", recursive=True)))
+            self.assertNotIn("c", index._snapshots[str(data)])
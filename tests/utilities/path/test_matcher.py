@@ -0,0 +1,40 @@
+import fnmatch
+import unittest
+
+from xappt.utilities.path import PathMatcher, get_matcher
+
+NAMES = ("file.py", ".py", "file.PY", "archive.tar.gz", "archive.gz", "README.md", "README.txt",
+         "file-01.txt", "file-1.txt", "shot_0101.exr", "data", "a.b.c")
+
+
+class TestPathMatcher(unittest.TestCase):
+    def test_matches_fnmatch(self):
+        pattern_sets = (
+            ("*.py", ),
+            ("*.py", "*.exr"),
+            ("*.tar.gz", "README.md"),
+            ("file-??.txt", "*.md"),
+            ("shot_[0-9]*.exr", "[!a]*.gz"),
+            ("*", ),
+            ("data", "*.c"),
+        )
+        for patterns in pattern_sets:
+            matcher = PathMatcher(patterns)
+            for name in NAMES:
+                with self.subTest(patterns=patterns, name=name):
+                    expected = any(fnmatch.fnmatchcase(name, pattern) for pattern in patterns)
+                    self.assertEqual(expected, matcher.match(name))
+
+    def test_path_patterns(self):
+        matcher = PathMatcher(("src/**/*.py", "docs/*.md"))
+        self.assertTrue(matcher.has_path_patterns)
+        self.assertTrue(matcher.match("cli.py", "src"))
+        self.assertTrue(matcher.match("cli.py", "src/xappt/models"))
+        self.assertFalse(matcher.match("cli.py", "tests"))
+        self.assertTrue(matcher.match("index.md", "docs"))
+        self.assertFalse(matcher.match("index.md", "docs/api"))
+        self.assertFalse(matcher.match("index.md"))
+
+    def test_get_matcher_cached(self):
+        self.assertIs(get_matcher("*.py"), get_matcher(["*.py"]))
+        self.assertIsNot(get_matcher("*.py"), get_matcher("*.exr"))
@@ -61,6 +61,39 @@ class TestFindFiles(unittest.TestCase):
         files = list(search_files(self.tmp, patterns=("*.txt", "*.py"), recursive=True))
         self.assertEqual(len(files), 14)
 
+    def test_find_files_path_pattern(self):
+        files = list(search_files(self.tmp, patterns="1/**/*.txt", recursive=True))
+        self.assertEqual(len(files), 3)
+        files = list(search_files(self.tmp, patterns="*/*/file01.txt", recursive=True))
+        self.assertEqual(len(files), 2)
+
+    def test_find_files_max_depth(self):
+        files = list(search_files(self.tmp, patterns="*.txt", recursive=True, max_depth=1))
+        self.assertEqual(len(files), 3)
+
+    def test_find_files_exclude_dirs(self):
+        files = list(search_files(self.tmp, patterns="*.txt", recursive=True, exclude_dirs="2"))
+        self.assertEqual(len(files), 4)
+        files = list(search_files(self.tmp, patterns="*.txt", recursive=True, include_dirs="1"))
+        self.assertEqual(len(files), 4)
+
+    def test_find_files_workers(self):
+        serial = sorted(search_files(self.tmp, patterns="*.py", recursive=True))
+        threaded = sorted(search_files(self.tmp, patterns="*.py", recursive=True, workers=4))
+        self.assertListEqual(serial, threaded)
+
+    @unittest.skipIf(os.name == "nt", "symbolic links need extra privileges on Windows")
+    def test_find_files_symlinks(self):
+        with temporary_path() as tmp:
+            tmp.joinpath("a").mkdir()
+            tmp.joinpath("a", "file.txt").touch()
+            tmp.joinpath("a", "loop").symlink_to(tmp)
+            tmp.joinpath("b").symlink_to(tmp.joinpath("a"))
+            files = list(search_files(tmp, patterns="*.txt", recursive=True))
+            self.assertEqual(1, len(files))
+            files = list(search_files(tmp, patterns="*.txt", recursive=True, follow_symlinks=True))
+            self.assertEqual(1, len(files))
+
 
 # noinspection DuplicatedCode
 class TestGetUniqueName(unittest.TestCase):
@@ -90,3 +123,31 @@ class TestGetUniqueName(unittest.TestCase):
             self.assertFalse(base_file.is_file())
             file_path = unique_path(base_file, mode=UniqueMode.INTEGER, length=4, delimiter="_", force=True)
             self.assertEqual(file_path.name, "file_0001.txt")
+
+    def test_get_unique_name_integer_scan(self):
+        with temporary_path() as tmp:
+            for name in ("file-001.txt", "file-007.txt", "file-abc.txt", "file-999.py", "other-050.txt"):
+                tmp.joinpath(name).touch()
+            file_path = unique_path(tmp.joinpath("file.txt"), mode=UniqueMode.INTEGER_SCAN, force=True)
+            self.assertEqual(file_path.name, "file-008.txt")
+
+    def test_get_unique_name_reserve(self):
+        with temporary_path() as tmp:
+            base_file = tmp.joinpath("file.txt")
+            self.assertEqual(unique_path(base_file, mode=UniqueMode.INTEGER_SCAN, reserve=True), base_file)
+            self.assertTrue(base_file.is_file())
+            file_path = unique_path(base_file, mode=UniqueMode.INTEGER_SCAN, reserve=True)
+            self.assertEqual(file_path.name, "file-001.txt")
+            self.assertTrue(file_path.is_file())
+
+    def test_get_unique_name_reserve_concurrent(self):
+        from concurrent.futures import ThreadPoolExecutor
+
+        with temporary_path() as tmp:
+            base_file = tmp.joinpath("file.txt")
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                paths = list(executor.map(
+                    lambda _: unique_path(base_file, mode=UniqueMode.INTEGER_SCAN, force=True, reserve=True),
+                    range(50)))
+            self.assertEqual(len(set(paths)), 50)
+            self.assertEqual(len(os.listdir(tmp)), 50)
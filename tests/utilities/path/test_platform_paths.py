@@ -0,0 +1,35 @@
+import os
+import pathlib
+import unittest
+
+from unittest import mock
+
+from xappt.utilities.path import platform_paths
+
+
+@mock.patch.object(platform_paths, "_system", mock.Mock(return_value="Linux"))
+class TestPlatformPaths(unittest.TestCase):
+    def setUp(self):
+        platform_paths.invalidate_platform_paths()
+
+    def tearDown(self):
+        platform_paths.invalidate_platform_paths()
+
+    def test_xdg_paths(self):
+        env = {'XDG_DATA_HOME': "/data", 'XDG_CACHE_HOME': "/fast/cache", 'XDG_CONFIG_HOME': "/config"}
+        with mock.patch.dict(os.environ, env):
+            self.assertEqual(pathlib.Path("/data"), platform_paths.user_data_path())
+            self.assertEqual(pathlib.Path("/fast/cache"), platform_paths.user_cache_path())
+            self.assertEqual(pathlib.Path("/config"), platform_paths.user_config_path())
+
+    def test_xdg_relative_ignored(self):
+        with mock.patch.dict(os.environ, {'XDG_CACHE_HOME': "relative/cache"}):
+            self.assertEqual(pathlib.Path("~/.cache").expanduser(), platform_paths.user_cache_path())
+
+    def test_cached_until_invalidated(self):
+        with mock.patch.dict(os.environ, {'XDG_CACHE_HOME': "/first"}):
+            self.assertEqual(pathlib.Path("/first"), platform_paths.user_cache_path())
+        with mock.patch.dict(os.environ, {'XDG_CACHE_HOME': "/second"}):
+            self.assertEqual(pathlib.Path("/first"), platform_paths.user_cache_path())
+            platform_paths.invalidate_platform_paths()
+            self.assertEqual(pathlib.Path("/second"), platform_paths.user_cache_path())
@@ -0,0 +1,74 @@
+import errno
+import os
+import unittest
+
+from xappt.utilities import temporary_path
+from xappt.utilities.path.scratch import HOST_TAG, ScratchManager
+
+
+class TestScratchManager(unittest.TestCase):
+    def test_scratch_path(self):
+        with temporary_path() as tmp:
+            manager = ScratchManager(tmp, pool_size=2)
+            try:
+                with manager.scratch_path() as scratch:
+                    self.assertTrue(scratch.is_dir())
+                    self.assertEqual(manager.process_path, scratch.parent)
+                    scratch.joinpath("sub").mkdir()
+                    scratch.joinpath("sub", "file.txt").write_text("data")
+                manager.wait()
+                self.assertTrue(scratch.is_dir())
+                self.assertEqual([], list(scratch.iterdir()))
+                with manager.scratch_path() as reused:
+                    self.assertEqual(scratch, reused)
+            finally:
+                manager.shutdown()
+            self.assertEqual([], list(tmp.iterdir()))
+
+    def test_pool_size(self):
+        with temporary_path() as tmp:
+            manager = ScratchManager(tmp, pool_size=1)
+            try:
+                paths = [manager.acquire() for _ in range(3)]
+                for path in paths:
+                    manager.release(path)
+                manager.wait()
+                self.assertEqual(1, len(list(manager.process_path.iterdir())))
+            finally:
+                manager.shutdown()
+
+    def test_quota(self):
+        with temporary_path() as tmp:
+            manager = ScratchManager(tmp, quota=100)
+            try:
+                scratch = manager.acquire()
+                scratch.joinpath("file.bin").write_bytes(b"0" * 200)
+                with self.assertRaises(OSError) as context:
+                    manager.acquire()
+                self.assertEqual(errno.ENOSPC, context.exception.errno)
+                manager.release(scratch)
+                # the released directory is emptied before the quota is checked again
+                manager.release(manager.acquire())
+            finally:
+                manager.shutdown()
+
+    @unittest.skipUnless(os.name == "posix", "stale folders are only detected on posix systems")
+    def test_remove_stale_folders(self):
+        with temporary_path() as tmp:
+            # a pid that's not in use
+            stale = tmp.joinpath(f"xappt-scratch-{HOST_TAG}-999999999-abc")
+            stale.joinpath("sub").mkdir(parents=True)
+            # the same pid on another host, or from before host tags were added
+            other_host = tmp.joinpath(f"xappt-scratch-{HOST_TAG}_other-999999999-abc")
+            other_host.mkdir()
+            untagged = tmp.joinpath("xappt-scratch-999999999-abc")
+            untagged.mkdir()
+            manager = ScratchManager(tmp)
+            try:
+                self.assertTrue(manager.process_path.name.startswith(f"xappt-scratch-{HOST_TAG}-{os.getpid()}-"))
+                manager.wait()
+                self.assertFalse(stale.exists())
+                self.assertTrue(other_host.exists())
+                self.assertTrue(untagged.exists())
+            finally:
+                manager.shutdown()
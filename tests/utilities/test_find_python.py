@@ -0,0 +1,88 @@
+import os
+import shutil
+import stat
+import sys
+import unittest
+
+from unittest import mock
+
+from xappt.utilities import temporary_path
+from xappt.utilities import find_python, find_pythons, query_python_versions
+from xappt.utilities.find_python import clear_python_cache
+
+
+def make_executable(path):
+    path.write_text("#!/bin/sh\n")
+    path.chmod(path.stat().st_mode | stat.S_IXUSR)
+
+
+@unittest.skipUnless(os.name == "posix", "PATH is only scanned on posix systems")
+class TestFindPythons(unittest.TestCase):
+    def setUp(self):
+        clear_python_cache()
+
+    def tearDown(self):
+        clear_python_cache()
+
+    def test_find_pythons(self):
+        with temporary_path() as tmp:
+            first, second = tmp.joinpath("first"), tmp.joinpath("second")
+            first.mkdir()
+            second.mkdir()
+            make_executable(first.joinpath("python3.8"))
+            make_executable(second.joinpath("python3.8"))
+            make_executable(second.joinpath("python3.10"))
+            second.joinpath("python3.9").write_text("not executable")
+            make_executable(second.joinpath("python3.10-config"))
+
+            with mock.patch.dict(os.environ, {'PATH': os.pathsep.join((str(first), str(second)))}):
+                pythons = find_pythons()
+                self.assertEqual({(3, 8): str(first.joinpath("python3.8")),
+                                  (3, 10): str(second.joinpath("python3.10"))}, pythons)
+                for (major, minor), path in pythons.items():
+                    self.assertEqual(shutil.which(f"python{major}.{minor}"), path)
+                self.assertIsNone(find_python(3, 9))
+                self.assertEqual(str(second.joinpath("python3.10")), find_python("3", "10"))
+
+    def test_find_pythons_cached(self):
+        with temporary_path() as tmp:
+            make_executable(tmp.joinpath("python3.8"))
+            with mock.patch.dict(os.environ, {'PATH': str(tmp)}):
+                self.assertIn((3, 8), find_pythons())
+                with mock.patch("xappt.utilities.find_python._scan_path_posix") as scan:
+                    self.assertIn((3, 8), find_pythons())
+                    scan.assert_not_called()
+                # installed later in the same process
+                make_executable(tmp.joinpath("python3.9"))
+                os.utime(tmp, ns=(0, tmp.stat().st_mtime_ns + 1_000_000_000))
+                self.assertIn((3, 9), find_pythons())
+
+    def test_find_pythons_disk_cache(self):
+        with temporary_path() as tmp:
+            bin_path = tmp.joinpath("bin")
+            bin_path.mkdir()
+            make_executable(bin_path.joinpath("python3.8"))
+            with mock.patch("xappt.utilities.find_python.user_cache_path", return_value=tmp.joinpath("cache")), \
+                    mock.patch.dict(os.environ, {'PATH': str(bin_path)}):
+                self.assertEqual([(3, 8)], list(find_pythons(disk_cache=True)))
+                self.assertTrue(tmp.joinpath("cache", "xappt", "pythons.json").is_file())
+
+                clear_python_cache()
+                with mock.patch("xappt.utilities.find_python._scan_path_posix") as scan:
+                    self.assertEqual([(3, 8)], list(find_pythons(disk_cache=True)))
+                    scan.assert_not_called()
+
+                # adding an interpreter changes the directory's modification time
+                clear_python_cache()
+                make_executable(bin_path.joinpath("python3.9"))
+                os.utime(bin_path, ns=(0, bin_path.stat().st_mtime_ns + 1_000_000_000))
+                self.assertEqual({(3, 8), (3, 9)}, set(find_pythons(disk_cache=True)))
+
+
+class TestQueryPythonVersions(unittest.TestCase):
+    def test_query_python_versions(self):
+        with temporary_path() as tmp:
+            missing = str(tmp.joinpath("python-missing"))
+            versions = query_python_versions([sys.executable, missing])
+            self.assertEqual(tuple(sys.version_info[:3]), versions[sys.executable])
+            self.assertIsNone(versions[missing])
@@ -25,3 +25,48 @@ class TestHumanize(unittest.TestCase):
             with self.subTest(msg=f"values: {values}"):
                 humanized = humanize.humanize_list(values, conjunction=conjunction, quote=True)
                 self.assertEqual(humanized, result)
+
+    def test_humanize_list_truncated(self):
+        test_cases = (
+            (range(10), 3, "0, 1, 2, and 7 more"),
+            ((str(i) for i in range(5)), 2, "0, 1, and 3 more"),
+            (("a", "b", "c"), 3, "a, b, and c"),
+            (("a", "b", "c"), 5, "a, b, and c"),
+            (("a", "b", "c", "d"), 1, "a and 3 more"),
+        )
+        for values, max_items, result in test_cases:
+            with self.subTest(msg=f"max_items: {max_items}"):
+                self.assertEqual(humanize.humanize_list_truncated(values, max_items), result)
+        self.assertEqual(humanize.humanize_list_truncated(range(4), 1, conjunction="plus", quote=True),
+                         "'0' plus 3 more")
+
+    def test_humanize_bytes(self):
+        test_cases = (
+            (0, True, "0 B"),
+            (1024, True, "1024 B"),
+            (1025, True, "1 KiB"),
+            (1024 ** 3, True, "1024 MiB"),
+            (1024 ** 3 * 5, True, "5 GiB"),
+            (1024 ** 9, True, "1024 YiB"),
+            (1000, False, "1000 B"),
+            (1500, False, "2 kB"),
+        )
+        for value, binary, result in test_cases:
+            with self.subTest(msg=f"value: {value}"):
+                self.assertEqual(humanize.humanize_bytes(value, binary=binary), result)
+                self.assertEqual(humanize.humanize_bytes_many([value], binary=binary), [result])
+
+    def test_humanize_bytes_many(self):
+        values = [0, 1, 1023, 1024, 1025, 1024 ** 2 + 1, 1.5 * 1024 ** 4, 10 ** 30]
+        for binary in (True, False):
+            expected = [humanize.humanize_bytes(v, decimal_places=2, binary=binary) for v in values]
+            self.assertEqual(humanize.humanize_bytes_many(values, decimal_places=2, binary=binary), expected)
+
+    def test_humanize_bytes_many_numpy(self):
+        try:
+            import numpy as np
+        except ImportError:
+            self.skipTest("NumPy is not installed")
+        values = [0, 1, 1023, 1024, 1025, 1024 ** 2 + 1, 1.5 * 1024 ** 4, 2.0 ** 90]
+        expected = humanize.humanize_bytes_many(values, decimal_places=1)
+        self.assertEqual(humanize.humanize_bytes_many(np.array(values), decimal_places=1), expected)
@@ -0,0 +1,82 @@
+import os
+import unittest
+
+from unittest import mock
+
+from xappt.utilities.incremental import IncrementalState
+from xappt.utilities import temporary_path
+
+IDENTITY = {'tool': 'copy', 'collection': 'tool', 'version': ''}
+
+
+class TestIncrementalState(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_context = temporary_path()
+        self.tmp = self.tmp_context.__enter__()
+        self.input_path = str(self.tmp.joinpath("input.txt"))
+        self.output_path = str(self.tmp.joinpath("output.txt"))
+        with open(self.input_path, "w") as fp:
+            fp.write("input")
+        with open(self.output_path, "w") as fp:
+            fp.write("output")
+        os.utime(self.input_path, ns=(1_000_000_000, 1_000_000_000))
+        os.utime(self.output_path, ns=(2_000_000_000, 2_000_000_000))
+        self.state = IncrementalState(self.tmp.joinpath("state"))
+
+    def tearDown(self) -> None:
+        self.tmp_context.__exit__(None, None, None)
+
+    def test_no_record(self):
+        self.assertFalse(self.state.is_up_to_date(IDENTITY, {}, [self.input_path], [self.output_path]))
+
+    def test_no_outputs(self):
+        self.state.record(IDENTITY, {}, [self.input_path], [])
+        self.assertFalse(self.state.is_up_to_date(IDENTITY, {}, [self.input_path], []))
+
+    def test_up_to_date(self):
+        self.state.record(IDENTITY, {'a': 1}, [self.input_path], [self.output_path])
+        self.assertTrue(self.state.is_up_to_date(IDENTITY, {'a': 1}, [self.input_path], [self.output_path]))
+
+    def test_params_changed(self):
+        self.state.record(IDENTITY, {'a': 1}, [self.input_path], [self.output_path])
+        self.assertFalse(self.state.is_up_to_date(IDENTITY, {'a': 2}, [self.input_path], [self.output_path]))
+
+    def test_input_newer(self):
+        self.state.record(IDENTITY, {}, [self.input_path], [self.output_path])
+        os.utime(self.input_path, ns=(3_000_000_000, 3_000_000_000))
+        self.assertFalse(self.state.is_up_to_date(IDENTITY, {}, [self.input_path], [self.output_path]))
+
+    def test_input_replaced_with_older(self):
+        self.state.record(IDENTITY, {}, [self.input_path], [self.output_path])
+        with open(self.input_path, "w") as fp:
+            fp.write("a different input")
+        os.utime(self.input_path, ns=(500_000_000, 500_000_000))
+        self.assertFalse(self.state.is_up_to_date(IDENTITY, {}, [self.input_path], [self.output_path]))
+
+    def test_output_missing(self):
+        self.state.record(IDENTITY, {}, [self.input_path], [self.output_path])
+        os.remove(self.output_path)
+        self.assertFalse(self.state.is_up_to_date(IDENTITY, {}, [self.input_path], [self.output_path]))
+
+    def test_hash_contents(self):
+        state = IncrementalState(self.tmp.joinpath("state"), hash_contents=True)
+        state.record(IDENTITY, {}, [self.input_path], [self.output_path])
+        os.utime(self.input_path, ns=(1_500_000_000, 1_500_000_000))
+        self.assertTrue(state.is_up_to_date(IDENTITY, {}, [self.input_path], [self.output_path]))
+        # newer than the output, but with the same contents
+        os.utime(self.input_path, ns=(3_000_000_000, 3_000_000_000))
+        self.assertTrue(state.is_up_to_date(IDENTITY, {}, [self.input_path], [self.output_path]))
+        with open(self.input_path, "w") as fp:
+            fp.write("a different input")
+        self.assertFalse(state.is_up_to_date(IDENTITY, {}, [self.input_path], [self.output_path]))
+
+    def test_record_write_failed(self):
+        with mock.patch("xappt.utilities.path.atomic.os.fsync", side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                self.state.record(IDENTITY, {}, [self.input_path], [self.output_path])
+        self.assertEqual([], list(self.tmp.joinpath("state").iterdir()))
+
+    def test_forget(self):
+        self.state.record(IDENTITY, {}, [self.input_path], [self.output_path])
+        self.state.forget(IDENTITY, [self.output_path])
+        self.assertFalse(self.state.is_up_to_date(IDENTITY, {}, [self.input_path], [self.output_path]))
@@ -0,0 +1,145 @@
+import socket
+import unittest
+
+from xappt.models.parameter.base import BaseParameterPlugin
+from xappt.models.parameter.errors import ParameterValidationError
+from xappt.models.parameter.model import Parameter
+from xappt.models.parameter.parameters import ParamString
+from xappt.models.parameter.validators import ValidateFileExists, ValidateRange
+from xappt.utilities import metrics
+from xappt.utilities import temporary_path
+
+
+class TestMetrics(unittest.TestCase):
+    def test_null_metrics(self):
+        null_metrics = metrics.Metrics()
+        null_metrics.counter("test")
+        null_metrics.histogram("test", 1.0)
+        with null_metrics.timer("test"):
+            pass
+        null_metrics.flush()
+
+    def test_metrics_from_string(self):
+        self.assertIsInstance(metrics.metrics_from_string(""), metrics.Metrics)
+        self.assertIsInstance(metrics.metrics_from_string("prometheus:/tmp/xappt.prom"), metrics.PrometheusMetrics)
+        statsd = metrics.metrics_from_string("statsd:localhost:9125")
+        self.assertIsInstance(statsd, metrics.StatsdMetrics)
+        self.assertEqual(("localhost", 9125), statsd.address)
+        statsd = metrics.metrics_from_string("statsd:localhost")
+        self.assertEqual(("localhost", 8125), statsd.address)
+
+    def test_set_metrics(self):
+        original = metrics.get_metrics()
+        try:
+            custom = metrics.Metrics()
+            metrics.set_metrics(custom)
+            self.assertIs(custom, metrics.get_metrics())
+        finally:
+            metrics.set_metrics(original)
+
+    def test_validation_failure_counter(self):
+        original = metrics.get_metrics()
+        with temporary_path() as tmp:
+            prometheus = metrics.PrometheusMetrics(tmp.joinpath("xappt.prom"))
+            metrics.set_metrics(prometheus)
+            try:
+                param = Parameter("ranged", data_type=int, default=0, required=False, value=None,
+                                  validators=[(ValidateRange, 0, 10)])
+                with self.assertRaises(ParameterValidationError):
+                    param.validate(20)
+            finally:
+                metrics.set_metrics(original)
+        self.assertIn('xappt_validation_failures_total{parameter="ranged"} 1', prometheus.render())
+
+    def test_validation_failure_ignored_on_init(self):
+        class RequiredParams(BaseParameterPlugin):
+            f = ParamString(validators=[ValidateFileExists])
+
+        original = metrics.get_metrics()
+        prometheus = metrics.PrometheusMetrics(None)
+        metrics.set_metrics(prometheus)
+        try:
+            for _ in range(3):
+                RequiredParams()
+        finally:
+            metrics.set_metrics(original)
+        self.assertNotIn("validation_failures_total", prometheus.render())
+
+
+class TestPrometheusMetrics(unittest.TestCase):
+    def test_render_counter(self):
+        prometheus = metrics.PrometheusMetrics(None)
+        prometheus.counter("tool_runs_total", tool="a", exit_code=0)
+        prometheus.counter("tool_runs_total", tool="a", exit_code=0)
+        prometheus.counter("tool_runs_total", 3, tool="b", exit_code=1)
+        rendered = prometheus.render()
+        self.assertIn("# TYPE xappt_tool_runs_total counter", rendered)
+        self.assertIn('xappt_tool_runs_total{exit_code="0",tool="a"} 2', rendered)
+        self.assertIn('xappt_tool_runs_total{exit_code="1",tool="b"} 3', rendered)
+
+    def test_render_histogram(self):
+        prometheus = metrics.PrometheusMetrics(None, buckets=(1.0, 2.0))
+        prometheus.histogram("duration_seconds", 0.5)
+        prometheus.histogram("duration_seconds", 1.5)
+        prometheus.histogram("duration_seconds", 5.0)
+        lines = prometheus.render().splitlines()
+        self.assertIn('xappt_duration_seconds_bucket{le="1.0"} 1', lines)
+        self.assertIn('xappt_duration_seconds_bucket{le="2.0"} 2', lines)
+        self.assertIn('xappt_duration_seconds_bucket{le="+Inf"} 3', lines)
+        self.assertIn('xappt_duration_seconds_sum 7.0', lines)
+        self.assertIn('xappt_duration_seconds_count 3', lines)
+
+    def test_render_escaped_labels(self):
+        prometheus = metrics.PrometheusMetrics(None)
+        prometheus.counter("test", path='a "quoted" \\ value')
+        self.assertIn(r'xappt_test{path="a \"quoted\" \\ value"} 1', prometheus.render())
+
+    def test_timer(self):
+        prometheus = metrics.PrometheusMetrics(None)
+        with prometheus.timer("block_seconds"):
+            pass
+        self.assertIn("xappt_block_seconds_count 1", prometheus.render())
+
+    def test_flush(self):
+        with temporary_path() as tmp:
+            prom_path = tmp.joinpath("metrics", "xappt.prom")
+            prometheus = metrics.PrometheusMetrics(prom_path)
+            prometheus.counter("test")
+            prometheus.flush()
+            self.assertIn("xappt_test 1", prom_path.read_text())
+
+    def test_flush_merges_processes(self):
+        with temporary_path() as tmp:
+            prom_path = tmp.joinpath("xappt.prom")
+            # one instance per process sharing the same file
+            for exit_code in (0, 0, 1):
+                prometheus = metrics.PrometheusMetrics(prom_path, buckets=(1.0, ))
+                prometheus.counter("tool_runs_total", tool="a", exit_code=exit_code)
+                prometheus.histogram("duration_seconds", 0.5)
+                prometheus.flush()
+            # flushing again only adds what was recorded since the last flush
+            prometheus.counter("tool_runs_total", tool="a", exit_code=1)
+            prometheus.flush()
+            prometheus.flush()
+            lines = prom_path.read_text().splitlines()
+        self.assertIn('xappt_tool_runs_total{exit_code="0",tool="a"} 2.0', lines)
+        self.assertIn('xappt_tool_runs_total{exit_code="1",tool="a"} 2.0', lines)
+        self.assertIn('xappt_duration_seconds_bucket{le="1.0"} 3', lines)
+        self.assertIn('xappt_duration_seconds_count 3', lines)
+
+
+class TestStatsdMetrics(unittest.TestCase):
+    def test_send(self):
+        receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        receiver.settimeout(5.0)
+        try:
+            receiver.bind(("127.0.0.1", 0))
+            statsd = metrics.StatsdMetrics(*receiver.getsockname())
+            statsd.counter("tool_runs_total", tool="a")
+            self.assertEqual(b"xappt.tool_runs_total:1|c|#tool:a", receiver.recv(1024))
+            statsd.histogram("duration_seconds", 0.25)
+            self.assertEqual(b"xappt.duration_ms:250.0|ms", receiver.recv(1024))
+            statsd.histogram("items", 3)
+            self.assertEqual(b"xappt.items:3|h", receiver.recv(1024))
+        finally:
+            receiver.close()
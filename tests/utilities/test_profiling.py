@@ -0,0 +1,29 @@
+import json
+import unittest
+
+from xappt.utilities.profiling import ProfileEvent, TraceRecorder
+from xappt.utilities import temporary_path
+
+
+class TestTraceRecorder(unittest.TestCase):
+    def test_to_trace(self):
+        recorder = TraceRecorder()
+        recorder.record(ProfileEvent("construct", "test", 2.0, 0.25, {'tool': 'example'}))
+        trace = recorder.to_trace()
+        self.assertEqual(1, len(trace['traceEvents']))
+        event = trace['traceEvents'][0]
+        self.assertEqual("construct", event['name'])
+        self.assertEqual("X", event['ph'])
+        self.assertEqual(2_000_000, event['ts'])
+        self.assertEqual(250_000, event['dur'])
+        self.assertDictEqual({'tool': 'example'}, event['args'])
+
+    def test_write(self):
+        recorder = TraceRecorder()
+        recorder.record(ProfileEvent("subprocess", "test", 1.0, 1.0, {'command': ("echo", "test")}))
+        with temporary_path() as tmp:
+            trace_path = tmp.joinpath("trace.json")
+            recorder.write(trace_path)
+            with trace_path.open("r") as fp:
+                trace = json.load(fp)
+        self.assertEqual("subprocess", trace['traceEvents'][0]['name'])
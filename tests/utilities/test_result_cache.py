@@ -0,0 +1,80 @@
+import os
+import time
+import unittest
+
+from xappt.utilities.result_cache import ResultCache, file_digest
+from xappt.utilities import temporary_path
+
+
+class TestResultCache(unittest.TestCase):
+    def test_make_key(self):
+        key_a = ResultCache.make_key({'tool': 'a', 'params': {'x': 1, 'y': 2}})
+        key_b = ResultCache.make_key({'params': {'y': 2, 'x': 1}, 'tool': 'a'})
+        key_c = ResultCache.make_key({'tool': 'a', 'params': {'x': 1, 'y': 3}})
+        self.assertEqual(key_a, key_b)
+        self.assertNotEqual(key_a, key_c)
+
+    def test_get_missing(self):
+        with temporary_path() as tmp:
+            cache = ResultCache(tmp)
+            self.assertIsNone(cache.get("missing"))
+
+    def test_put_get(self):
+        with temporary_path() as tmp:
+            cache = ResultCache(tmp)
+            cache.put("key", 0, [("message", ["hello"], {}), ("write_stdout", ["world"], {})])
+            cached = cache.get("key")
+            self.assertEqual(0, cached.result)
+            self.assertEqual([("message", ["hello"], {}), ("write_stdout", ["world"], {})], cached.outputs)
+
+    def test_put_not_serializable(self):
+        with temporary_path() as tmp:
+            cache = ResultCache(tmp)
+            with self.assertLogs("xappt", level="WARNING"):
+                cache.put("key", 0, [("message", [object()], {})])
+            self.assertIsNone(cache.get("key"))
+            self.assertEqual([], list(tmp.iterdir()))
+
+    def test_get_expired(self):
+        with temporary_path() as tmp:
+            cache = ResultCache(tmp, max_age=60)
+            cache.put("key", 0, [])
+            old_time = time.time() - 120
+            os.utime(tmp.joinpath("key.json"), (old_time, old_time))
+            self.assertIsNone(cache.get("key"))
+            self.assertFalse(tmp.joinpath("key.json").exists())
+
+    def test_get_corrupt(self):
+        with temporary_path() as tmp:
+            cache = ResultCache(tmp)
+            tmp.joinpath("key.json").write_text("{not json")
+            self.assertIsNone(cache.get("key"))
+
+    def test_evict_size(self):
+        with temporary_path() as tmp:
+            cache = ResultCache(tmp, max_size=None)
+            for i in range(5):
+                cache.put(f"key{i}", 0, [("message", ["x" * 100], {})])
+                entry_time = time.time() - 100 + i
+                os.utime(tmp.joinpath(f"key{i}.json"), (entry_time, entry_time))
+            entry_size = tmp.joinpath("key0.json").stat().st_size
+            cache.max_size = entry_size * 2
+            cache.evict()
+            remaining = sorted(item.stem for item in tmp.iterdir())
+            self.assertListEqual(["key3", "key4"], remaining)
+
+    def test_clear(self):
+        with temporary_path() as tmp:
+            cache = ResultCache(tmp)
+            cache.put("key", 0, [])
+            cache.clear()
+            self.assertIsNone(cache.get("key"))
+
+    def test_file_digest(self):
+        with temporary_path() as tmp:
+            file_a = tmp.joinpath("a.txt")
+            file_a.write_text("contents")
+            digest = file_digest(str(file_a))
+            self.assertEqual(digest, file_digest(str(file_a)))
+            file_a.write_text("changed")
+            self.assertNotEqual(digest, file_digest(str(file_a)))
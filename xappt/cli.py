@@ -1,12 +1,14 @@
 #!/usr/bin/env python3
 
 import argparse
+import cProfile
 import os
+import pathlib
 import sys
+import weakref
 
-from collections import defaultdict
 from itertools import chain
-from typing import DefaultDict, List, Type
+from typing import Dict, List, Sequence, Tuple, Type
 
 import colorama
 from colorama import Fore
@@ -14,9 +16,59 @@ from colorama import Fore
 import xappt
 
 from xappt.models.parameter import convert
+from xappt.models.plugins.base import BasePlugin
+from xappt.utilities.profiling import TraceRecorder
+
+PROFILE_FORMATS = ("trace", "cprofile")
+
+# the argparse arguments of each tool class, built once from its parameter descriptors
+_TOOL_ARGS: "weakref.WeakKeyDictionary[type, List[Tuple[List, Dict]]]" = weakref.WeakKeyDictionary()
+
+
+def _names_unknown_plugin(parser: argparse.ArgumentParser, argv: Sequence[str]) -> bool:
+    """ Check whether `argv` names a sub command or interface that isn't
+    registered, which may be provided by a plugin module whose import was
+    deferred. `parser` is the main parser, before sub commands are added. """
+    tools = {plugin_class.name() for _, plugin_class in xappt.plugin_manager.registered_tools()}
+    interfaces = {name for name, _ in xappt.plugin_manager.registered_interfaces()}
+    # options of the main parser that take a value
+    value_options = {option: action for action in parser._actions if action.nargs != 0
+                     for option in action.option_strings}
+    args = iter(argv)
+    for arg in args:
+        if arg.startswith("--") and "=" in arg:
+            option, value = arg.split("=", 1)
+            action = value_options.get(option)
+        elif arg in value_options:
+            action = value_options[arg]
+            value = next(args, None)
+        elif not arg.startswith("-"):
+            return arg not in tools
+        else:
+            continue
+        if action is not None and action.dest == 'interface' and value is not None and value not in interfaces:
+            return True
+    return False
+
+
+def build_parser(argv: Sequence[str] = ()) -> argparse.ArgumentParser:
+    """ Build the parser for the main command and every tool. Plugin modules
+    that discovery deferred are imported first if `argv` needs them. """
+    parser = _build_main_parser()
+    if len(xappt.plugin_manager.DEFERRED_MODULES) and _names_unknown_plugin(parser, argv):
+        xappt.plugin_manager.load_deferred_plugins()
+        parser = _build_main_parser()
+
+    subparsers = parser.add_subparsers(help="Sub command help", dest='command')
+
+    for plugin_name, plugin_class in xappt.plugin_manager.registered_tools():
+        plugin_parser = subparsers.add_parser(plugin_class.name(), help=plugin_class.help())
+        add_tool_args(parser=plugin_parser, plugin_class=plugin_class)
+
+    return parser
 
 
-def build_parser() -> argparse.ArgumentParser:
+def _build_main_parser() -> argparse.ArgumentParser:
     interface_list = [i[0] for i in xappt.plugin_manager.registered_interfaces()]
     default_interface_name = os.environ.get(xappt.INTERFACE_ENV, xappt.INTERFACE_DEFAULT)
 
@@ -26,44 +78,98 @@ def build_parser() -> argparse.ArgumentParser:
                         help='Display the version number and build')
     parser.add_argument('-l', '--list', action='store_true',
                         help='List all of the discovered plugins')
+    parser.add_argument('--discovery-report', action='store_true',
+                        help='Show how long each plugin path took to scan and import')
     parser.add_argument('-i', '--interface', choices=interface_list, default=default_interface_name,
                         help='Specify the name of the default user interface. '
                              f'This can also be done by setting the environment variable {xappt.INTERFACE_ENV}')
-
-    subparsers = parser.add_subparsers(help="Sub command help", dest='command')
-
-    for plugin_name, plugin_class in xappt.plugin_manager.registered_tools():
-        plugin_parser = subparsers.add_parser(plugin_class.name(), help=plugin_class.help())
-        add_tool_args(parser=plugin_parser, plugin_class=plugin_class)
+    parser.add_argument('--profile', metavar='PATH',
+                        help='Profile the tool run and write the results to PATH')
+    parser.add_argument('--profile-format', choices=PROFILE_FORMATS, default=PROFILE_FORMATS[0],
+                        help='Write a Chrome trace event JSON file (trace), or a cProfile dump (cprofile)')
+    parser.add_argument('--serve', action='store_true',
+                        help='Keep plugins loaded and run tools requested by the xapptc client')
+    parser.add_argument('--socket', metavar='PATH',
+                        help='The Unix socket used by --serve. '
+                             f'This can also be set with the environment variable {xappt.SERVER_SOCKET_ENV}')
+    parser.add_argument('--fork', action='store_true',
+                        help='With --serve, run each request in its own forked process')
 
     return parser
 
 
 def add_tool_args(parser: argparse.ArgumentParser, plugin_class: Type[xappt.BaseTool]):
-    for parameter in plugin_class.class_parameters():
-        setup_args = parameter.param_setup_args
-        args, kwargs = convert.to_argument_dict(setup_args)
+    tool_args = _TOOL_ARGS.get(plugin_class)
+    if tool_args is None:
+        tool_args = [convert.to_argument_dict(descriptor.param_setup_args)
+                     for descriptor in plugin_class.class_parameters()]
+        _TOOL_ARGS[plugin_class] = tool_args
+    for args, kwargs in tool_args:
         parser.add_argument(*args, **kwargs)
 
 
 def list_all_plugins():
     colorama.init(autoreset=True)
 
-    plugin_list: DefaultDict[str, List[str]] = defaultdict(list)
+    tables = [xappt.plugin_manager.PLUGIN_REGISTRY[plugin_type]
+              for plugin_type in (xappt.PLUGIN_TYPE_INTERFACE, xappt.PLUGIN_TYPE_TOOL)]
+    collections = sorted(set(chain.from_iterable(table.collections() for table in tables)))
+
+    for collection in collections:
+        plugin_list: List[Tuple[str, Type[BasePlugin]]] = []
+        for table in tables:
+            plugins = table.in_collection(collection)
+            plugin_list.extend((name, plugins[name]) for name in table.sorted_names(collection))
+        if not len(plugin_list):
+            continue
+        print(f"{Fore.GREEN}{collection}")
+        for name, plugin_class in sorted(plugin_list, key=lambda item: item[0]):
+            print(f"    {Fore.LIGHTBLUE_EX}{name} {Fore.WHITE}({plugin_class.help() or 'No help text'})")
 
-    for _, plugin_class in chain(xappt.plugin_manager.registered_interfaces(), xappt.plugin_manager.registered_tools()):
-        collection = plugin_class.collection()
-        plugin_list[collection].append(f"{Fore.LIGHTBLUE_EX}{plugin_class.name()} "
-                                       f"{Fore.WHITE}({plugin_class.help() or 'No help text'})")
+    deferred_modules = [module_name for module_name, _ in xappt.plugin_manager.DEFERRED_MODULES]
+    if len(deferred_modules):
+        # their plugins aren't known until they're imported
+        print(f"{Fore.YELLOW}deferred modules, imported when one of their plugins is needed")
+        for module_name in sorted(deferred_modules):
+            print(f"    {Fore.LIGHTBLUE_EX}{module_name}")
 
-    for collection in sorted(plugin_list.keys()):
-        print(f"{Fore.GREEN}{collection}")
-        for plugin in sorted(plugin_list[collection]):
-            print(f"    {plugin}")
+
+def print_discovery_report():
+    colorama.init(autoreset=True)
+
+    for path_report in xappt.plugin_manager.discovery_report():
+        print(f"{Fore.GREEN}{path_report.path} "
+              f"{Fore.WHITE}(scan {path_report.scan_time:.3f}s, import {path_report.import_time:.3f}s, "
+              f"{path_report.plugins} plugins)")
+        for module in path_report.modules:
+            if module.deferred:
+                status = f"{Fore.YELLOW}deferred"
+            elif module.error is not None:
+                status = f"{Fore.RED}failed: {module.error}"
+            else:
+                status = f"{Fore.WHITE}{module.import_time:.3f}s, {module.plugins} plugins"
+            print(f"    {Fore.LIGHTBLUE_EX}{module.name} {status}")
+
+
+def run_profiled(interface: xappt.BaseInterface, path: pathlib.Path, profile_format: str) -> int:
+    if profile_format == "cprofile":
+        profiler = cProfile.Profile()
+        try:
+            result = profiler.runcall(interface.run)
+        finally:
+            profiler.dump_stats(str(path))
+    else:
+        recorder = TraceRecorder()
+        interface.on_profile_event.add(recorder.record)
+        try:
+            result = interface.run()
+        finally:
+            recorder.write(path)
+    return result
 
 
 def cli_main(*argv) -> int:
-    parser = build_parser()
+    parser = build_parser(argv)
     options = parser.parse_args(args=argv)
 
     if options.version:
@@ -74,6 +180,14 @@ def cli_main(*argv) -> int:
         list_all_plugins()
         return 0
 
+    if options.discovery_report:
+        print_discovery_report()
+        return 0
+
+    if options.serve:
+        from xappt.server import serve
+        return serve(options.socket, fork=options.fork)
+
     os.environ[xappt.INTERFACE_ENV] = options.interface
 
     if options.command is not None:
@@ -82,10 +196,18 @@ def cli_main(*argv) -> int:
         tool_class = xappt.plugin_manager.get_tool_plugin(options.command)
         tool_init_kwargs = options.__dict__.copy()
         tool_init_kwargs.pop('interface')
+        tool_init_kwargs.pop('discovery_report')
+        tool_init_kwargs.pop('profile')
+        tool_init_kwargs.pop('profile_format')
+        tool_init_kwargs.pop('serve')
+        tool_init_kwargs.pop('socket')
+        tool_init_kwargs.pop('fork')
 
         interface.tool_data.update(tool_init_kwargs)
         interface.add_tool(tool_class)
 
+        if options.profile is not None:
+            return run_profiled(interface, pathlib.Path(options.profile), options.profile_format)
         return interface.run()
     else:
         parser.print_help()
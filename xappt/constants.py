@@ -9,6 +9,16 @@ PLUGIN_PATH_ENV = "XAPPT_PLUGIN_PATH"
 DEBUG_FLAG_ENV = "XAPPT_DEBUG"
 INTERFACE_ENV = "XAPPT_INTERFACE"
 LOAD_EXAMPLES_ENV = "XAPPT_LOAD_EXAMPLE_TOOLS"
+RESULT_CACHE_ENV = "XAPPT_RESULT_CACHE"
+INCREMENTAL_ENV = "XAPPT_INCREMENTAL"
+METRICS_ENV = "XAPPT_METRICS"
+PARALLEL_DISCOVERY_ENV = "XAPPT_PARALLEL_DISCOVERY"
+DISCOVERY_BUDGET_ENV = "XAPPT_DISCOVERY_BUDGET"
+DISCOVERY_DEFER_ENV = "XAPPT_DISCOVERY_DEFER"
+SERVER_SOCKET_ENV = "XAPPT_SOCKET"
+SERVER_ENV_ENV = "XAPPT_SERVER_ENV"
+CONFIG_STORE_ENV = "XAPPT_CONFIG_STORE"
+SCRATCH_PATH_ENV = "XAPPT_SCRATCH_PATH"
 
 INTERFACE_DEFAULT = "stdio"
 
@@ -1,17 +1,26 @@
+import compileall
 import importlib
+import importlib.machinery
+import importlib.util
 import inspect
 import os
 import pathlib
 import sys
+import time
 
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait
 from functools import partial
 from itertools import chain
-from typing import Generator, Optional, Tuple, Type
+from typing import Dict, Generator, List, Optional, Sequence, Tuple, Type
 
 from xappt.constants import *
 from xappt.config import log as logger
 from xappt.models import BaseTool, BaseInterface
+from xappt.managers.plugin_registry import PluginRegistry
+from xappt.models.callback import Callback
 from xappt.models.plugins.base import BasePlugin
+from xappt.utilities.metrics import get_metrics
 
 __all__ = [
     'get_tool_plugin',
@@ -19,21 +28,80 @@ __all__ = [
     'get_interface',
     'register_plugin',
     'discover_plugins',
+    'discovery_report',
+    'load_deferred_plugins',
+    'rediscover_plugins',
+    'unload_module',
+    'unregister_plugin',
+    'on_registry_changed',
     'registered_tools',
-    'registered_interfaces'
+    'registered_interfaces',
+    'tools_in_collection',
+    'tool_collections',
+    'search_tools',
 ]
 
 
-PLUGIN_REGISTRY = {
-    PLUGIN_TYPE_TOOL: {},
-    PLUGIN_TYPE_INTERFACE: {},
-}
+PLUGIN_REGISTRY = PluginRegistry()
 
 PLUGINS_DISCOVERED = False
 
+# the time, in seconds, that it took to import each plugin module
+IMPORT_TIMES: Dict[str, float] = {}
+# the error message for each plugin module that raised an ImportError
+IMPORT_ERRORS: Dict[str, str] = {}
+
+
+class ModuleReport:
+    def __init__(self, name: str, path: pathlib.Path):
+        self.name: str = name
+        self.path: pathlib.Path = path
+        self.imported: bool = False
+        self.deferred: bool = False
+        self.import_time: float = 0.0
+        self.plugins: int = 0  # the number of plugins that were registered by this module
+        self.error: Optional[str] = None
+
+
+class PathReport:
+    def __init__(self, path: pathlib.Path):
+        self.path: pathlib.Path = path
+        self.scan_time: float = 0.0
+        self.modules: List[ModuleReport] = []
+
+    @property
+    def import_time(self) -> float:
+        return sum(module.import_time for module in self.modules)
+
+    @property
+    def plugins(self) -> int:
+        return sum(module.plugins for module in self.modules)
+
+    @property
+    def failed_modules(self) -> List[ModuleReport]:
+        return [module for module in self.modules if module.error is not None]
+
+
+DISCOVERY_REPORT: List[PathReport] = []
+DEFERRED_MODULES: List[Tuple[str, pathlib.Path]] = []
+
+PRELOAD_TIMEOUT_DEFAULT = 10.0
+
+# the plugin modules that have been imported, so that `rediscover_plugins` can
+# tell which of them have changed or been removed since
+DiscoveredModule = namedtuple("DiscoveredModule", ("path", "plugin_path", "signature"))
+DISCOVERED_MODULES: Dict[str, DiscoveredModule] = {}
+
+# invoked with `added`, `removed` and `reloaded` lists of plugin names whenever
+# `rediscover_plugins` or `unload_module` modifies the registry
+on_registry_changed = Callback()
+
 
 def get_tool_plugin(plugin_name: str) -> Type[BaseTool]:
     plugin = PLUGIN_REGISTRY[PLUGIN_TYPE_TOOL].get(plugin_name)
+    if plugin is None and len(DEFERRED_MODULES):
+        load_deferred_plugins()
+        plugin = PLUGIN_REGISTRY[PLUGIN_TYPE_TOOL].get(plugin_name)
     if plugin is None:
         raise ValueError(f"Tool Plugin '{plugin_name}' not found")
     return plugin['class']
@@ -41,6 +109,9 @@ def get_tool_plugin(plugin_name: str) -> Type[BaseTool]:
 
 def get_interface_plugin(plugin_name: str) -> Type[BaseInterface]:
     plugin = PLUGIN_REGISTRY[PLUGIN_TYPE_INTERFACE].get(plugin_name)
+    if plugin is None and len(DEFERRED_MODULES):
+        load_deferred_plugins()
+        plugin = PLUGIN_REGISTRY[PLUGIN_TYPE_INTERFACE].get(plugin_name)
     if plugin is None:
         raise ValueError(f"Interface Plugin '{plugin_name}' not found")
     return plugin['class']
@@ -93,58 +164,336 @@ def find_plugin_modules(path: pathlib.Path) -> Generator[pathlib.Path, None, Non
         yield item
 
 
+def _import_from_path(module_name: str, path_str: str):
+    """ Import `module_name` from the directory `path_str` without adding
+    that directory to `sys.path`. Only the top level package is located
+    through `path_str`, any submodules are found through its `__path__`. """
+    top_level_name = module_name.partition(".")[0]
+    if top_level_name not in sys.modules:
+        spec = importlib.machinery.PathFinder.find_spec(top_level_name, [path_str])
+        if spec is None or spec.loader is None:
+            raise ModuleNotFoundError(f"No module named '{top_level_name}'", name=top_level_name)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[top_level_name] = module
+        try:
+            spec.loader.exec_module(module)
+        except BaseException:
+            sys.modules.pop(top_level_name, None)
+            raise
+    importlib.import_module(module_name)
+
+
 def import_module(module_name: str, path: pathlib.Path) -> bool:
-    path_str = str(path)
-    old_sys_path = sys.path.copy()
-    if path_str not in sys.path:
-        sys.path.append(path_str)
+    import_start = time.perf_counter()
     try:
-        importlib.import_module(module_name)
-    except ImportError:
-        logger.debug(f"could not import '{module_name}'")
-        sys.path = old_sys_path  # restore sys.path
+        _import_from_path(module_name, str(path))
+    except ImportError as e:
+        logger.debug(f"could not import '{module_name}': {e}")
+        IMPORT_ERRORS[module_name] = str(e)
     else:
-        logger.debug(f"imported module '{module_name}'")
+        import_time = time.perf_counter() - import_start
+        IMPORT_TIMES[module_name] = import_time
+        logger.debug(f"imported module '{module_name}' in {import_time:.3f}s")
         return True
     return False
 
 
-def discover_plugins(force: bool = False):
-    global PLUGINS_DISCOVERED
-    if PLUGINS_DISCOVERED and not force:
-        logger.warning("Plugin discovery can only run once per session")
+def _warm_module(module_path: pathlib.Path):
+    if module_path.is_dir():
+        compileall.compile_dir(str(module_path), quiet=2)
+    elif module_path.suffix.lower() == ".py":
+        compileall.compile_file(str(module_path), quiet=2)
+
+
+def preload_modules(module_paths: Sequence[pathlib.Path], *, timeout: Optional[float] = PRELOAD_TIMEOUT_DEFAULT,
+                    max_workers: Optional[int] = None):
+    """ Prepare plugin modules for import by compiling their bytecode in a
+    thread pool, and by populating the import system's path finder cache for
+    the directories that contain them. Executing the modules still happens
+    sequentially in `discover_plugins`, since registering plugins is not
+    thread safe, but a cold import no longer has to compile each module first.
+    Waiting is bounded by `timeout` seconds, after which any modules that
+    haven't been compiled yet are simply compiled during their import.
+    """
+    if not len(module_paths):
         return
-    PLUGINS_DISCOVERED = True
+    preload_start = time.perf_counter()
+    for parent in {str(module_path.parent) for module_path in module_paths}:
+        # looking up any name caches the path's finder and its directory listing
+        importlib.machinery.PathFinder.find_spec("__xappt_warm__", [parent])
+
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="xappt-preload")
+    futures = [executor.submit(_warm_module, module_path) for module_path in module_paths]
+    _, not_done = wait(futures, timeout=timeout)
+    for future in not_done:
+        future.cancel()
+    executor.shutdown(wait=False)
+    if len(not_done):
+        logger.debug(f"plugin preloading timed out with {len(not_done)} modules remaining")
+    logger.debug(f"preloaded {len(module_paths) - len(not_done)} modules in "
+                 f"{time.perf_counter() - preload_start:.3f}s")
+
+
+def _env_float(key: str) -> Optional[float]:
+    value = os.environ.get(key, "")
+    if not len(value):
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        logger.warning(f"Invalid value for {key}: '{value}'")
+        return None
+
+
+def _registry_size() -> int:
+    return sum(len(plugins) for plugins in PLUGIN_REGISTRY.values())
 
-    logger.debug("discovering plugins")
-    imported_modules = set()
 
+def _module_signature(module_path: pathlib.Path) -> Tuple[int, int]:
+    """ A cheap value that changes when a plugin module is edited: the
+    modification time and size of a single file module, or the newest
+    modification time and the number of source files in a package. """
+    try:
+        if not module_path.is_dir():
+            module_stat = module_path.stat()
+            return module_stat.st_mtime_ns, module_stat.st_size
+        newest, count = 0, 0
+        for root, dirs, files in os.walk(module_path):
+            dirs[:] = [d for d in dirs if d != "__pycache__"]
+            for file_name in files:
+                if file_name.endswith(".py"):
+                    newest = max(newest, os.stat(os.path.join(root, file_name)).st_mtime_ns)
+                    count += 1
+        return newest, count
+    except OSError:
+        return 0, 0
+
+
+def _import_plugin_module(module_report: ModuleReport, plugin_path: pathlib.Path):
+    module_name = module_report.name
+    logger.debug(f"attempting import of module '{module_name}'")
+    # the signature is taken before importing so that edits made during the import are picked up later
+    signature = _module_signature(module_report.path)
+    plugin_count = _registry_size()
+    import_start = time.perf_counter()
+    module_report.imported = import_module(module_name, plugin_path) or \
+        import_module(f"{module_name}.plugins", plugin_path)
+    module_report.import_time = time.perf_counter() - import_start
+    module_report.plugins = _registry_size() - plugin_count
+    if module_report.imported:
+        DISCOVERED_MODULES[module_name] = DiscoveredModule(module_report.path, plugin_path, signature)
+    else:
+        module_report.error = IMPORT_ERRORS.get(module_name)
+
+
+def _scan_plugin_paths() -> List[PathReport]:
     env_paths = [path for path in os.environ.get(PLUGIN_PATH_ENV, "").split(os.pathsep) if len(path)]
     if len(env_paths):
         logger.debug(f"{PLUGIN_PATH_ENV}: {os.pathsep.join(env_paths)}")
 
-    import copy
-    sys_paths = copy.deepcopy(sys.path)
-    checked_paths = []
-    for p in chain(env_paths, sys_paths):
-        if len(p) == 0 or not os.path.isdir(p):
+    path_reports = []
+    checked_paths = set()
+    for p in chain(env_paths, list(sys.path)):
+        if len(p) == 0:
             continue
         p = os.path.normpath(p)
         if p in checked_paths:
             logger.debug(f"path has already been scanned: '{p}'")
             continue
-        checked_paths.append(p)
+        checked_paths.add(p)
+        if not os.path.isdir(p):
+            continue
         logger.debug(f"scanning path for plugins at {p}")
-        plugin_path = pathlib.Path(p)
-        for module_path in find_plugin_modules(plugin_path):
-            module_name = module_path.stem
+        path_report = PathReport(pathlib.Path(p))
+        scan_start = time.perf_counter()
+        for module_path in find_plugin_modules(path_report.path):
+            path_report.modules.append(ModuleReport(module_path.stem, module_path))
+        path_report.scan_time = time.perf_counter() - scan_start
+        path_reports.append(path_report)
+
+    return path_reports
+
+
+def discover_plugins(force: bool = False, *, preload: Optional[bool] = None, budget: Optional[float] = None,
+                     defer: Optional[bool] = None):
+    """ Scan `XAPPT_PLUGIN_PATH` and `sys.path` for plugin modules and import
+    them. When `preload` is True (or `XAPPT_PARALLEL_DISCOVERY` is set to "1")
+    the candidate modules are prepared concurrently before being imported.
+
+    `budget` (or `XAPPT_DISCOVERY_BUDGET`) is the number of seconds that
+    importing plugin modules is allowed to take. Modules that use up the whole
+    budget by themselves are reported with a warning. Once the budget has been
+    spent the remaining modules are deferred until a plugin lookup fails if
+    `defer` (or `XAPPT_DISCOVERY_DEFER`) is set, otherwise a warning is logged.
+
+    The timings and results are available from `discovery_report`.
+    """
+    global PLUGINS_DISCOVERED
+    if PLUGINS_DISCOVERED and not force:
+        logger.warning("Plugin discovery can only run once per session")
+        return
+    PLUGINS_DISCOVERED = True
+
+    if preload is None:
+        preload = os.environ.get(PARALLEL_DISCOVERY_ENV, "0") != "0"
+    if budget is None:
+        budget = _env_float(DISCOVERY_BUDGET_ENV)
+    if defer is None:
+        defer = os.environ.get(DISCOVERY_DEFER_ENV, "0") != "0"
+
+    logger.debug("discovering plugins")
+    discovery_start = time.perf_counter()
+    imported_modules = set()
+    DISCOVERY_REPORT.clear()
+    DEFERRED_MODULES.clear()
+
+    DISCOVERY_REPORT.extend(_scan_plugin_paths())
+
+    if preload:
+        preload_modules([module.path for path_report in DISCOVERY_REPORT for module in path_report.modules])
+
+    import_time_total = 0.0
+    budget_spent = False
+    for path_report in DISCOVERY_REPORT:
+        for module_report in path_report.modules:
+            module_name = module_report.name
             if module_name in imported_modules:
-                logger.warning(f"conflicting module name '{module_name}' at {module_path}")
+                logger.warning(f"conflicting module name '{module_name}' at {module_report.path}")
+                module_report.error = "conflicting module name"
+                continue
+            if budget_spent and defer:
+                logger.debug(f"deferring import of module '{module_name}'")
+                module_report.deferred = True
+                DEFERRED_MODULES.append((module_name, path_report.path))
+                imported_modules.add(module_name)
                 continue
-            logger.debug(f"attempting import of module '{module_name}'")
-            if import_module(module_name, plugin_path) or import_module(f"{module_name}.plugins", plugin_path):
+            _import_plugin_module(module_report, path_report.path)
+            if module_report.imported:
                 imported_modules.add(module_name)
 
+            import_time_total += module_report.import_time
+            if budget is None or budget_spent:
+                continue
+            if module_report.import_time > budget:
+                logger.warning(f"importing plugin module '{module_name}' took {module_report.import_time:.3f}s, "
+                               f"exceeding the startup budget of {budget}s")
+            if import_time_total > budget:
+                budget_spent = True
+                if not defer:
+                    logger.warning(f"plugin discovery exceeded the startup budget of {budget}s")
+
+    metrics = get_metrics()
+    metrics.histogram("discovery_duration_seconds", time.perf_counter() - discovery_start)
+    metrics.counter("plugin_modules_imported_total", len(imported_modules) - len(DEFERRED_MODULES))
+
+
+def load_deferred_plugins():
+    """ Import any plugin modules that `discover_plugins` deferred because the
+    startup budget was exceeded. """
+    while len(DEFERRED_MODULES):
+        module_name, plugin_path = DEFERRED_MODULES.pop(0)
+        for path_report in DISCOVERY_REPORT:
+            for module_report in path_report.modules:
+                if module_report.deferred and module_report.name == module_name:
+                    module_report.deferred = False
+                    _import_plugin_module(module_report, plugin_path)
+
+
+def discovery_report() -> List[PathReport]:
+    """ Return the per path timings and results of the last plugin discovery. """
+    return list(DISCOVERY_REPORT)
+
+
+def _registered_names() -> set:
+    return {name for table in PLUGIN_REGISTRY.values() for name in table}
+
+
+def unregister_plugin(plugin) -> bool:
+    """ Remove a plugin from the registry. `plugin` is either a plugin class
+    or the name of a registered plugin. """
+    for table in PLUGIN_REGISTRY.values():
+        for name, entry in table.items():
+            if entry['class'] is plugin or name == plugin:
+                logger.debug(f"unregistered plugin '{name}'")
+                del table[name]
+                return True
+    return False
+
+
+def _unload_module(module_name: str) -> List[str]:
+    removed = []
+    prefix = f"{module_name}."
+    for table in PLUGIN_REGISTRY.values():
+        for name, entry in list(table.items()):
+            plugin_module = entry['class'].__module__
+            if plugin_module == module_name or plugin_module.startswith(prefix):
+                logger.debug(f"unregistered plugin '{name}'")
+                del table[name]
+                removed.append(name)
+    for name in [name for name in sys.modules if name == module_name or name.startswith(prefix)]:
+        del sys.modules[name]
+    DISCOVERED_MODULES.pop(module_name, None)
+    return removed
+
+
+def unload_module(module_name: str) -> List[str]:
+    """ Unregister every plugin that was defined by the plugin module
+    `module_name` (or one of its submodules), and remove the module from
+    `sys.modules`. Returns the names of the plugins that were removed. """
+    removed = _unload_module(module_name)
+    importlib.invalidate_caches()
+    if len(removed):
+        on_registry_changed.invoke(added=[], removed=sorted(removed), reloaded=[])
+    return removed
+
+
+def rediscover_plugins() -> Dict[str, List[str]]:
+    """ Scan the plugin paths again and bring the registry up to date without
+    restarting the process. Modules that have been removed are unloaded,
+    modules whose files have changed since they were imported are reloaded,
+    and new modules are imported. Modules that haven't changed are left alone.
+
+    Returns the `added`, `removed` and `reloaded` plugin names, which are also
+    passed to `on_registry_changed` when anything has changed.
+    """
+    if not PLUGINS_DISCOVERED:
+        discover_plugins()
+
+    names_before = _registered_names()
+    path_reports = _scan_plugin_paths()
+
+    candidates: Dict[str, Tuple[ModuleReport, pathlib.Path]] = {}
+    for path_report in path_reports:
+        for module_report in path_report.modules:
+            candidates.setdefault(module_report.name, (module_report, path_report.path))
+    deferred = {module_name for module_name, _ in DEFERRED_MODULES}
+
+    unloaded = set()
+    for module_name, discovered in list(DISCOVERED_MODULES.items()):
+        candidate = candidates.get(module_name)
+        if candidate is None or candidate[0].path != discovered.path:
+            logger.debug(f"plugin module '{module_name}' has been removed")
+            _unload_module(module_name)
+        elif _module_signature(discovered.path) != discovered.signature:
+            logger.debug(f"plugin module '{module_name}' has changed")
+            unloaded.update(_unload_module(module_name))
+    importlib.invalidate_caches()
+
+    for module_name, (module_report, plugin_path) in candidates.items():
+        if module_name in DISCOVERED_MODULES or module_name in deferred:
+            continue
+        _import_plugin_module(module_report, plugin_path)
+
+    names_after = _registered_names()
+    changes = {
+        'added': sorted(names_after - names_before),
+        'removed': sorted(names_before - names_after),
+        'reloaded': sorted(unloaded & names_after),
+    }
+    if any(len(names) for names in changes.values()):
+        on_registry_changed.invoke(**changes)
+    return changes
+
 
 def register_plugin(cls=None, *, active=True, visible=True):
     if cls is None:
@@ -158,14 +507,37 @@ def register_plugin(cls=None, *, active=True, visible=True):
 
 
 def registered_tools(*, include_hidden=False) -> Generator[Tuple[str, Type[BaseTool]], None, None]:
-    for tool_name, tool_dict in PLUGIN_REGISTRY[PLUGIN_TYPE_TOOL].items():
-        if not tool_dict['visible'] and not include_hidden:
-            continue
-        yield tool_name, tool_dict['class']
+    table = PLUGIN_REGISTRY[PLUGIN_TYPE_TOOL]
+    if include_hidden:
+        for tool_name, tool_dict in table.items():
+            yield tool_name, tool_dict['class']
+    else:
+        yield from table.visible().items()
 
 
 def registered_interfaces(*, include_hidden=False) -> Generator[Tuple[str, Type[BaseInterface]], None, None]:
-    for iface_name, iface_dict in PLUGIN_REGISTRY[PLUGIN_TYPE_INTERFACE].items():
-        if not iface_dict['visible'] and not include_hidden:
-            continue
-        yield iface_name, iface_dict['class']
+    table = PLUGIN_REGISTRY[PLUGIN_TYPE_INTERFACE]
+    if include_hidden:
+        for iface_name, iface_dict in table.items():
+            yield iface_name, iface_dict['class']
+    else:
+        yield from table.visible().items()
+
+
+def tool_collections() -> List[str]:
+    return PLUGIN_REGISTRY[PLUGIN_TYPE_TOOL].collections()
+
+
+def tools_in_collection(collection: str, *, include_hidden=False) -> List[Tuple[str, Type[BaseTool]]]:
+    table = PLUGIN_REGISTRY[PLUGIN_TYPE_TOOL]
+    tools = table.in_collection(collection, include_hidden=include_hidden)
+    return [(name, tools[name]) for name in table.sorted_names(collection, include_hidden=include_hidden)]
+
+
+def search_tools(query: str, *, fuzzy=False, include_hidden=False,
+                 limit: Optional[int] = None) -> List[Tuple[str, Type[BaseTool]]]:
+    """ Find tools whose name starts with `query`, or with `fuzzy`, the tools
+    whose names are the closest matches to `query`. """
+    table = PLUGIN_REGISTRY[PLUGIN_TYPE_TOOL]
+    names = table.search(query, fuzzy=fuzzy, include_hidden=include_hidden, limit=limit)
+    return [(name, table[name]['class']) for name in names]
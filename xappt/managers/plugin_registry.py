@@ -0,0 +1,131 @@
+import bisect
+import difflib
+
+from typing import Dict, List, Optional, Tuple, Type
+
+from xappt.constants import PLUGIN_TYPE_TOOL, PLUGIN_TYPE_INTERFACE
+from xappt.models.plugins.base import BasePlugin
+
+
+class PluginTable(dict):
+    """ A mapping of plugin names to registry entries (`{'class': ..., 'visible': ...}`)
+    for a single plugin type. Secondary indexes by collection and visibility
+    are kept up to date as entries are added or removed, so that listing and
+    searching a large plugin catalog doesn't have to scan every entry.
+    """
+    def __init__(self):
+        super().__init__()
+        self._collections: Dict[str, Dict[str, Type[BasePlugin]]] = {}
+        self._collection_names: Dict[str, str] = {}
+        self._visible: Dict[str, Type[BasePlugin]] = {}
+        self._sorted_cache: Dict[Tuple[Optional[str], bool], List[str]] = {}
+
+    def _index(self, name: str, entry: dict):
+        plugin_class = entry['class']
+        collection = plugin_class.collection()
+        self._collections.setdefault(collection, {})[name] = plugin_class
+        self._collection_names[name] = collection
+        if entry['visible']:
+            self._visible[name] = plugin_class
+        self._sorted_cache.clear()
+
+    def _unindex(self, name: str):
+        collection = self._collection_names.pop(name)
+        collection_index = self._collections.get(collection, {})
+        collection_index.pop(name, None)
+        if not len(collection_index):
+            self._collections.pop(collection, None)
+        self._visible.pop(name, None)
+        self._sorted_cache.clear()
+
+    def __setitem__(self, name: str, entry: dict):
+        if name in self:
+            self._unindex(name)
+        super().__setitem__(name, entry)
+        self._index(name, entry)
+
+    def __delitem__(self, name: str):
+        super().__delitem__(name)
+        self._unindex(name)
+
+    def pop(self, name: str, *default):
+        if name not in self:
+            if len(default):
+                return default[0]
+            raise KeyError(name)
+        entry = self[name]
+        del self[name]
+        return entry
+
+    def popitem(self) -> Tuple[str, dict]:
+        name, entry = super().popitem()
+        self._unindex(name)
+        return name, entry
+
+    def setdefault(self, name: str, default: Optional[dict] = None):
+        if name not in self:
+            self[name] = default
+        return self[name]
+
+    def update(self, *args, **kwargs):
+        for name, entry in dict(*args, **kwargs).items():
+            self[name] = entry
+
+    def clear(self):
+        super().clear()
+        self._collections.clear()
+        self._collection_names.clear()
+        self._visible.clear()
+        self._sorted_cache.clear()
+
+    def visible(self) -> Dict[str, Type[BasePlugin]]:
+        return self._visible
+
+    def collections(self) -> List[str]:
+        return sorted(self._collections.keys())
+
+    def in_collection(self, collection: str, *, include_hidden: bool = False) -> Dict[str, Type[BasePlugin]]:
+        plugins = self._collections.get(collection, {})
+        if include_hidden:
+            return dict(plugins)
+        return {name: cls for name, cls in plugins.items() if name in self._visible}
+
+    def sorted_names(self, collection: Optional[str] = None, *, include_hidden: bool = False) -> List[str]:
+        """ Plugin names in alphabetical order, optionally limited to a single
+        collection. The result is cached until the table is modified. """
+        cache_key = (collection, include_hidden)
+        names = self._sorted_cache.get(cache_key)
+        if names is None:
+            if collection is not None:
+                names = sorted(self.in_collection(collection, include_hidden=include_hidden))
+            elif include_hidden:
+                names = sorted(self.keys())
+            else:
+                names = sorted(self._visible.keys())
+            self._sorted_cache[cache_key] = names
+        return names
+
+    def search(self, query: str, *, fuzzy: bool = False, include_hidden: bool = False,
+               limit: Optional[int] = None) -> List[str]:
+        """ Return plugin names that start with `query`. With `fuzzy` the
+        closest matches are returned instead, best match first. """
+        names = self.sorted_names(include_hidden=include_hidden)
+        if fuzzy:
+            return difflib.get_close_matches(query, names, n=limit or 10, cutoff=0.5)
+        matches = []
+        for i in range(bisect.bisect_left(names, query), len(names)):
+            name = names[i]
+            if not name.startswith(query):
+                break
+            matches.append(name)
+            if limit is not None and len(matches) >= limit:
+                break
+        return matches
+
+
+class PluginRegistry(dict):
+    """ The plugin registry, with one `PluginTable` for each plugin type. """
+    def __init__(self):
+        super().__init__()
+        self[PLUGIN_TYPE_TOOL] = PluginTable()
+        self[PLUGIN_TYPE_INTERFACE] = PluginTable()
@@ -1,17 +1,26 @@
+import atexit
 import pathlib
 import json
 
 from collections import namedtuple
-from typing import Any, Callable, List, Optional
+from typing import Any, Callable, Dict, List, Optional
+
+from xappt.config import log as logger
+from xappt.utilities.config_store import get_config_store
 
 ConfigItem = namedtuple("ConfigItem", ("key", "saver", "loader", "default"))
 
+# objects with a deferred `save_config`, keyed by `id` so that they stay alive until they're flushed
+_DEFERRED_SAVES: Dict[int, "ConfigMixin"] = {}
+
 
 class ConfigMixin:
     def __init__(self):
         super().__init__()
         self._config_path: Optional[pathlib.Path] = None
         self._registry: List[ConfigItem] = []
+        # the serialized config as it was last loaded or saved, to skip writing unchanged content
+        self._saved_config: Optional[str] = None
 
     def add_config_item(self, key: str, *, saver: Callable, loader: Callable, default: Any = None):
         self._registry.append(ConfigItem(key, saver, loader, default))
@@ -36,14 +45,15 @@ class ConfigMixin:
         self._check_settings_file_name()
 
         loaded_settings_raw = {}
-        try:
-            with self.config_path.open("r") as fp:
-                try:
-                    loaded_settings_raw = json.load(fp)
-                except json.JSONDecodeError:
-                    pass
-        except FileNotFoundError:
-            pass
+        contents = get_config_store().load(self.config_path)
+        if contents is not None:
+            # parsed every time, so that loaders never share mutable values
+            try:
+                loaded_settings_raw = json.loads(contents)
+            except json.JSONDecodeError:
+                pass
+            else:
+                self._saved_config = contents
 
         for item in self._registry:
             value = loaded_settings_raw.get(item.key, item.default)
@@ -53,14 +63,45 @@ class ConfigMixin:
             except Exception:
                 pass
 
-    def save_config(self):
+    def save_config(self, *, deferred: bool = False):
+        """ Save the config items to `config_path`, or to the entry for
+        `config_path` in the config store that has been configured. Nothing is
+        written if the contents haven't changed.
+
+        With `deferred` the save is postponed until `flush_config` is called,
+        or until the process exits, so that repeated saves are coalesced into
+        a single write of the most recent values.
+        """
         self._check_settings_file_name()
 
+        if deferred:
+            _DEFERRED_SAVES[id(self)] = self
+            return
+        _DEFERRED_SAVES.pop(id(self), None)
+
         settings_dict = {}
         for item in self._registry:
             value = item.saver()
             settings_dict[item.key] = value
+        contents = json.dumps(settings_dict, indent=2)
+
+        config_store = get_config_store()
+        if contents == self._saved_config and config_store.exists(self.config_path):
+            return
+
+        config_store.save(self.config_path, contents)
+        self._saved_config = contents
 
-        self.config_path.parent.mkdir(parents=True, exist_ok=True)
-        with self.config_path.open("w") as fp:
-            json.dump(settings_dict, fp, indent=2)
+    def flush_config(self):
+        """ Write a save that was deferred with `save_config(deferred=True)`. """
+        if id(self) in _DEFERRED_SAVES:
+            self.save_config()
+
+
+@atexit.register
+def flush_deferred_configs():
+    for config_mixin in list(_DEFERRED_SAVES.values()):
+        try:
+            config_mixin.flush_config()
+        except (OSError, RuntimeError) as e:
+            logger.warning(f"could not save config to {config_mixin.config_path}: {e}")
@@ -1,16 +1,23 @@
-from typing import Generator
+from typing import Any, Generator, Tuple
 
 from xappt.models.parameter.meta import ParamMeta
-from xappt.models.parameter.model import Parameter, ParamSetupDict, ParameterDescriptor
+from xappt.models.parameter.model import Parameter, ParamSetupDict, ParameterDescriptor, PENDING_VALUES_ATTR
 from xappt.models.parameter.errors import ParameterValidationError
+from xappt.models.parameter.schema import ParameterSchema, to_json_schema
 from xappt.models.plugins.base import BasePlugin
 
 
 class BaseParameterPlugin(BasePlugin, metaclass=ParamMeta):
     def __init__(self, **kwargs):
         super().__init__()
-        for param_name in self._parameters_:
-            param: Parameter = getattr(self, param_name)
+        lazy = self.lazy_parameters()
+        if lazy:
+            setattr(self, PENDING_VALUES_ATTR, {})
+        for param_name, descriptor in self._parameter_table_.items():
+            if lazy and not descriptor.is_materialized(self):
+                self._init_lazy_parameter(param_name, descriptor, kwargs)
+                continue
+            param: Parameter = descriptor.get_parameter(self)
             if param_name in kwargs:
                 param_value = kwargs[param_name]
                 if isinstance(param_value, ParamSetupDict):
@@ -21,26 +28,86 @@ class BaseParameterPlugin(BasePlugin, metaclass=ParamMeta):
                     param._value = param.validate(param_value)
             else:
                 try:
-                    param._value = param.validate(param.value)
+                    param._value = param.validate(param.value, record_failure=False)
                 except ParameterValidationError:
                     # run validations, but don't raise validation errors
                     pass
 
+    @classmethod
+    def lazy_parameters(cls) -> bool:
+        """ Return True to only build each `Parameter`, along with its
+        validators and callbacks, the first time it's accessed. Until then its
+        value is validated and kept in a dict. This makes creating tools that
+        have many parameters cheaper, when most of them are never read. """
+        return False
+
+    def _init_lazy_parameter(self, param_name: str, descriptor: ParameterDescriptor, kwargs: dict):
+        pending = getattr(self, PENDING_VALUES_ATTR)
+        template = descriptor.template_parameter()
+        if param_name in kwargs:
+            param_value = kwargs[param_name]
+            if isinstance(param_value, ParamSetupDict):
+                # this changes more than the value, so build the parameter now
+                descriptor.get_parameter(self).update(param_value)
+            elif param_value is not None:
+                pending[param_name] = template.validate(param_value)
+        else:
+            try:
+                pending[param_name] = template.validate(template.value, record_failure=False)
+            except ParameterValidationError:
+                pass
+
+    def _parameter_value(self, param_name: str) -> Any:
+        """ A parameter's value, without building the parameter if it's lazy. """
+        descriptor = self._parameter_table_[param_name]
+        if descriptor.is_materialized(self):
+            return descriptor.get_parameter(self).value
+        pending = getattr(self, PENDING_VALUES_ATTR, None)
+        if pending is not None and param_name in pending:
+            return pending[param_name]
+        return descriptor.param_setup_args['value']
+
+    @classmethod
+    def parameter_schema(cls) -> Tuple[ParameterSchema, ...]:
+        return cls._parameter_schema_
+
+    @classmethod
+    def json_schema(cls) -> dict:
+        return to_json_schema(cls._parameter_schema_, title=cls.name(), description=cls.help())
+
     @classmethod
     def class_parameters(cls) -> Generator[ParameterDescriptor, None, None]:
-        for item in cls._parameters_:
-            yield getattr(cls, item)
+        yield from cls._parameter_table_.values()
 
     def parameters(self) -> Generator[Parameter, None, None]:
-        for item in self._parameters_:
-            yield getattr(self, item)
+        for descriptor in self._parameter_table_.values():
+            yield descriptor.get_parameter(self)
+
+    def get_parameter(self, name: str) -> Parameter:
+        """ Return the parameter called `name`. Raises `KeyError` if there
+        isn't one. """
+        try:
+            descriptor = self._parameter_table_[name]
+        except KeyError:
+            raise KeyError(f"{self.name()} has no parameter named '{name}'") from None
+        return descriptor.get_parameter(self)
 
     def param_dict(self) -> dict:
+        if self.lazy_parameters():
+            return {param_name: self._parameter_value(param_name) for param_name in self._parameters_}
         d = {}
         for p in self.parameters():
             d[p.name] = p.value
         return d
 
     def validate(self):
+        if self.lazy_parameters():
+            for param_name, descriptor in self._parameter_table_.items():
+                if not descriptor.is_materialized(self):
+                    descriptor.template_parameter().validate(self._parameter_value(param_name))
+                    continue
+                param = descriptor.get_parameter(self)
+                param.validate(param.value)
+            return
         for param in self.parameters():
             param.validate(param.value)
@@ -1,21 +1,48 @@
+from typing import Dict
+
 from .model import ParameterDescriptor
+from .schema import build_parameter_schema
+
+
+def _check_name(class_name: str, var_name: str, descriptor: ParameterDescriptor):
+    # `__set_name__` names a descriptor after the first attribute it's assigned to
+    param_name = descriptor.param_setup_args['name']
+    if param_name != var_name:
+        raise TypeError(f"{class_name}.{var_name} is already the parameter '{param_name}', "
+                        "a parameter can't be shared under a different name")
 
 
 class ParamMeta(type):
     def __new__(mcs, name, bases, attrs):
         cls = type.__new__(mcs, name, bases, attrs)
-        base_parameters = []
-        for base in bases:
-            try:
-                base_parameters += base._parameters_  # noqa
-            except AttributeError:
-                pass
-        cls._parameters_ = base_parameters
-        for var_name, var_value in vars(cls).items():
-            if isinstance(var_value, ParameterDescriptor):
-                try:
-                    _ = cls._parameters_.index(var_name)
-                except ValueError:
-                    cls._parameters_.append(var_name)
-                var_value.param_setup_args['name'] = var_name
+        table: Dict[str, ParameterDescriptor] = {}
+        if len(bases) <= 1:
+            # with a single base, only this class can override what it inherits
+            if len(bases):
+                table.update(getattr(bases[0], "_parameter_table_", {}))
+            for var_name, var_value in attrs.items():
+                if isinstance(var_value, ParameterDescriptor):
+                    _check_name(name, var_name, var_value)
+                    table[var_name] = var_value
+                elif var_name in table:
+                    del table[var_name]
+        else:
+            # parameter names in declaration order, starting with those of the bases
+            param_names: Dict[str, None] = {}
+            for base in bases:
+                param_names.update(dict.fromkeys(getattr(base, "_parameter_table_", ())))
+            for var_name, var_value in attrs.items():
+                if isinstance(var_value, ParameterDescriptor):
+                    _check_name(name, var_name, var_value)
+                    param_names[var_name] = None
+            # resolve each name through the mro, so the most derived definition
+            # wins and names overridden by something else are dropped
+            for param_name in param_names:
+                descriptor = getattr(cls, param_name, None)
+                if isinstance(descriptor, ParameterDescriptor):
+                    table[param_name] = descriptor
+
+        cls._parameter_table_ = table
+        cls._parameters_ = list(table)
+        cls._parameter_schema_ = build_parameter_schema(cls)
         return cls
@@ -4,9 +4,14 @@ from typing import Any, Optional, Sequence, Type
 from typing import TYPE_CHECKING
 
 from xappt.models.callback import Callback
+from xappt.models.parameter.errors import ParameterValidationError
+from xappt.utilities.metrics import get_metrics
 if TYPE_CHECKING:
     from xappt.models.parameter.validators import BaseValidator
 
+# instance attribute holding the validated values of parameters that haven't been built yet
+PENDING_VALUES_ATTR = "_pending_parameter_values_"
+
 
 class ParamSetupDict(dict):
     def __init__(self, default=None, required=None, choices=None, options=None, value=None,
@@ -55,9 +60,17 @@ class Parameter:
         self._value = self.validate(update_args.get('value', self.value))
         self.metadata.update(update_args.get('metadata', {}))
 
-    def validate(self, value: Any) -> Any:
-        for validator in self.validators:
-            value = validator.validate(value)
+    def validate(self, value: Any, *, record_failure: bool = True) -> Any:
+        """ Run `value` through the validators and return the result. Failures
+        are counted in the `validation_failures_total` metric, unless the
+        caller expects and ignores them and passes `record_failure=False`. """
+        try:
+            for validator in self.validators:
+                value = validator.validate(value)
+        except ParameterValidationError:
+            if record_failure:
+                get_metrics().counter("validation_failures_total", parameter=self.name)
+            raise
         return value
 
     @property
@@ -122,13 +135,37 @@ class ParameterDescriptor:
         if "description" not in kwargs:
             self.param_setup_args['description'] = ""
 
+        self._template: Optional[Parameter] = None
+        # the descriptor's `ParameterSchema`, shared by every class that inherits it
+        self._schema = None
+
         cls.__counter += 1
 
+    def __set_name__(self, owner, name):
+        # a descriptor can be shared by several classes, but only under one
+        # name, which `ParamMeta` checks
+        if self.param_setup_args.get('name') is None:
+            self.param_setup_args['name'] = name
+
+    def template_parameter(self) -> Parameter:
+        """ A parameter built from the setup arguments, shared by every
+        instance. Lazily initialized plugins validate values with it, so it
+        must not be modified. """
+        if self._template is None:
+            self._template = Parameter(**self.param_setup_args)
+        return self._template
+
+    def is_materialized(self, instance) -> bool:
+        return getattr(instance, self.storage_name, None) is not None
+
     def get_parameter(self, instance):
         param = getattr(instance, self.storage_name, None)
         if param is None:
             # Create new parameter instance of descriptor properties
             param = Parameter(**self.param_setup_args)
+            pending = getattr(instance, PENDING_VALUES_ATTR, None)
+            if pending is not None and param.name in pending:
+                param._value = pending.pop(param.name)
             setattr(instance, self.storage_name, param)
             return param
         return param
@@ -0,0 +1,168 @@
+""" A serializable description of the parameters of a tool class. Each class
+using `ParamMeta` gets a `_parameter_schema_` that's built once, when the
+class is created. Schemas can be serialized, and converted to JSON Schema.
+
+The type of each parameter is recorded by name: the bare name for builtin
+types, otherwise the module and qualified name, such as "pathlib.Path".
+"""
+
+from collections import namedtuple
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Type
+
+from xappt.models.parameter import convert
+from xappt.models.parameter.model import ParameterDescriptor
+
+__all__ = [
+    'ParameterSchema',
+    'build_parameter_schema',
+    'schema_to_dict',
+    'schema_from_dict',
+    'to_json_schema',
+    'to_argument_dict',
+]
+
+ParameterSchema = namedtuple("ParameterSchema", ("name", "type", "description", "choices", "default", "required",
+                                                 "options", "hidden"))
+
+SCHEMA_TYPES: Dict[str, Type] = {
+    'str': str,
+    'bool': bool,
+    'int': int,
+    'float': float,
+    'list': list,
+}
+
+JSON_SCHEMA_TYPES = {
+    'str': "string",
+    'bool': "boolean",
+    'int': "integer",
+    'float': "number",
+    'list': "array",
+}
+
+JSON_SCHEMA_DIALECT = "https://json-schema.org/draft/2020-12/schema"
+
+
+def _type_name(data_type: Type) -> str:
+    if data_type.__module__ == "builtins":
+        return data_type.__name__
+    return f"{data_type.__module__}.{data_type.__qualname__}"
+
+
+def _parameter_schema(descriptor: ParameterDescriptor) -> ParameterSchema:
+    if descriptor._schema is None:
+        descriptor._schema = _build_parameter_schema(descriptor)
+    return descriptor._schema
+
+
+def _build_parameter_schema(descriptor: ParameterDescriptor) -> ParameterSchema:
+    setup_args = descriptor.param_setup_args
+    choices = setup_args.get('choices')
+    return ParameterSchema(
+        name=setup_args['name'],
+        type=_type_name(setup_args['data_type']),
+        description=setup_args.get('description', ""),
+        choices=None if choices is None else tuple(choices),
+        default=setup_args.get('default'),
+        required=bool(setup_args.get('required')),
+        options=dict(setup_args.get('options') or {}),
+        hidden=bool(setup_args.get('hidden')),
+    )
+
+
+def build_parameter_schema(cls) -> Tuple[ParameterSchema, ...]:
+    """ Build the schema of every parameter of `cls`, in declaration order. """
+    return tuple(_parameter_schema(descriptor) for descriptor in cls._parameter_table_.values())
+
+
+def schema_to_dict(schema: Sequence[ParameterSchema]) -> List[dict]:
+    return [param._asdict() for param in schema]
+
+
+def schema_from_dict(schema: Iterable[dict]) -> Tuple[ParameterSchema, ...]:
+    result = []
+    for param in schema:
+        param = dict(param)
+        if param.get('choices') is not None:
+            param['choices'] = tuple(param['choices'])
+        result.append(ParameterSchema(**param))
+    return tuple(result)
+
+
+def _json_schema_property(param: ParameterSchema) -> dict:
+    prop = {}
+    if len(param.description):
+        prop['description'] = param.description
+    if param.type == "list":
+        prop['type'] = "array"
+        prop['items'] = {'type': "string"}
+        if param.choices is not None and len(param.choices):
+            prop['items']['enum'] = list(param.choices)
+    elif param.type == "int" and param.choices is not None:
+        # an index into the choices, or one of the choices
+        prop['anyOf'] = [
+            {'type': "integer", 'minimum': 0, 'maximum': len(param.choices) - 1},
+            {'type': "string", 'enum': list(param.choices)},
+        ]
+    else:
+        prop['type'] = JSON_SCHEMA_TYPES.get(param.type, "string")
+        if param.type not in JSON_SCHEMA_TYPES:
+            # a type that JSON has no equivalent of, its value is given as a string
+            prop['x-type'] = param.type
+        if param.choices is not None:
+            prop['enum'] = list(param.choices)
+        for key in ("minimum", "maximum"):
+            if param.options.get(key) is not None:
+                prop[key] = param.options[key]
+    if param.default is not None:
+        prop['default'] = param.default
+    if param.hidden:
+        prop['x-hidden'] = True
+    if len(param.options):
+        prop['x-options'] = param.options
+    return prop
+
+
+def to_json_schema(schema: Sequence[ParameterSchema], *, title: Optional[str] = None,
+                   description: Optional[str] = None) -> dict:
+    """ Describe the parameters of a tool as a JSON Schema object.
+
+    >>> from xappt.models.parameter.parameters import ParamInt
+    >>> from xappt.models.parameter.meta import ParamMeta
+    >>> class Example(metaclass=ParamMeta):
+    ...     count = ParamInt(minimum=1, required=True)
+    >>> to_json_schema(Example._parameter_schema_)['properties']['count']
+    {'type': 'integer', 'minimum': 1, 'x-options': {'minimum': 1}}
+
+    """
+    json_schema = {'$schema': JSON_SCHEMA_DIALECT}
+    if title is not None:
+        json_schema['title'] = title
+    if description is not None and len(description):
+        json_schema['description'] = description
+    json_schema['type'] = "object"
+    json_schema['properties'] = {param.name: _json_schema_property(param) for param in schema}
+    json_schema['required'] = [param.name for param in schema if param.required]
+    return json_schema
+
+
+def to_argument_dict(param: ParameterSchema) -> Tuple[List, Dict]:
+    """ The `argparse` arguments for a parameter described by a schema alone,
+    such as one that's been deserialized. Only the types in `SCHEMA_TYPES` can
+    be recovered from their name, values of any other type are parsed as
+    strings. Where the tool class is available, use `convert.to_argument_dict`
+    with the setup arguments of its descriptors instead. """
+    return convert.to_argument_dict({
+        'name': param.name,
+        'data_type': SCHEMA_TYPES.get(param.type, str),
+        'description': param.description,
+        'choices': param.choices,
+        'default': param.default,
+        'required': param.required,
+        'options': param.options,
+    })
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
@@ -1,16 +1,29 @@
 from __future__ import annotations
 import abc
+import contextlib
+import os
+import time
 
-from typing import Any, Optional, Sequence, Type, TYPE_CHECKING, Union
+from typing import Any, Generator, List, Optional, Sequence, Tuple, Type, TYPE_CHECKING, Union
 
 import xappt.managers.plugin_manager
+from xappt.config import log as logger
+from xappt.constants import INCREMENTAL_ENV, RESULT_CACHE_ENV
 from xappt.utilities.command_runner import CommandRunner
+from xappt.utilities.incremental import IncrementalState
+from xappt.utilities.metrics import get_metrics
+from xappt.utilities.profiling import ProfileEvent
+from xappt.utilities.result_cache import ResultCache, file_digest
 
 from xappt.models.plugins.base import BasePlugin
 from xappt.models.parameter.model import Callback
+from xappt.models.parameter.validators import ValidateFileExists
 if TYPE_CHECKING:
     from xappt.models.plugins.tool import BaseTool
 
+# interface methods whose calls are recorded and replayed by the result cache
+CACHED_OUTPUT_METHODS = ("message", "warning", "error", "write_stdout", "write_stderr")
+
 
 class BaseInterface(BasePlugin, metaclass=abc.ABCMeta):
     @abc.abstractmethod
@@ -21,13 +34,24 @@ class BaseInterface(BasePlugin, metaclass=abc.ABCMeta):
         self.on_write_stdout = Callback()
         self.on_write_stderr = Callback()
         self.on_tool_chain_modified = Callback()
+        self.on_profile_event = Callback()
 
         self._current_tool_index: int = -1
         self._tool_chain: list[Type[BaseTool]] = []
         self._current_tool: Optional[BaseTool] = None
+        self._execute_start: Optional[float] = None
 
         self.tool_data: dict[str: Any] = {}  # tool_data will be sent to both BaseTool.__init__ and BaseTool.execute
 
+        self.result_cache: Optional[ResultCache] = None
+        if os.environ.get(RESULT_CACHE_ENV, "0") != "0":
+            self.result_cache = ResultCache()
+
+        self.incremental: Optional[IncrementalState] = None
+        incremental_mode = os.environ.get(INCREMENTAL_ENV, "0")
+        if incremental_mode != "0":
+            self.incremental = IncrementalState(hash_contents=incremental_mode.lower() == "hash")
+
     @property
     def current_tool_index(self) -> int:
         return self._current_tool_index
@@ -51,15 +75,39 @@ class BaseInterface(BasePlugin, metaclass=abc.ABCMeta):
 
     @abc.abstractmethod
     def run(self, **kwargs) -> int:
+        metrics = get_metrics()
         for i, tool_class in enumerate(self._tool_chain):
             self._current_tool_index = i
-            self._current_tool = tool_class(interface=self, **self.tool_data)
+            tool_start = time.perf_counter()
+            with self._profile("construct", tool=tool_class.name()):
+                self._current_tool = tool_class(interface=self, **self.tool_data)
+
+            self._execute_start = None
+            invoke_start = time.perf_counter()
             result = self.invoke(self._current_tool, **self.tool_data)
+            # anything that `invoke` did before reaching `execute_tool` is considered prompting
+            prompt_end = self._execute_start or time.perf_counter()
+            self._emit_profile_event("prompt", invoke_start, prompt_end - invoke_start, tool=tool_class.name())
+
+            metrics.histogram("tool_duration_seconds", time.perf_counter() - tool_start, tool=tool_class.name())
+            metrics.counter("tool_runs_total", tool=tool_class.name(), exit_code=result)
+
             self._current_tool = None
             if result != 0:
                 return result
         return 0
 
+    def _emit_profile_event(self, name: str, start: float, duration: float, **kwargs):
+        self.on_profile_event.invoke(ProfileEvent(name, self.name(), start, duration, kwargs))
+
+    @contextlib.contextmanager
+    def _profile(self, name: str, **kwargs):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._emit_profile_event(name, start, time.perf_counter() - start, **kwargs)
+
     @classmethod
     def collection(cls) -> str:
         return "interface"
@@ -68,6 +116,111 @@ class BaseInterface(BasePlugin, metaclass=abc.ABCMeta):
     def invoke(self, plugin: BaseTool, **kwargs) -> int:
         pass
 
+    def execute_tool(self, plugin: BaseTool, **kwargs) -> int:
+        """ Call `plugin.execute`. Interfaces should call this from `invoke`
+        once parameters have been gathered, so that up to date tools can be
+        skipped in incremental mode, and results of cacheable tools can be
+        served from `result_cache`. """
+        self._execute_start = time.perf_counter()
+        with self._profile("execute", tool=plugin.name()):
+            return self._execute_incremental(plugin, **kwargs)
+
+    def _execute_incremental(self, plugin: BaseTool, **kwargs) -> int:
+        if self.incremental is None or not len(plugin.output_path_params()):
+            return self._execute_cached(plugin, **kwargs)
+
+        identity = {'tool': plugin.name(), 'collection': plugin.collection(), 'version': plugin.version()}
+        params = {'params': plugin.param_dict(), 'kwargs': kwargs}
+        input_paths, output_paths = self._tool_paths(plugin)
+        if self.incremental.is_up_to_date(identity, params, input_paths, output_paths):
+            logger.debug(f"skipping '{plugin.name()}', outputs are up to date")
+            return 0
+
+        result = self._execute_cached(plugin, **kwargs)
+        if result == 0:
+            self.incremental.record(identity, params, input_paths, output_paths)
+        else:
+            self.incremental.forget(identity, output_paths)
+        return result
+
+    @staticmethod
+    def _tool_paths(plugin: BaseTool) -> Tuple[List[str], List[str]]:
+        def collect(param_names: Sequence[str]) -> List[str]:
+            paths = []
+            for param_name in param_names:
+                value = plugin.get_parameter(param_name).value
+                if value is None:
+                    continue
+                if isinstance(value, (list, tuple)):
+                    paths.extend(os.path.abspath(v) for v in value)
+                else:
+                    paths.append(os.path.abspath(value))
+            return paths
+        return collect(plugin.input_path_params()), collect(plugin.output_path_params())
+
+    def _execute_cached(self, plugin: BaseTool, **kwargs) -> int:
+        if self.result_cache is None or not plugin.cacheable():
+            return plugin.execute(**kwargs)
+
+        cache_key = self._result_cache_key(plugin, **kwargs)
+        cached = self.result_cache.get(cache_key)
+        if cached is not None:
+            logger.debug(f"replaying cached result for '{plugin.name()}'")
+            for method_name, args, method_kwargs in cached.outputs:
+                getattr(self, method_name)(*args, **method_kwargs)
+            return cached.result
+
+        with self._record_outputs() as outputs:
+            result = plugin.execute(**kwargs)
+        if result == 0:
+            self.result_cache.put(cache_key, result, outputs)
+        return result
+
+    @staticmethod
+    def _result_cache_key(plugin: BaseTool, **kwargs) -> str:
+        file_digests = {}
+        for param in plugin.parameters():
+            if param.value is None:
+                continue
+            if any(isinstance(validator, ValidateFileExists) for validator in param.validators):
+                file_digests[param.name] = file_digest(param.value)
+        return ResultCache.make_key({
+            'tool': plugin.name(),
+            'collection': plugin.collection(),
+            'version': plugin.version(),
+            'params': plugin.param_dict(),
+            'kwargs': kwargs,
+            'files': file_digests,
+        })
+
+    @contextlib.contextmanager
+    def _record_outputs(self) -> Generator[list, None, None]:
+        """ Temporarily wrap the output methods so that their calls are
+        recorded. Calls made from within another recorded call are ignored so
+        that a replay doesn't duplicate any output. """
+        outputs = []
+        depth = 0
+
+        def recorder(method_name, method):
+            def record(*args, **kwargs):
+                nonlocal depth
+                if depth == 0:
+                    outputs.append((method_name, list(args), kwargs))
+                depth += 1
+                try:
+                    return method(*args, **kwargs)
+                finally:
+                    depth -= 1
+            return record
+
+        for name in CACHED_OUTPUT_METHODS:
+            setattr(self, name, recorder(name, getattr(self, name)))
+        try:
+            yield outputs
+        finally:
+            for name in CACHED_OUTPUT_METHODS:
+                delattr(self, name)
+
     @abc.abstractmethod
     def message(self, message: str):
         pass
@@ -103,7 +256,9 @@ class BaseInterface(BasePlugin, metaclass=abc.ABCMeta):
         self.on_write_stderr.invoke(text)
 
     def run_subprocess(self, command: Union[bytes, str, Sequence], **kwargs) -> int:
-        result = self.command_runner.run(command, stdout_fn=self.write_stdout, stderr_fn=self.write_stderr, **kwargs)
+        with self._profile("subprocess", command=command), get_metrics().timer("subprocess_duration_seconds"):
+            result = self.command_runner.run(command, stdout_fn=self.write_stdout, stderr_fn=self.write_stderr,
+                                             **kwargs)
         return result.result
 
     def abort(self):
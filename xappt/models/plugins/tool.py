@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+from typing import Sequence, TYPE_CHECKING
 
 from xappt.models.parameter.base import BaseParameterPlugin
 if TYPE_CHECKING:
@@ -16,6 +16,28 @@ class BaseTool(BaseParameterPlugin):
     def collection(cls) -> str:
         return "tool"
 
+    @classmethod
+    def version(cls) -> str:
+        """ Bump this when a change to `execute` should invalidate cached results. """
+        return ""
+
+    @classmethod
+    def cacheable(cls) -> bool:
+        """ Return True if this tool's results depend only on its parameters and
+        input files, allowing an interface's `result_cache` to skip `execute`. """
+        return False
+
+    @classmethod
+    def input_path_params(cls) -> Sequence[str]:
+        """ Names of the parameters that hold input paths. Used together with
+        `output_path_params` to skip up to date tools in incremental mode. """
+        return ()
+
+    @classmethod
+    def output_path_params(cls) -> Sequence[str]:
+        """ Names of the parameters that hold output paths. """
+        return ()
+
     def execute(self, **kwargs) -> int:
         raise NotImplementedError
 
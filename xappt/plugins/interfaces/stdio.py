@@ -100,7 +100,7 @@ class StdIO(xappt.BaseInterface):
                     self.prompt_for_param(param)
                 else:
                     param.value = param.validate(param.default)
-            return plugin.execute(**kwargs)
+            return self.execute_tool(plugin, **kwargs)
         except KeyboardInterrupt:
             print("")
             self.error("Aborted by user")
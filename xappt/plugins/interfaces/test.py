@@ -14,7 +14,7 @@ class TestInterface(xappt.BaseInterface):
         return super().run(**kwargs)
 
     def invoke(self, plugin: xappt.BaseTool, **kwargs) -> int:
-        return plugin.execute(**kwargs)
+        return self.execute_tool(plugin, **kwargs)
 
     def message(self, message: str):
         self.messages['message'].append(message)
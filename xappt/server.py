@@ -0,0 +1,304 @@
+""" A resident xappt process that keeps plugins loaded between tool runs.
+
+The server listens on a Unix socket and runs each request through
+`xappt.cli.cli_main`, so a request is handled exactly as the same command line
+would be. Requests and responses are length prefixed JSON frames:
+
+    request:   {'argv': [...], 'env': {...}, 'cwd': "...", 'tty': false}
+    responses: {'stream': "stdout" | "stderr", 'data': "..."}
+               {'exit': 0}
+
+Requests are handled one at a time, because running a tool modifies process
+wide state such as the environment, the working directory and `sys.stdout`.
+The thin client that talks to the server is the top level `xapptc` module.
+
+The socket is created in a directory that only its owner can access, and
+connections from any other user are refused. The client only forwards the
+environment variables in `FORWARDED_ENV`, those starting with one of
+`FORWARDED_ENV_PREFIXES`, and those named in `XAPPT_SERVER_ENV`. They're set on
+top of the server's own environment while the request is handled.
+
+`ForkingXapptServer` runs every request in a child process forked from the
+server instead. Each tool runs in isolation, without paying for start up and
+plugin discovery, and requests are no longer handled one at a time.
+"""
+
+import contextlib
+import io
+import json
+import os
+import signal
+import socket
+import socketserver
+import stat
+import struct
+import sys
+import tempfile
+import traceback
+
+from typing import Optional
+
+from xappt.config import log as logger
+from xappt.constants import SERVER_ENV_ENV, SERVER_SOCKET_ENV
+from xappt.utilities.metrics import get_metrics
+from xappt.utilities.path.scratch import shutdown_scratch_managers
+
+__all__ = [
+    'XapptServer',
+    'ForkingXapptServer',
+    'default_socket_path',
+    'forwarded_environment',
+    'send_frame',
+    'recv_frame',
+    'serve',
+]
+
+FRAME_HEADER = struct.Struct("!I")
+
+# pid, uid and gid, as returned by SO_PEERCRED
+PEER_CREDENTIALS = struct.Struct("3i")
+
+FORWARDED_ENV = ("PATH", "HOME", "USER", "LOGNAME", "SHELL", "LANG", "LANGUAGE", "TZ", "TERM", "COLUMNS", "LINES",
+                 "NO_COLOR", "VIRTUAL_ENV", "PYTHONPATH")
+FORWARDED_ENV_PREFIXES = ("XAPPT_", "LC_")
+
+
+def default_socket_path() -> str:
+    """ The socket path from `XAPPT_SOCKET`, otherwise `xappt.sock` in
+    `XDG_RUNTIME_DIR`, otherwise in a private `xappt-<uid>` folder in the temp
+    directory. """
+    socket_path = os.environ.get(SERVER_SOCKET_ENV)
+    if socket_path:
+        return socket_path
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR", "")
+    if os.path.isabs(runtime_dir) and os.path.isdir(runtime_dir):
+        return os.path.join(runtime_dir, "xappt.sock")
+    return os.path.join(tempfile.gettempdir(), f"xappt-{os.getuid()}", "xappt.sock")
+
+
+def forwarded_environment(environ=None) -> dict:
+    """ The part of `environ` that the client sends to the server. """
+    if environ is None:
+        environ = os.environ
+    names = set(FORWARDED_ENV)
+    names.update(name.strip() for name in environ.get(SERVER_ENV_ENV, "").split(","))
+    return {name: value for name, value in environ.items()
+            if name in names or name.startswith(FORWARDED_ENV_PREFIXES)}
+
+
+def check_socket_dir(socket_path: str):
+    """ Raise `PermissionError` unless the folder containing `socket_path` is
+    owned by the current user, and can't be accessed by anyone else. """
+    socket_dir = os.path.dirname(os.path.abspath(socket_path))
+    dir_stat = os.lstat(socket_dir)
+    if not stat.S_ISDIR(dir_stat.st_mode) or dir_stat.st_uid != os.getuid() or dir_stat.st_mode & 0o077:
+        raise PermissionError(f"The socket folder {socket_dir} must be a directory owned by the current user, "
+                              "and not accessible by anyone else")
+
+
+def peer_uid(sock: socket.socket) -> Optional[int]:
+    """ The uid of the process on the other end of `sock`, or None where
+    SO_PEERCRED isn't supported. """
+    if not hasattr(socket, "SO_PEERCRED"):
+        return None
+    credentials = sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, PEER_CREDENTIALS.size)
+    return PEER_CREDENTIALS.unpack(credentials)[1]
+
+
+def send_frame(sock: socket.socket, message: dict):
+    payload = json.dumps(message).encode("utf8")
+    sock.sendall(FRAME_HEADER.pack(len(payload)) + payload)
+
+
+def _recv_exact(sock: socket.socket, size: int) -> Optional[bytes]:
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            return None
+        data.extend(chunk)
+    return bytes(data)
+
+
+def recv_frame(sock: socket.socket) -> Optional[dict]:
+    """ Read a single frame, or return None if the connection was closed. """
+    header = _recv_exact(sock, FRAME_HEADER.size)
+    if header is None:
+        return None
+    payload = _recv_exact(sock, FRAME_HEADER.unpack(header)[0])
+    if payload is None:
+        return None
+    return json.loads(payload.decode("utf8"))
+
+
+class _FrameWriter(io.TextIOBase):
+    """ A text stream that forwards everything written to it to the client. """
+    def __init__(self, sock: socket.socket, stream_name: str, tty: bool):
+        super().__init__()
+        self._socket = sock
+        self._stream_name = stream_name
+        self._tty = tty
+        self._connected = True
+
+    @property
+    def encoding(self):
+        return "utf8"
+
+    def isatty(self) -> bool:
+        return self._tty
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: str) -> int:
+        # anything that holds on to this stream after the request (colorama does) is silently ignored
+        if self._connected and len(data):
+            try:
+                send_frame(self._socket, {'stream': self._stream_name, 'data': data})
+            except OSError:
+                self._connected = False
+        return len(data)
+
+    def disconnect(self):
+        self._connected = False
+
+
+@contextlib.contextmanager
+def _request_context(request: dict, stdout: _FrameWriter, stderr: _FrameWriter):
+    saved_environ = dict(os.environ)
+    saved_cwd = os.getcwd()
+    saved_streams = sys.stdin, sys.stdout, sys.stderr
+    try:
+        os.environ.update(request.get('env', {}))
+        os.chdir(request.get('cwd', saved_cwd))
+        # tools can't prompt for input, there is nobody to answer
+        sys.stdin = io.StringIO()
+        sys.stdout, sys.stderr = stdout, stderr
+        yield
+    finally:
+        sys.stdin, sys.stdout, sys.stderr = saved_streams
+        stdout.disconnect()
+        stderr.disconnect()
+        os.chdir(saved_cwd)
+        os.environ.clear()
+        os.environ.update(saved_environ)
+
+
+def run_request(request: dict, stdout: _FrameWriter, stderr: _FrameWriter) -> int:
+    from xappt.cli import cli_main
+
+    with _request_context(request, stdout, stderr):
+        try:
+            return cli_main(*request.get('argv', [])) or 0
+        except SystemExit as e:
+            if e.code is None or isinstance(e.code, int):
+                return e.code or 0
+            print(e.code, file=sys.stderr)
+            return 1
+        except Exception:  # noqa: report anything a tool raises to the client, and keep serving
+            traceback.print_exc(file=sys.stderr)
+            return 1
+
+
+class _RequestHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        try:
+            request = recv_frame(self.request)
+        except ValueError as e:
+            logger.warning(f"invalid request: {e}")
+            return
+        if request is None:
+            return
+        tty = bool(request.get('tty', False))
+        result = run_request(request, _FrameWriter(self.request, "stdout", tty),
+                             _FrameWriter(self.request, "stderr", tty))
+        try:
+            send_frame(self.request, {'exit': result})
+        except OSError as e:
+            logger.debug(f"could not send the exit code to the client: {e}")
+
+
+class XapptServer(socketserver.UnixStreamServer):
+    """ Serve tool runs over the Unix socket at `socket_path`. A stale socket
+    file left behind by a server that is no longer running is replaced.
+
+    The folder containing the socket is created if needed, and must only be
+    accessible by the current user. Connections from other users are refused
+    where the platform can tell who is connecting. """
+    def __init__(self, socket_path: str):
+        self.socket_path = socket_path
+        socket_dir = os.path.dirname(os.path.abspath(socket_path))
+        if not os.path.isdir(socket_dir):
+            os.makedirs(socket_dir, mode=0o700)
+        check_socket_dir(socket_path)
+        self._remove_stale_socket()
+        # the socket file is created by bind, with no window where others can connect
+        saved_umask = os.umask(0o177)
+        try:
+            super().__init__(socket_path, _RequestHandler)
+        finally:
+            os.umask(saved_umask)
+
+    def verify_request(self, request, client_address) -> bool:
+        uid = peer_uid(request)
+        if uid is not None and uid != os.getuid():
+            logger.warning(f"refused a connection from uid {uid}")
+            return False
+        return True
+
+    def _remove_stale_socket(self):
+        if not os.path.exists(self.socket_path):
+            return
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+            try:
+                probe.connect(self.socket_path)
+            except OSError:
+                os.remove(self.socket_path)
+            else:
+                raise RuntimeError(f"An xappt server is already listening on {self.socket_path}")
+
+    def server_close(self):
+        super().server_close()
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(self.socket_path)
+
+
+class ForkingXapptServer(socketserver.ForkingMixIn, XapptServer):
+    """ Serve each request from a child process, forked from this pre-warmed
+    server. The child exits as soon as the request has been handled. """
+    def finish_request(self, request, client_address):
+        # `ForkingMixIn` only calls this in the child process
+        self.socket.close()
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        devnull_fd = os.open(os.devnull, os.O_RDONLY)
+        os.dup2(devnull_fd, 0)
+        os.close(devnull_fd)
+        try:
+            super().finish_request(request, client_address)
+        finally:
+            # the child exits with `os._exit`, which skips the atexit handlers
+            try:
+                get_metrics().flush()
+            except OSError as e:
+                logger.warning(f"could not write metrics: {e}")
+            shutdown_scratch_managers()
+
+
+def _terminate(signum, frame):
+    raise SystemExit(0)
+
+
+def serve(socket_path: Optional[str] = None, *, fork: bool = False) -> int:
+    if socket_path is None:
+        socket_path = default_socket_path()
+    server_class = ForkingXapptServer if fork else XapptServer
+    # exit through the `with` block on SIGTERM too, so that the socket file is removed
+    signal.signal(signal.SIGTERM, _terminate)
+    with server_class(socket_path) as server:
+        logger.info(f"xappt server listening on {socket_path}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+    return 0
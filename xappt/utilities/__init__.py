@@ -1,6 +1,7 @@
 from xappt.utilities import git_tools
 from xappt.utilities.command_runner import CommandRunner, CommandResult
-from xappt.utilities.find_python import find_python
+from xappt.utilities.find_python import find_python, find_pythons, query_python_versions
 from xappt.utilities.path import *
 from xappt.utilities.humanize import *
+from xappt.utilities.result_cache import ResultCache
 from xappt.utilities import setup_helpers
@@ -0,0 +1,184 @@
+""" Storage backends for `ConfigMixin`. By default each config is a JSON file
+at its `config_path`. Setting the `XAPPT_CONFIG_STORE` environment variable to
+"sqlite" keeps every config in a single SQLite database under
+`user_data_path()/xappt` instead, or "sqlite:<path>" to use a specific file.
+Configs are still identified by their `config_path`.
+"""
+
+import os
+import pathlib
+import sqlite3
+import threading
+
+from typing import Dict, Optional, Tuple
+
+from xappt.config import log as logger
+from xappt.constants import CONFIG_STORE_ENV
+from xappt.utilities.path.atomic import atomic_write, file_lock
+from xappt.utilities.path.platform_paths import user_data_path
+
+__all__ = [
+    'ConfigStore',
+    'FileConfigStore',
+    'SqliteConfigStore',
+    'config_store_from_string',
+    'get_config_store',
+    'set_config_store',
+]
+
+
+class ConfigStore:
+    """ The interface for config storage. Configs are saved and loaded as
+    serialized strings, keyed by their config path. """
+    def load(self, path: pathlib.Path) -> Optional[str]:
+        """ Return the saved config, or None if there isn't one. """
+        raise NotImplementedError
+
+    def save(self, path: pathlib.Path, contents: str):
+        raise NotImplementedError
+
+    def exists(self, path: pathlib.Path) -> bool:
+        raise NotImplementedError
+
+
+class FileConfigStore(ConfigStore):
+    """ Store each config as a file at its config path. Files are replaced
+    atomically, while holding a lock so that other processes saving the same
+    config wait their turn.
+
+    The contents of each file are cached along with its modification time and
+    size, so a config is only read again once the file has changed.
+    """
+    def __init__(self):
+        self._cache: Dict[pathlib.Path, Tuple[int, int, str]] = {}
+        self._lock = threading.Lock()
+
+    def load(self, path: pathlib.Path) -> Optional[str]:
+        try:
+            path_stat = path.stat()
+        except FileNotFoundError:
+            with self._lock:
+                self._cache.pop(path, None)
+            return None
+
+        with self._lock:
+            cached = self._cache.get(path)
+        if cached is not None and cached[:2] == (path_stat.st_mtime_ns, path_stat.st_size):
+            return cached[2]
+
+        try:
+            with path.open("r") as fp:
+                contents = fp.read()
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            self._cache[path] = (path_stat.st_mtime_ns, path_stat.st_size, contents)
+        return contents
+
+    def save(self, path: pathlib.Path, contents: str):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with file_lock(path.with_name(f"{path.name}.lock")):
+            atomic_write(path, contents)
+            try:
+                path_stat = path.stat()
+            except FileNotFoundError:
+                path_stat = None
+        with self._lock:
+            if path_stat is None:
+                self._cache.pop(path, None)
+            else:
+                self._cache[path] = (path_stat.st_mtime_ns, path_stat.st_size, contents)
+
+    def exists(self, path: pathlib.Path) -> bool:
+        return path.is_file()
+
+
+class SqliteConfigStore(ConfigStore):
+    """ Store every config in a single SQLite database. Each config is only
+    read from the database the first time it's needed, and is then served
+    from memory. Changes made by other processes after a config has been read
+    aren't seen until the store is recreated or `invalidate` is called. """
+    def __init__(self, path: Optional[pathlib.Path] = None):
+        if path is None:
+            path = user_data_path().joinpath("xappt", "config.db")
+        self.path: pathlib.Path = path
+        self._cache: Dict[str, Optional[str]] = {}
+        self._lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(str(self.path), timeout=30.0, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("CREATE TABLE IF NOT EXISTS configs (path TEXT PRIMARY KEY, contents TEXT NOT NULL)")
+            connection.commit()
+            self._connection = connection
+        return self._connection
+
+    def load(self, path: pathlib.Path) -> Optional[str]:
+        key = str(path)
+        with self._lock:
+            if key not in self._cache:
+                row = self._connect().execute("SELECT contents FROM configs WHERE path = ?", (key, )).fetchone()
+                self._cache[key] = None if row is None else row[0]
+            return self._cache[key]
+
+    def save(self, path: pathlib.Path, contents: str):
+        key = str(path)
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                connection.execute("INSERT OR REPLACE INTO configs (path, contents) VALUES (?, ?)", (key, contents))
+            self._cache[key] = contents
+
+    def exists(self, path: pathlib.Path) -> bool:
+        return self.load(path) is not None
+
+    def invalidate(self):
+        with self._lock:
+            self._cache.clear()
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def _after_fork(self):
+        # a connection can't be shared with a forked process, the child opens its own
+        self._connection = None
+        self._lock = threading.Lock()
+
+
+def config_store_from_string(value: str) -> ConfigStore:
+    """ Build a `ConfigStore` from a "sqlite" or "sqlite:<path>" string.
+    Anything else stores configs as individual files. """
+    kind, _, target = value.partition(":")
+    kind = kind.strip().lower()
+    if kind == "sqlite":
+        return SqliteConfigStore(pathlib.Path(target).expanduser() if len(target) else None)
+    if len(kind) and kind != "file":
+        logger.warning(f"Invalid value for {CONFIG_STORE_ENV}: '{value}'")
+    return FileConfigStore()
+
+
+_config_store: ConfigStore = config_store_from_string(os.environ.get(CONFIG_STORE_ENV, ""))
+
+
+def _after_fork_in_child():
+    if isinstance(_config_store, SqliteConfigStore):
+        _config_store._after_fork()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+def get_config_store() -> ConfigStore:
+    return _config_store
+
+
+def set_config_store(config_store: ConfigStore):
+    global _config_store
+    _config_store = config_store
@@ -1,6 +1,30 @@
 import errno
+import hashlib
+import json
 import os
+import re
 import shutil
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from xappt.config import log as logger
+from xappt.utilities.command_runner import CommandRunner
+from xappt.utilities.path.atomic import atomic_write
+from xappt.utilities.path.platform_paths import user_cache_path
+
+Version = Tuple[int, ...]
+
+PYTHON_NAME_RE = re.compile(r"python(\d+)\.(\d+)$")
+REGISTRY_VERSION_RE = re.compile(r"(\d+)\.(\d+)$")
+
+VERSION_SCRIPT = "import sys; print(*sys.version_info[:3])"
+
+# the state of the directories on each PATH that has been scanned by this
+# process, and the interpreters that were found there
+_PYTHONS: Dict[str, Tuple[Optional[list], Dict[Version, str]]] = {}
+_PYTHONS_LOCK = threading.Lock()
 
 
 def _find_python_nt(version):
@@ -25,8 +49,166 @@ def _find_python_nt(version):
     return None
 
 
-def _find_python_posix(version):
-    return shutil.which(f"python{version}")
+def _find_pythons_nt() -> Dict[Version, str]:
+    import winreg  # noqa
+
+    versions = set()
+    for key in (winreg.HKEY_LOCAL_MACHINE, winreg.HKEY_CURRENT_USER):
+        try:
+            opened_key = winreg.OpenKey(key, r"SOFTWARE\Python\PythonCore")
+        except WindowsError:
+            continue
+        i = 0
+        while True:
+            try:
+                name = winreg.EnumKey(opened_key, i)
+            except WindowsError:
+                break
+            match = REGISTRY_VERSION_RE.match(name)
+            if match is not None:
+                versions.add(name)
+            i += 1
+
+    pythons = {}
+    for version in versions:
+        py_exe = _find_python_nt(version)
+        if py_exe is not None:
+            major, minor = REGISTRY_VERSION_RE.match(version).groups()
+            pythons[(int(major), int(minor))] = py_exe
+    return pythons
+
+
+def _path_dirs(path_var: str) -> List[str]:
+    return [d for d in path_var.split(os.pathsep) if len(d)]
+
+
+def _scan_path_posix(path_var: str) -> Dict[Version, str]:
+    """ List each directory on `path_var` once, and return the first
+    executable `pythonX.Y` found for each version, the same one that
+    `shutil.which` would return. """
+    pythons = {}
+    for directory in _path_dirs(path_var):
+        try:
+            with os.scandir(directory) as it:
+                entries = [entry for entry in it if entry.name.startswith("python")]
+        except OSError:
+            continue
+        for entry in entries:  # type: os.DirEntry
+            match = PYTHON_NAME_RE.match(entry.name)
+            if match is None:
+                continue
+            version = (int(match.group(1)), int(match.group(2)))
+            if version in pythons:
+                continue
+            try:
+                if entry.is_file() and os.access(entry.path, os.X_OK):
+                    pythons[version] = entry.path
+            except OSError:
+                continue
+    return pythons
+
+
+def _path_state(path_var: str) -> list:
+    """ The modification time of each directory on PATH, which changes when an
+    interpreter is added to or removed from it. """
+    state = []
+    for directory in _path_dirs(path_var):
+        try:
+            state.append([directory, os.stat(directory).st_mtime_ns])
+        except OSError:
+            state.append([directory, None])
+    return state
+
+
+def _scan_path_cached(path_var: str, path_state: list) -> Dict[Version, str]:
+    cache_file = user_cache_path().joinpath("xappt", "pythons.json")
+    key = hashlib.sha256(json.dumps(path_state).encode("utf8")).hexdigest()
+    try:
+        with cache_file.open("r") as fp:
+            data = json.load(fp)
+        if data.get('key') == key:
+            return {tuple(int(v) for v in version.split(".")): path for version, path in data['pythons'].items()}
+    except (OSError, ValueError, KeyError):
+        pass
+
+    pythons = _scan_path_posix(path_var)
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write(cache_file, json.dumps({
+            'key': key,
+            'pythons': {".".join(str(v) for v in version): path for version, path in pythons.items()},
+        }))
+    except OSError as e:
+        logger.warning(f"could not save the python interpreter cache: {e}")
+    return pythons
+
+
+def find_pythons(*, disk_cache: bool = False) -> Dict[Version, str]:
+    """ Find every `pythonX.Y` interpreter, keyed by `(major, minor)`.
+
+    On posix systems each directory on PATH is listed once, and the result is
+    cached until PATH, or the modification time of one of its directories,
+    changes. Checking that only needs a `stat` of each directory. With
+    `disk_cache`, the scan is also saved under the user cache directory, and
+    reused by later processes in the same way. On Windows the registry is read
+    once per process, call `clear_python_cache` to read it again.
+
+    >>> pythons = find_pythons()
+    >>> all(isinstance(path, str) for path in pythons.values())
+    True
+
+    """
+    if os.name not in ("nt", "posix"):
+        raise NotImplementedError
+    path_var = os.environ.get("PATH", os.defpath)
+    path_state = None if os.name == "nt" else _path_state(path_var)
+    with _PYTHONS_LOCK:
+        cached = _PYTHONS.get(path_var)
+        if cached is not None and cached[0] == path_state:
+            return dict(cached[1])
+        if os.name == "nt":
+            pythons = _find_pythons_nt()
+        elif disk_cache:
+            pythons = _scan_path_cached(path_var, path_state)
+        else:
+            pythons = _scan_path_posix(path_var)
+        _PYTHONS[path_var] = (path_state, pythons)
+        return dict(pythons)
+
+
+def clear_python_cache():
+    with _PYTHONS_LOCK:
+        _PYTHONS.clear()
+
+
+def _query_version(py_exe: str) -> Optional[Version]:
+    try:
+        result = CommandRunner().run((py_exe, "-c", VERSION_SCRIPT), capture_output=True)
+    except OSError:
+        return None
+    if result.result != 0:
+        return None
+    try:
+        return tuple(int(v) for v in result.stdout.split())
+    except ValueError:
+        return None
+
+
+def query_python_versions(executables: Iterable[str], *, workers: int = 8) -> Dict[str, Optional[Version]]:
+    """ Run each interpreter to get its full `(major, minor, micro)` version.
+    The interpreters are run in parallel, and the version is None for any that
+    fail to run.
+
+    >>> import sys
+    >>> query_python_versions([sys.executable])[sys.executable] == tuple(sys.version_info[:3])
+    True
+
+    """
+    executables = list(executables)
+    if not len(executables):
+        return {}
+    with ThreadPoolExecutor(max_workers=min(workers, len(executables))) as executor:
+        return dict(zip(executables, executor.map(_query_version, executables)))
 
 
 def find_python(major, minor):
@@ -37,9 +219,9 @@ def find_python(major, minor):
     >>> assert py_bin is not None
 
     """
-    version = f"{major}.{minor}"
-    if os.name == "nt":
-        return _find_python_nt(version)
-    elif os.name == "posix":
-        return _find_python_posix(version)
-    raise NotImplementedError
+    return find_pythons().get((int(major), int(minor)))
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
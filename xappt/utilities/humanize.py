@@ -1,8 +1,14 @@
-from typing import Iterable
+import bisect
+import itertools
+import sys
+
+from typing import Iterable, List
 
 __all__ = [
     'humanize_list',
+    'humanize_list_truncated',
     'humanize_bytes',
+    'humanize_bytes_many',
     'humanize_ordinal',
 ]
 
@@ -21,23 +27,94 @@ def humanize_list(items: Iterable, conjunction: str = "or", quote: bool = False)
     return f"{', '.join(items[:-1])},{conjunction}{items[-1]}"
 
 
+def humanize_list_truncated(items: Iterable, max_items: int, conjunction: str = "and", quote: bool = False) -> str:
+    """ Like `humanize_list`, but only the first `max_items` items are shown,
+    followed by a count of the rest. Only the items that are shown are
+    converted to strings.
+
+    >>> humanize_list_truncated(range(1000), 3)
+    '0, 1, 2, and 997 more'
+    >>> humanize_list_truncated(("a", "b"), 3)
+    'a and b'
+    """
+    if max_items < 1:
+        raise ValueError("Expected max_items to be at least 1")
+    iterator = iter(items)
+    shown = list(itertools.islice(iterator, max_items))
+    if hasattr(items, "__len__"):
+        remaining = len(items) - len(shown)
+    else:
+        remaining = sum(1 for _ in iterator)
+    if remaining <= 0:
+        return humanize_list(shown, conjunction=conjunction, quote=quote)
+    shown = [str(item).strip() for item in shown]
+    if quote:
+        shown = [f"'{item}'" for item in shown]
+    # the serial comma is only needed when more than one item is shown
+    separator = "," if len(shown) > 1 else ""
+    return f"{', '.join(shown)}{separator} {conjunction.strip()} {remaining} more"
+
+
 MAGNITUDE = {
     1000: ('B', 'kB', 'MB', 'GB', 'TB', 'PB', 'EB', 'ZB', 'YB'),
     1024: ('B', 'KiB', 'MiB', 'GiB', 'TiB', 'PiB', 'EiB', 'ZiB', 'YiB'),
 }
 
 
+# the value of each magnitude, as integers for exact comparisons and as floats for division
+DIVISORS = {b: tuple(b ** i for i in range(len(m))) for b, m in MAGNITUDE.items()}
+FLOAT_DIVISORS = {b: tuple(float(d) for d in divisors) for b, divisors in DIVISORS.items()}
+
+
+def _magnitude(value, divisors: tuple) -> int:
+    """ The index of the largest magnitude that's less than `value`. A value
+    that's exactly a power of the base is shown in the magnitude below it, for
+    example 1024 is "1024 B". """
+    return max(0, bisect.bisect_left(divisors, value) - 1)
+
+
 def humanize_bytes(value, *, decimal_places: int = 0, binary: bool = True) -> str:
-    f = f"{{0:.{decimal_places}f}} {{1}}"
+    """
+    >>> humanize_bytes(1024), humanize_bytes(1025), humanize_bytes(1536, decimal_places=1)
+    ('1024 B', '1 KiB', '1.5 KiB')
+    >>> humanize_bytes(5_000_000, binary=False)
+    '5 MB'
+    """
     b = 1024 if binary else 1000
-    m = MAGNITUDE[b]
-    for i in range(len(m)):
-        c = b ** i
-        if c >= value:
-            p = max(0, i - 1)
-            return f.format(float(value) / float(b ** p), m[p])
-    p = len(m) - 1
-    return f.format(value / (b ** p), m[p])
+    p = _magnitude(value, DIVISORS[b])
+    return f"{float(value) / FLOAT_DIVISORS[b][p]:.{decimal_places}f} {MAGNITUDE[b][p]}"
+
+
+def humanize_bytes_many(values: Iterable, *, decimal_places: int = 0, binary: bool = True) -> List[str]:
+    """ Format many sizes at once, with the same results as `humanize_bytes`.
+    If `values` is a NumPy array, the magnitudes are found for the whole array
+    at once.
+
+    >>> humanize_bytes_many([0, 1024, 1025, 1536], decimal_places=1)
+    ['0.0 B', '1024.0 B', '1.0 KiB', '1.5 KiB']
+    """
+    b = 1024 if binary else 1000
+    units = MAGNITUDE[b]
+    divisors = DIVISORS[b]
+    float_divisors = FLOAT_DIVISORS[b]
+    last = len(units) - 1
+    fmt = f"{{:.{decimal_places}f}} {{}}".format
+
+    np = sys.modules.get("numpy")
+    if np is not None and isinstance(values, np.ndarray):
+        np_divisors = np.array(float_divisors)
+        magnitudes = np.clip(np.searchsorted(np_divisors, values, side="left") - 1, 0, last)
+        scaled = values / np_divisors[magnitudes]
+        return [fmt(v, units[p]) for v, p in zip(scaled.tolist(), magnitudes.tolist())]
+
+    bisect_left = bisect.bisect_left
+    result = []
+    for value in values:
+        p = bisect_left(divisors, value) - 1
+        if p < 0:
+            p = 0
+        result.append(fmt(float(value) / float_divisors[p], units[p]))
+    return result
 
 
 ORDINAL_SPECIAL_SUFFIX = {1: "st", 2: "nd", 3: "rd"}
@@ -52,3 +129,8 @@ def humanize_ordinal(value: int) -> str:
         if value % 100 not in ORDINAL_EXCEPTIONS:
             suffix = ORDINAL_SPECIAL_SUFFIX[last_digit]
     return f"{value}{suffix}"
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,95 @@
+import json
+import os
+import pathlib
+
+from typing import Dict, Optional, Sequence
+
+from xappt.config import log as logger
+from xappt.utilities.path.atomic import atomic_write
+from xappt.utilities.path.platform_paths import user_cache_path
+from xappt.utilities.result_cache import ResultCache, file_digest
+
+
+class IncrementalState:
+    """ Make-like bookkeeping for tool runs. After a successful run `record`
+    stores a digest of the tool's parameters along with the state of each of
+    its input paths. A later run is up to date when the parameters are
+    unchanged, every output exists and is newer than every input, and the
+    inputs still match what was recorded.
+
+    Inputs are compared by modification time and size, or by the digest of
+    their contents when `hash_contents` is True. Input files whose digests
+    are compared don't need to be older than the outputs, so touching an input
+    without changing it doesn't cause a run.
+    """
+    def __init__(self, path: Optional[pathlib.Path] = None, *, hash_contents: bool = False):
+        if path is None:
+            path = user_cache_path().joinpath("xappt", "incremental")
+        self.path: pathlib.Path = path
+        self.hash_contents: bool = hash_contents
+
+    def _record_path(self, identity: dict, outputs: Sequence[str]) -> pathlib.Path:
+        key = ResultCache.make_key({'identity': identity, 'outputs': sorted(outputs)})
+        return self.path.joinpath(f"{key}.json")
+
+    def _is_hashed(self, path: str) -> bool:
+        return self.hash_contents and os.path.isfile(path)
+
+    def _input_state(self, path: str) -> list:
+        path_stat = os.stat(path)
+        if self._is_hashed(path):
+            return [file_digest(path)]
+        return [path_stat.st_mtime_ns, path_stat.st_size]
+
+    def _load_record(self, record_path: pathlib.Path) -> Optional[dict]:
+        try:
+            with record_path.open("r") as fp:
+                return json.load(fp)
+        except (OSError, ValueError):
+            return None
+
+    def is_up_to_date(self, identity: dict, params: dict, inputs: Sequence[str], outputs: Sequence[str]) -> bool:
+        if not len(outputs):
+            return False
+
+        record = self._load_record(self._record_path(identity, outputs))
+        if record is None:
+            return False
+        if record.get('params') != ResultCache.make_key(params):
+            logger.debug("parameters have changed since the last run")
+            return False
+
+        try:
+            oldest_output = min(os.stat(path).st_mtime_ns for path in outputs)
+            newest_input = max((os.stat(path).st_mtime_ns for path in inputs if not self._is_hashed(path)),
+                               default=0)
+        except OSError:
+            return False
+        if newest_input > oldest_output:
+            return False
+
+        recorded_inputs: Dict[str, list] = record.get('inputs', {})
+        for path in inputs:
+            if recorded_inputs.get(path) != self._input_state(path):
+                logger.debug(f"input '{path}' has changed since the last run")
+                return False
+
+        return True
+
+    def record(self, identity: dict, params: dict, inputs: Sequence[str], outputs: Sequence[str]):
+        if not len(outputs):
+            return
+        record_path = self._record_path(identity, outputs)
+        try:
+            input_states = {path: self._input_state(path) for path in inputs}
+        except OSError:
+            # an input disappeared while the tool was running, so there's nothing reliable to record
+            return
+        record_path.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write(record_path, json.dumps({'params': ResultCache.make_key(params), 'inputs': input_states}))
+
+    def forget(self, identity: dict, outputs: Sequence[str]):
+        try:
+            os.remove(self._record_path(identity, outputs))
+        except FileNotFoundError:
+            pass
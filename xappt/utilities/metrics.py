@@ -0,0 +1,273 @@
+""" A small, pluggable metrics API. The core reports counters and histograms
+to whatever `Metrics` object is installed with `set_metrics`. The default is a
+no-op implementation, so nothing is measured or stored unless an exporter has
+been configured, either in code or through the `XAPPT_METRICS` environment
+variable:
+
+    XAPPT_METRICS=prometheus:/path/to/xappt.prom
+    XAPPT_METRICS=statsd:127.0.0.1:8125
+"""
+
+import atexit
+import contextlib
+import json
+import os
+import pathlib
+import socket
+import threading
+import time
+
+from collections import defaultdict
+from typing import ContextManager, Dict, Sequence, Tuple
+
+from xappt.config import log as logger
+from xappt.constants import METRICS_ENV
+from xappt.utilities.path.atomic import atomic_write, file_lock
+
+__all__ = [
+    'Metrics',
+    'PrometheusMetrics',
+    'StatsdMetrics',
+    'get_metrics',
+    'set_metrics',
+    'metrics_from_string',
+]
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+_NULL_TIMER = contextlib.nullcontext()
+
+
+def _label_key(labels: dict) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class Metrics:
+    """ The no-op metrics sink, and the interface that exporters implement. """
+    def counter(self, name: str, value: float = 1, **labels):
+        pass
+
+    def histogram(self, name: str, value: float, **labels):
+        pass
+
+    def timer(self, name: str, **labels) -> ContextManager:
+        """ Time the body of a `with` block, and report it to `histogram` in seconds. """
+        return _NULL_TIMER
+
+    def flush(self):
+        pass
+
+
+class _Timer:
+    def __init__(self, metrics: Metrics, name: str, labels: dict):
+        self._metrics = metrics
+        self._name = name
+        self._labels = labels
+        self._start = 0.0
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._metrics.histogram(self._name, time.perf_counter() - self._start, **self._labels)
+
+
+class PrometheusMetrics(Metrics):
+    """ Aggregate metrics in memory and write them to `path` in the Prometheus
+    text exposition format when `flush` is called. This is intended to be
+    collected with the node exporter's textfile collector.
+
+    Many processes can share the same `path`. Each `flush` adds the metrics
+    recorded since the previous one to the running totals, which are kept
+    next to `path` in a JSON file, under a lock, and then rewrites `path`. """
+    DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+    def __init__(self, path: pathlib.Path, *, prefix: str = "xappt", buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.path = path
+        self.prefix = prefix
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[LabelKey, float]] = defaultdict(lambda: defaultdict(float))
+        self._histograms: Dict[str, Dict[LabelKey, list]] = defaultdict(dict)
+
+    def counter(self, name: str, value: float = 1, **labels):
+        with self._lock:
+            self._counters[name][_label_key(labels)] += value
+
+    def histogram(self, name: str, value: float, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            # bucket counts, followed by the sum and the count of observations
+            hist = self._histograms[name].setdefault(key, [0] * len(self.buckets) + [0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    hist[i] += 1
+            hist[-2] += value
+            hist[-1] += 1
+
+    def timer(self, name: str, **labels) -> ContextManager:
+        return _Timer(self, name, labels)
+
+    @staticmethod
+    def _format_labels(labels: LabelKey) -> str:
+        if not len(labels):
+            return ""
+        escaped = []
+        for k, v in labels:
+            v = v.replace("\\", r"\\").replace('"', r'\"').replace("\n", r"\n")
+            escaped.append(f'{k}="{v}"')
+        return f"{{{','.join(escaped)}}}"
+
+    def _render(self, counters: Dict[str, Dict[LabelKey, float]], histograms: Dict[str, Dict[LabelKey, list]]) -> str:
+        lines = []
+        for name in sorted(counters):
+            full_name = f"{self.prefix}_{name}"
+            lines.append(f"# TYPE {full_name} counter")
+            for labels, value in sorted(counters[name].items()):
+                lines.append(f"{full_name}{self._format_labels(labels)} {value}")
+        for name in sorted(histograms):
+            full_name = f"{self.prefix}_{name}"
+            lines.append(f"# TYPE {full_name} histogram")
+            for labels, hist in sorted(histograms[name].items()):
+                for bound, count in zip(self.buckets, hist):
+                    bucket_labels = self._format_labels(labels + (("le", str(bound)), ))
+                    lines.append(f"{full_name}_bucket{bucket_labels} {count}")
+                inf_labels = self._format_labels(labels + (("le", "+Inf"), ))
+                lines.append(f"{full_name}_bucket{inf_labels} {hist[-1]}")
+                lines.append(f"{full_name}_sum{self._format_labels(labels)} {hist[-2]}")
+                lines.append(f"{full_name}_count{self._format_labels(labels)} {hist[-1]}")
+        return "\n".join(lines) + "\n"
+
+    def render(self) -> str:
+        """ Render the metrics recorded since the last `flush`. """
+        with self._lock:
+            return self._render(self._counters, self._histograms)
+
+    @staticmethod
+    def _merge(counters: Dict[str, Dict[LabelKey, float]], histograms: Dict[str, Dict[LabelKey, list]],
+               new_counters: Dict[str, Dict[LabelKey, float]], new_histograms: Dict[str, Dict[LabelKey, list]]):
+        for name, values in new_counters.items():
+            for labels, value in values.items():
+                counters[name][labels] += value
+        for name, values in new_histograms.items():
+            for labels, hist in values.items():
+                total = histograms[name].get(labels)
+                if total is None:
+                    histograms[name][labels] = list(hist)
+                else:
+                    histograms[name][labels] = [a + b for a, b in zip(total, hist)]
+
+    def _load_totals(self, state_path: pathlib.Path) -> Tuple[Dict[str, Dict[LabelKey, float]],
+                                                               Dict[str, Dict[LabelKey, list]]]:
+        counters = defaultdict(lambda: defaultdict(float))
+        histograms = defaultdict(dict)
+        try:
+            with state_path.open("r") as fp:
+                state = json.load(fp)
+        except (OSError, ValueError):
+            return counters, histograms
+        for name, values in state.get('counters', {}).items():
+            for labels, value in values:
+                counters[name][tuple(tuple(label) for label in labels)] = value
+        if state.get('buckets') == list(self.buckets):
+            for name, values in state.get('histograms', {}).items():
+                for labels, hist in values:
+                    histograms[name][tuple(tuple(label) for label in labels)] = hist
+        else:
+            logger.debug(f"histogram buckets in {state_path} have changed, discarding the histogram totals")
+        return counters, histograms
+
+    def flush(self):
+        with self._lock:
+            counters, histograms = self._counters, self._histograms
+            self._counters = defaultdict(lambda: defaultdict(float))
+            self._histograms = defaultdict(dict)
+        state_path = self.path.with_name(f"{self.path.name}.json")
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with file_lock(self.path.with_name(f"{self.path.name}.lock")):
+                total_counters, total_histograms = self._load_totals(state_path)
+                self._merge(total_counters, total_histograms, counters, histograms)
+                atomic_write(state_path, json.dumps({
+                    'buckets': list(self.buckets),
+                    'counters': {name: list(values.items()) for name, values in total_counters.items()},
+                    'histograms': {name: list(values.items()) for name, values in total_histograms.items()},
+                }))
+                atomic_write(self.path, self._render(total_counters, total_histograms))
+        except BaseException:
+            # keep what wasn't written, for the next flush
+            with self._lock:
+                self._merge(self._counters, self._histograms, counters, histograms)
+            raise
+
+
+class StatsdMetrics(Metrics):
+    """ Send metrics to a StatsD compatible daemon over UDP. Labels are sent as
+    DogStatsD style tags. Sending is best effort, errors are only logged. """
+    def __init__(self, host: str = "127.0.0.1", port: int = 8125, *, prefix: str = "xappt"):
+        self.address = (host, port)
+        self.prefix = prefix
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def _send(self, name: str, value: float, metric_type: str, labels: dict):
+        message = f"{self.prefix}.{name}:{value}|{metric_type}"
+        if len(labels):
+            message += f"|#{','.join(f'{k}:{v}' for k, v in sorted(labels.items()))}"
+        try:
+            self._socket.sendto(message.encode("utf8"), self.address)
+        except OSError as e:
+            logger.debug(f"could not send metric '{name}': {e}")
+
+    def counter(self, name: str, value: float = 1, **labels):
+        self._send(name, value, "c", labels)
+
+    def histogram(self, name: str, value: float, **labels):
+        if name.endswith("_seconds"):
+            # StatsD timers are expected in milliseconds
+            self._send(f"{name[:-len('_seconds')]}_ms", value * 1000.0, "ms", labels)
+        else:
+            self._send(name, value, "h", labels)
+
+    def timer(self, name: str, **labels) -> ContextManager:
+        return _Timer(self, name, labels)
+
+
+def metrics_from_string(value: str) -> Metrics:
+    """ Build a `Metrics` object from a "prometheus:<path>" or
+    "statsd:<host>:<port>" string. Anything else disables metrics. """
+    kind, _, target = value.partition(":")
+    kind = kind.strip().lower()
+    if kind == "prometheus" and len(target):
+        return PrometheusMetrics(pathlib.Path(target).expanduser())
+    if kind == "statsd":
+        host, sep, port = target.rpartition(":")
+        if not sep:
+            host, port = target, ""
+        try:
+            return StatsdMetrics(host or "127.0.0.1", int(port or 8125))
+        except ValueError:
+            pass
+    if len(kind):
+        logger.warning(f"Invalid value for {METRICS_ENV}: '{value}'")
+    return Metrics()
+
+
+_metrics: Metrics = metrics_from_string(os.environ.get(METRICS_ENV, ""))
+
+
+def get_metrics() -> Metrics:
+    return _metrics
+
+
+def set_metrics(metrics: Metrics):
+    global _metrics
+    _metrics = metrics
+
+
+@atexit.register
+def _flush_metrics():
+    try:
+        _metrics.flush()
+    except OSError as e:
+        logger.warning(f"could not write metrics: {e}")
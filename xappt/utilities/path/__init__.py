@@ -1,4 +1,10 @@
 from xappt.utilities.path.misc import find_files, get_unique_name
 from xappt.utilities.path.temp_path import temp_path
-from xappt.utilities.path.misc import search_files, unique_path, UniqueMode, user_data_path
+from xappt.utilities.path.misc import search_files, unique_path, UniqueMode
+from xappt.utilities.path.platform_paths import user_data_path, user_cache_path, user_config_path
+from xappt.utilities.path.platform_paths import invalidate_platform_paths
 from xappt.utilities.path.temp_path import temporary_path
+from xappt.utilities.path.atomic import atomic_write, file_lock
+from xappt.utilities.path.file_index import FileIndex
+from xappt.utilities.path.matcher import PathMatcher, get_matcher
+from xappt.utilities.path.scratch import ScratchManager, scratch_path
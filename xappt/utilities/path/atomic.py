@@ -0,0 +1,63 @@
+import contextlib
+import os
+import pathlib
+import tempfile
+
+from typing import Generator
+
+
+def atomic_write(path: pathlib.Path, text: str, *, encoding: str = "utf8"):
+    """ Write `text` to `path` so that readers see either the old contents or
+    the new contents, never a partially written file. The data is written to
+    a temporary file in the same directory, which then replaces `path`.
+
+    >>> from xappt.utilities.path.temp_path import temporary_path
+    >>> with temporary_path() as tmp:
+    ...     atomic_write(tmp.joinpath("example.txt"), "hello")
+    ...     tmp.joinpath("example.txt").read_text()
+    ...     [item.name for item in tmp.iterdir()]
+    'hello'
+    ['example.txt']
+
+    """
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding=encoding) as fp:
+            fp.write(text)
+            fp.flush()
+            os.fsync(fp.fileno())
+        os.replace(tmp_name, path)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(tmp_name)
+        raise
+
+
+@contextlib.contextmanager
+def file_lock(path: pathlib.Path) -> Generator[None, None, None]:
+    """ Hold an exclusive lock on the file at `path` for the duration of the
+    `with` block, waiting for other processes to release it first. The file is
+    created if it doesn't exist, and is left in place afterwards. """
+    with open(path, "a+b") as fp:
+        if os.name == "nt":
+            import msvcrt
+            fp.seek(0)
+            # LK_LOCK retries for about 10 seconds before raising OSError
+            msvcrt.locking(fp.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                fp.seek(0)
+                msvcrt.locking(fp.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(fp.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(fp.fileno(), fcntl.LOCK_UN)
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,187 @@
+import hashlib
+import json
+import os
+import pathlib
+import time
+
+from typing import Dict, Generator, List, Optional
+
+from xappt.config import log as logger
+from xappt.utilities.path.atomic import atomic_write
+from xappt.utilities.path.matcher import get_matcher
+from xappt.utilities.path.misc import search_files
+from xappt.utilities.path.platform_paths import user_cache_path
+
+# directory record: [mtime_ns, {file_name: [size, mtime_ns]}, [subdirectory names]]
+DirectoryRecord = list
+
+# a directory modified this recently could change again without its mtime changing
+RACY_MTIME_NS = 2_000_000_000
+
+
+class FileIndex:
+    """ A persistent snapshot of directory trees that `search_files` can answer
+    queries from, instead of listing every directory again.
+
+    Each directory's contents are recorded along with its modification time.
+    When a directory is visited by a later search it is only listed again if
+    its modification time has changed, which happens when files are added,
+    removed or renamed in it. The size and modification time recorded for a
+    file are not updated when the file is modified in place.
+
+    Snapshots are kept in memory, and written to `path` (one file per searched
+    directory) when a search has changed them.
+
+    >>> from xappt.utilities.path.temp_path import temporary_path
+    >>> with temporary_path() as tmp:
+    ...     tmp.joinpath("data", "sub").mkdir(parents=True)
+    ...     tmp.joinpath("data", "sub", "file.txt").touch()
+    ...     index = FileIndex(tmp.joinpath("index"))
+    ...     [p.name for p in index.search(tmp.joinpath("data"), patterns="*.txt", recursive=True)]
+    ['file.txt']
+
+    """
+    def __init__(self, path: Optional[pathlib.Path] = None):
+        if path is None:
+            path = user_cache_path().joinpath("xappt", "file_index")
+        self.path: pathlib.Path = path
+        self._snapshots: Dict[str, Dict[str, DirectoryRecord]] = {}
+        self._dirty: set = set()
+
+    def _snapshot_path(self, root: str) -> pathlib.Path:
+        key = hashlib.sha256(root.encode("utf8")).hexdigest()
+        return self.path.joinpath(f"{key}.json")
+
+    def _snapshot(self, root: str) -> Dict[str, DirectoryRecord]:
+        snapshot = self._snapshots.get(root)
+        if snapshot is None:
+            snapshot = {}
+            try:
+                with self._snapshot_path(root).open("r") as fp:
+                    data = json.load(fp)
+                if data.get('root') == root:
+                    snapshot = data['directories']
+            except (OSError, ValueError, KeyError):
+                pass
+            self._snapshots[root] = snapshot
+        return snapshot
+
+    @staticmethod
+    def _scan(path: str, mtime_ns: int) -> DirectoryRecord:
+        files = {}
+        subdirs = []
+        with os.scandir(path) as it:
+            for entry in it:  # type: os.DirEntry
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.name)
+                    elif entry.is_file():
+                        entry_stat = entry.stat()
+                        files[entry.name] = [entry_stat.st_size, entry_stat.st_mtime_ns]
+                except OSError:
+                    continue
+        return [mtime_ns, files, subdirs]
+
+    def _record(self, root: str, snapshot: Dict[str, DirectoryRecord], rel_path: str) -> Optional[DirectoryRecord]:
+        """ Return the record of a directory, listing it again if it has changed. """
+        path = os.path.join(root, rel_path) if len(rel_path) else root
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+        record = snapshot.get(rel_path)
+        if record is None or record[0] != mtime_ns:
+            try:
+                record = self._scan(path, mtime_ns)
+            except OSError:
+                return None
+            if time.time_ns() - mtime_ns < RACY_MTIME_NS:
+                record[0] = 0  # list it again next time
+            snapshot[rel_path] = record
+            self._dirty.add(root)
+        return record
+
+    def search(self, search_path: pathlib.Path, **kwargs) -> Generator[pathlib.Path, None, None]:
+        """ Search the index like `search_files`, with the same keyword
+        arguments. Searches that follow symbolic links aren't indexed, and are
+        passed on to `search_files`. """
+        if kwargs.get('follow_symlinks', False):
+            yield from search_files(search_path, **kwargs)
+            return
+
+        matcher = get_matcher(kwargs['patterns'])
+        include_dirs = kwargs.get('include_dirs')
+        exclude_dirs = kwargs.get('exclude_dirs')
+        include_matcher = None if include_dirs is None else get_matcher(include_dirs)
+        exclude_matcher = None if exclude_dirs is None else get_matcher(exclude_dirs)
+        max_depth: Optional[int] = kwargs.get('max_depth') if kwargs.get('recursive', False) else 0
+
+        root = os.path.abspath(str(search_path))
+        root_path = pathlib.Path(root)
+        snapshot = self._snapshot(root)
+
+        try:
+            stack = [("", 0)]
+            while len(stack):
+                rel_path, depth = stack.pop()
+                record = self._record(root, snapshot, rel_path)
+                if record is None:
+                    continue
+                parent = root_path.joinpath(rel_path) if len(rel_path) else root_path
+                rel_dir = rel_path.replace(os.sep, "/")
+                for file_name in record[1]:
+                    if matcher.match(file_name, rel_dir):
+                        yield parent / file_name
+                if max_depth is not None and depth >= max_depth:
+                    continue
+                subdirs: List[str] = []
+                for dir_name in record[2]:
+                    if exclude_matcher is not None and exclude_matcher.match(dir_name):
+                        continue
+                    if include_matcher is not None and not include_matcher.match(dir_name):
+                        continue
+                    subdirs.append(os.path.join(rel_path, dir_name) if len(rel_path) else dir_name)
+                stack.extend((subdir, depth + 1) for subdir in reversed(subdirs))
+        finally:
+            self.save()
+
+    @staticmethod
+    def _prune(snapshot: Dict[str, DirectoryRecord]):
+        """ Drop the records of directories that have since been removed. """
+        reachable = set()
+        stack = [""]
+        while len(stack):
+            rel_path = stack.pop()
+            record = snapshot.get(rel_path)
+            if record is None:
+                continue
+            reachable.add(rel_path)
+            stack.extend(os.path.join(rel_path, name) if len(rel_path) else name for name in record[2])
+        for rel_path in [rel_path for rel_path in snapshot if rel_path not in reachable]:
+            del snapshot[rel_path]
+
+    def save(self):
+        for root in list(self._dirty):
+            snapshot = self._snapshots[root]
+            self._prune(snapshot)
+            try:
+                self.path.mkdir(parents=True, exist_ok=True)
+                atomic_write(self._snapshot_path(root), json.dumps({'root': root, 'directories': snapshot},
+                                                                   separators=(",", ":")))
+            except OSError as e:
+                logger.warning(f"could not save the file index for {root}: {e}")
+            self._dirty.discard(root)
+
+    def clear(self):
+        self._snapshots.clear()
+        self._dirty.clear()
+        if not self.path.is_dir():
+            return
+        for item in os.scandir(self.path):  # type: os.DirEntry
+            if item.name.endswith(".json"):
+                os.remove(item.path)
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
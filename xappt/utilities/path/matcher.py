@@ -0,0 +1,164 @@
+import fnmatch
+import re
+
+from functools import lru_cache
+from typing import Callable, Optional, Pattern, Sequence, Tuple, Union
+
+GLOB_CHARS = frozenset("*?[")
+
+
+def _translate_path(pattern: str) -> str:
+    """ Translate a glob style path pattern to a regular expression. `*` and
+    `?` don't match across directories, while `**` matches any number of
+    directories.
+
+    >>> bool(re.match(_translate_path("src/**/*.py"), "src/a/b/module.py"))
+    True
+    >>> bool(re.match(_translate_path("src/**/*.py"), "src/module.py"))
+    True
+    >>> bool(re.match(_translate_path("src/*.py"), "src/a/module.py"))
+    False
+
+    """
+    i, n = 0, len(pattern)
+    result = []
+    while i < n:
+        if pattern.startswith("**/", i):
+            result.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("**", i):
+            result.append(".*")
+            i += 2
+        elif pattern[i] == "*":
+            result.append("[^/]*")
+            i += 1
+        elif pattern[i] == "?":
+            result.append("[^/]")
+            i += 1
+        elif pattern[i] == "[" and pattern.find("]", i + 2) != -1:
+            end = pattern.find("]", i + 2)
+            chars = pattern[i + 1:end].replace("\\", "\\\\")
+            if chars.startswith("!"):
+                chars = "^" + chars[1:]
+            elif chars.startswith("^"):
+                chars = "\\" + chars
+            result.append(f"[{chars}]")
+            i = end + 1
+        else:
+            result.append(re.escape(pattern[i]))
+            i += 1
+    return f"(?s:{''.join(result)})\\Z"
+
+
+class PathMatcher:
+    """ Match file names against a set of `fnmatch` style patterns.
+
+    Patterns are split into groups that can be checked quickly: exact names
+    and extensions (`*.py`) are looked up in sets, other simple suffixes
+    (`*.tar.gz`) are checked with `str.endswith`, and only the remaining
+    patterns are combined into a regular expression. Patterns that contain a
+    `/` are matched against the path relative to the search directory, where
+    `**` matches any number of directories.
+
+    >>> matcher = PathMatcher(("*.py", "*.tar.gz", "README.md", "file-??.txt", "docs/**/*.rst"))
+    >>> [matcher.match(name) for name in ("cli.py", "data.tar.gz", "README.md", "file-01.txt", "other.txt")]
+    [True, True, True, True, False]
+    >>> matcher.match("index.rst", "docs/api"), matcher.match("index.rst", "src")
+    (True, False)
+
+    """
+    def __init__(self, patterns: Union[str, Sequence[str]]):
+        if isinstance(patterns, str):
+            patterns = [patterns]
+        self.patterns: Tuple[str, ...] = tuple(patterns)
+
+        names = set()
+        extensions = set()
+        suffixes = []
+        name_patterns = []
+        path_patterns = []
+        for pattern in self.patterns:
+            if "/" in pattern:
+                path_patterns.append(pattern)
+            elif not GLOB_CHARS.intersection(pattern):
+                names.add(pattern)
+            elif pattern.startswith("*") and not GLOB_CHARS.intersection(pattern[1:]):
+                suffix = pattern[1:]
+                if suffix.startswith(".") and suffix.count(".") == 1:
+                    extensions.add(suffix)
+                else:
+                    suffixes.append(suffix)
+            else:
+                name_patterns.append(pattern)
+
+        self._names = frozenset(names)
+        self._extensions = frozenset(extensions)
+        self._suffixes = tuple(suffixes)
+        self._name_regex: Optional[Pattern] = None
+        if len(name_patterns):
+            self._name_regex = re.compile('|'.join(fnmatch.translate(p) for p in name_patterns))
+        self._path_regex: Optional[Pattern] = None
+        if len(path_patterns):
+            self._path_regex = re.compile('|'.join(_translate_path(p) for p in path_patterns))
+
+        # `match` is called for every file that's searched, so it's specialized
+        # here for the groups that are in use rather than checking each of them
+        self.match: Callable[..., bool] = self._build_match()
+
+    @property
+    def has_path_patterns(self) -> bool:
+        return self._path_regex is not None
+
+    def _build_match(self) -> Callable[..., bool]:
+        """ Build the `match(name, rel_dir="")` function. `rel_dir` is the
+        directory that contains the file, relative to the search directory and
+        separated with `/`, and is only needed when there are path patterns. """
+        names = self._names
+        extensions = self._extensions
+        suffixes = self._suffixes
+        name_regex = self._name_regex
+        path_regex = self._path_regex
+
+        if not len(names) and not len(suffixes) and name_regex is None and path_regex is None:
+            # for names without a "." this checks their last character, which
+            # can't match since every extension starts with "."
+            def match_extensions(name: str, rel_dir: str = "") -> bool:
+                return name[name.rfind("."):] in extensions
+            return match_extensions
+
+        if not len(names) and not len(extensions) and not len(suffixes) and path_regex is None:
+            def match_regex(name: str, rel_dir: str = "") -> bool:
+                return name_regex.match(name) is not None
+            return match_regex
+
+        def match(name: str, rel_dir: str = "") -> bool:
+            if name in names:
+                return True
+            if len(extensions) and name[name.rfind("."):] in extensions:
+                return True
+            if len(suffixes) and name.endswith(suffixes):
+                return True
+            if name_regex is not None and name_regex.match(name):
+                return True
+            if path_regex is not None:
+                return path_regex.match(f"{rel_dir}/{name}" if len(rel_dir) else name) is not None
+            return False
+        return match
+
+
+@lru_cache(maxsize=128)
+def _get_matcher(patterns: Tuple[str, ...]) -> PathMatcher:
+    return PathMatcher(patterns)
+
+
+def get_matcher(patterns: Union[str, Sequence[str]]) -> PathMatcher:
+    """ Return a `PathMatcher` for `patterns`, reusing one that was built for
+    the same patterns recently. """
+    if isinstance(patterns, str):
+        patterns = (patterns, )
+    return _get_matcher(tuple(patterns))
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
@@ -1,14 +1,15 @@
 import enum
-import fnmatch
 import os
 import pathlib
-import platform
 import random
-import re
 import string
 import warnings
 
-from typing import Generator, Sequence, Union
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Generator, List, Optional, Sequence, Tuple, Union
+
+from xappt.utilities.path.matcher import PathMatcher, get_matcher
+from xappt.utilities.path.platform_paths import user_data_path
 
 RAND_CHARS = string.ascii_letters + string.digits
 
@@ -16,6 +17,7 @@ RAND_CHARS = string.ascii_letters + string.digits
 class UniqueMode(enum.Enum):
     RANDOM = 0
     INTEGER = 1
+    INTEGER_SCAN = 2
 
 
 def find_files(path: str, patterns: Union[str, Sequence], *, recursive: bool = False) -> Generator[str, None, None]:
@@ -23,44 +25,146 @@ def find_files(path: str, patterns: Union[str, Sequence], *, recursive: bool = F
     Note that `pattern` expects an `fnmatch` compatible pattern (e.g. `*.py`), or a list/tuple of patterns.
     """
     warnings.warn("Call to deprecated function `find_files`. Use `search_files` instead.", DeprecationWarning)
-    if isinstance(patterns, str):
-        patterns = [patterns]
-    pattern_regex = re.compile('|'.join([fnmatch.translate(p) for p in patterns]))
+    matcher = get_matcher(patterns)
 
     if recursive:
         for root, dirs, files in os.walk(path):
+            rel_dir = os.path.relpath(root, path).replace(os.sep, "/") if matcher.has_path_patterns else ""
             for f in files:
-                if pattern_regex.match(f):
+                if matcher.match(f, "" if rel_dir == "." else rel_dir):
                     yield os.path.join(root, f)
     else:
         for item in os.scandir(path):  # type: os.DirEntry
-            if pattern_regex.match(item.name):
+            if matcher.match(item.name):
                 yield item.path
 
 
+def _scan_directory(path: str, depth: int, **kwargs) -> Tuple[List[str], List[Tuple[str, int]]]:
+    """ List a single directory, returning the names of the files that match,
+    and the subdirectories to search next along with their depth. """
+    matcher: PathMatcher = kwargs['matcher']
+    include_matcher: Optional[PathMatcher] = kwargs['include_matcher']
+    exclude_matcher: Optional[PathMatcher] = kwargs['exclude_matcher']
+    max_depth: Optional[int] = kwargs['max_depth']
+    follow_symlinks: bool = kwargs['follow_symlinks']
+
+    rel_dir = ""
+    if matcher.has_path_patterns and depth > 0:
+        rel_dir = os.path.relpath(path, kwargs['root']).replace(os.sep, "/")
+    descend = max_depth is None or depth < max_depth
+    files = []
+    subdirs = []
+    try:
+        with os.scandir(path) as it:
+            for entry in it:  # type: os.DirEntry
+                try:
+                    if entry.is_dir():
+                        if not descend:
+                            continue
+                        if not follow_symlinks and entry.is_symlink():
+                            continue
+                        if exclude_matcher is not None and exclude_matcher.match(entry.name):
+                            continue
+                        if include_matcher is not None and not include_matcher.match(entry.name):
+                            continue
+                        subdirs.append((entry.path, depth + 1))
+                    elif matcher.match(entry.name, rel_dir) and entry.is_file():
+                        files.append(entry.name)
+                except OSError:
+                    continue
+    except OSError:
+        pass
+    return files, subdirs
+
+
 def search_files(search_path: pathlib.Path, **kwargs) -> Generator[pathlib.Path, None, None]:
     """ Search `search_path` for files, optionally *recursively*, and yield paths that match `pattern`.
     Note that `pattern` expects an `fnmatch` compatible pattern (e.g. `*.py`), or a list/tuple of patterns.
+    Patterns that contain a `/` are matched against the path relative to `search_path`, and may use `**`
+    to match any number of directories (e.g. `src/**/*.py`).
+
+    Recursive searches can be limited with these optional keyword arguments:
+
+    `max_depth`: how many levels of subdirectories to search, 0 only searches `search_path` itself.
+    `include_dirs`: only descend into directories whose names match one of these patterns.
+    `exclude_dirs`: skip directories whose names match one of these patterns, along with everything in them.
+    `follow_symlinks`: descend into symbolic links to directories. Each directory is only searched once.
+    `workers`: list directories with a pool of this many threads. This helps on network file systems where
+        each directory listing is slow, but the order of the results is no longer predictable.
+    `index`: a `FileIndex` to answer the search from, which only lists directories that have changed since
+        the previous search.
     """
-    patterns: Union[str, Sequence] = kwargs['patterns']
-    recursive: bool = kwargs.get('recursive', False)
-
-    if isinstance(patterns, str):
-        patterns = [patterns]
-    pattern_regex = re.compile('|'.join([fnmatch.translate(p) for p in patterns]))
+    index = kwargs.pop('index', None)
+    if index is not None:
+        yield from index.search(search_path, **kwargs)
+        return
 
-    if recursive:
-        for root, dirs, files in os.walk(search_path):
-            root_path = pathlib.Path(root)
-            for f in files:
-                if pattern_regex.match(f):
-                    yield root_path.joinpath(f)
-    else:
-        for item in search_path.iterdir():
-            if not item.is_file():
-                continue
-            if pattern_regex.match(item.name):
-                yield item
+    recursive: bool = kwargs.get('recursive', False)
+    include_dirs = kwargs.get('include_dirs')
+    exclude_dirs = kwargs.get('exclude_dirs')
+    workers: Optional[int] = kwargs.get('workers')
+
+    root = str(search_path)
+    scan_kwargs = {
+        'root': root,
+        'matcher': get_matcher(kwargs['patterns']),
+        'include_matcher': None if include_dirs is None else get_matcher(include_dirs),
+        'exclude_matcher': None if exclude_dirs is None else get_matcher(exclude_dirs),
+        'max_depth': kwargs.get('max_depth') if recursive else 0,
+        'follow_symlinks': kwargs.get('follow_symlinks', False),
+    }
+
+    visited = set()
+
+    def should_scan(path: str) -> bool:
+        # when following symlinks the same directory can be reached more than once, or in a cycle
+        if not scan_kwargs['follow_symlinks']:
+            return True
+        try:
+            path_stat = os.stat(path)
+        except OSError:
+            return False
+        key = (path_stat.st_dev, path_stat.st_ino)
+        if key in visited:
+            return False
+        visited.add(key)
+        return True
+
+    if not should_scan(root):
+        return
+
+    if workers is None or workers <= 1:
+        stack = [(root, 0)]
+        while len(stack):
+            path, depth = stack.pop()
+            files, subdirs = _scan_directory(path, depth, **scan_kwargs)
+            if len(files):
+                # joining names onto a single parent is much cheaper than parsing each full path
+                parent = pathlib.Path(path)
+                for file_name in files:
+                    yield parent / file_name
+            stack.extend(reversed([subdir for subdir in subdirs if should_scan(subdir[0])]))
+        return
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = {executor.submit(_scan_directory, root, 0, **scan_kwargs): root}
+        try:
+            while len(pending):
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    path = pending.pop(future)
+                    files, subdirs = future.result()
+                    for subdir, depth in subdirs:
+                        if should_scan(subdir):
+                            pending[executor.submit(_scan_directory, subdir, depth, **scan_kwargs)] = subdir
+                    if len(files):
+                        parent = pathlib.Path(path)
+                        for file_name in files:
+                            yield parent / file_name
+        finally:
+            # don't keep listing directories if the caller stopped early
+            for future in pending:
+                future.cancel()
 
 
 def get_unique_name(path: str, *, mode: UniqueMode = UniqueMode.RANDOM, **kwargs) -> str:
@@ -113,9 +217,50 @@ def get_unique_name(path: str, *, mode: UniqueMode = UniqueMode.RANDOM, **kwargs
             return check_path
 
 
+def _reserve_path(path: pathlib.Path) -> bool:
+    """ Atomically create an empty file at `path`. Returns False if something
+    already exists there. """
+    try:
+        fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        return False
+    os.close(fd)
+    return True
+
+
+def _next_integer(path: pathlib.Path, delimiter: str) -> int:
+    """ List the directory containing `path` once, and return the integer after
+    the highest one used by an existing "{stem}{delimiter}{integer}{suffix}". """
+    prefix = f"{path.stem}{delimiter}"
+    suffix = path.suffix
+    highest = 0
+    try:
+        with os.scandir(path.parent) as it:
+            for entry in it:  # type: os.DirEntry
+                name = entry.name
+                if len(name) <= len(prefix) + len(suffix):
+                    continue
+                if not name.startswith(prefix) or not name.endswith(suffix):
+                    continue
+                key = name[len(prefix):len(name) - len(suffix)]
+                if key.isascii() and key.isdigit():
+                    highest = max(highest, int(key))
+    except FileNotFoundError:
+        pass
+    return highest + 1
+
+
 def unique_path(path: pathlib.Path, *, mode: UniqueMode = UniqueMode.RANDOM, **kwargs) -> pathlib.Path:
     """ Generate a unique file name by adding either random characters or sequential integers.
 
+    `UniqueMode.INTEGER` checks each integer in turn until it finds one that
+    isn't in use. `UniqueMode.INTEGER_SCAN` lists the directory once instead,
+    and uses the integer after the highest one that's already in use.
+
+    Pass `reserve=True` to create an empty file at the returned path. The file
+    is created atomically, so processes or threads that reserve names in the
+    same directory at the same time never receive the same path.
+
     >>> file_path = pathlib.Path("/path/to/file.txt")
     >>> my_delimiter = "-"
     >>> unique = unique_path(file_path, mode=UniqueMode.RANDOM, length=8, force=True, delimiter=my_delimiter)
@@ -126,11 +271,14 @@ def unique_path(path: pathlib.Path, *, mode: UniqueMode = UniqueMode.RANDOM, **k
     True
     >>> unique.name == f"file{my_delimiter}001.txt"
     True
+    >>> unique_path(file_path, mode=UniqueMode.INTEGER_SCAN, force=True).name
+    'file-001.txt'
     """
 
     delimiter = kwargs.get('delimiter', "-")
     max_iterations = kwargs.get("max_iterations", 9999)
     force_unique = kwargs.get("force", False)
+    reserve = kwargs.get("reserve", False)
 
     if mode == UniqueMode.RANDOM:
         length = kwargs.get("length", 8)
@@ -138,7 +286,7 @@ def unique_path(path: pathlib.Path, *, mode: UniqueMode = UniqueMode.RANDOM, **k
         def unique_key_fn(_: int) -> str:
             return "".join(random.choices(RAND_CHARS, k=length))
 
-    elif mode == UniqueMode.INTEGER:
+    elif mode in (UniqueMode.INTEGER, UniqueMode.INTEGER_SCAN):
         length = kwargs.get("length", 3)
 
         def unique_key_fn(iteration: int) -> str:
@@ -147,34 +295,26 @@ def unique_path(path: pathlib.Path, *, mode: UniqueMode = UniqueMode.RANDOM, **k
     else:
         raise NotImplementedError
 
-    if not force_unique and not path.is_file():
-        return path
+    if not force_unique:
+        if reserve:
+            if _reserve_path(path):
+                return path
+        elif not path.is_file():
+            return path
 
-    for i in range(max_iterations):
-        unique_key = unique_key_fn(i + 1)
+    start = _next_integer(path, delimiter) if mode == UniqueMode.INTEGER_SCAN else 1
+    for i in range(start, start + max_iterations):
+        unique_key = unique_key_fn(i)
         check_path = path.with_name(f"{path.stem}{delimiter}{unique_key}{path.suffix}")
-        if not check_path.is_file():
+        if reserve:
+            if _reserve_path(check_path):
+                return check_path
+        elif not check_path.is_file():
             return check_path
 
     raise FileNotFoundError(f"Could not generate a unique name after {max_iterations} iterations")
 
 
-def user_data_path() -> pathlib.Path:
-    if platform.system() == 'Windows':
-        import winreg
-        key = winreg.OpenKey(winreg.HKEY_CURRENT_USER,
-                             r'Software\Microsoft\Windows\CurrentVersion\Explorer\Shell Folders')
-        key_value, key_type = winreg.QueryValueEx(key, 'AppData')
-        data_path = pathlib.Path(key_value).resolve(strict=False)
-    elif platform.system() == 'Darwin':
-        data_path = pathlib.Path('~/Library/Application Support/').expanduser()
-    elif platform.system() == 'Linux':
-        data_path = pathlib.Path(os.getenv('XDG_DATA_HOME', "~/.local/share")).expanduser()
-    else:
-        raise NotImplementedError
-    return data_path
-
-
 if __name__ == '__main__':
     import doctest
     doctest.testmod()
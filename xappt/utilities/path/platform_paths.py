@@ -0,0 +1,88 @@
+""" Per user directories for data, caches and configs. Each one is resolved the
+first time it's needed and cached for the rest of the process. Call
+`invalidate_platform_paths` if the environment they depend on changes.
+
+On Linux these follow the XDG base directory spec, so `XDG_DATA_HOME`,
+`XDG_CACHE_HOME` and `XDG_CONFIG_HOME` can each point at a different volume.
+"""
+
+import os
+import pathlib
+import platform
+
+from functools import lru_cache
+
+__all__ = [
+    'user_data_path',
+    'user_cache_path',
+    'user_config_path',
+    'invalidate_platform_paths',
+]
+
+
+@lru_cache(maxsize=None)
+def _system() -> str:
+    return platform.system()
+
+
+def _windows_folder(name: str) -> pathlib.Path:
+    import winreg
+    key = winreg.OpenKey(winreg.HKEY_CURRENT_USER,
+                         r'Software\Microsoft\Windows\CurrentVersion\Explorer\Shell Folders')
+    key_value, key_type = winreg.QueryValueEx(key, name)
+    return pathlib.Path(key_value).resolve(strict=False)
+
+
+def _xdg_path(env_var: str, default: str) -> pathlib.Path:
+    # the spec says relative paths should be ignored
+    value = os.getenv(env_var, "")
+    if not len(value) or not os.path.isabs(value):
+        value = default
+    return pathlib.Path(value).expanduser()
+
+
+@lru_cache(maxsize=None)
+def user_data_path() -> pathlib.Path:
+    """ The per user application data directory. """
+    system = _system()
+    if system == 'Windows':
+        return _windows_folder('AppData')
+    elif system == 'Darwin':
+        return pathlib.Path('~/Library/Application Support/').expanduser()
+    elif system == 'Linux':
+        return _xdg_path('XDG_DATA_HOME', "~/.local/share")
+    raise NotImplementedError
+
+
+@lru_cache(maxsize=None)
+def user_cache_path() -> pathlib.Path:
+    """ The per user directory for data that can be regenerated. """
+    system = _system()
+    if system == 'Windows':
+        return _windows_folder('Local AppData')
+    elif system == 'Darwin':
+        return pathlib.Path('~/Library/Caches/').expanduser()
+    elif system == 'Linux':
+        return _xdg_path('XDG_CACHE_HOME', "~/.cache")
+    raise NotImplementedError
+
+
+@lru_cache(maxsize=None)
+def user_config_path() -> pathlib.Path:
+    """ The per user directory for settings. This is the same as
+    `user_data_path` on Windows and macOS. """
+    system = _system()
+    if system == 'Linux':
+        return _xdg_path('XDG_CONFIG_HOME', "~/.config")
+    return user_data_path()
+
+
+def invalidate_platform_paths():
+    """ Forget the cached paths, so that they're resolved again on next use. """
+    for fn in (_system, user_data_path, user_cache_path, user_config_path):
+        fn.cache_clear()
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,298 @@
+""" Reusable scratch directories for tools that need temporary space many times
+over. Scratch space is created on a fast volume where one is available: the
+path in the `XAPPT_SCRATCH_PATH` environment variable, otherwise `/dev/shm`,
+otherwise the default temp directory.
+
+    >>> with scratch_path() as scratch:
+    ...     scratch.joinpath("frame.exr").touch()
+    ...     scratch.is_dir()
+    True
+"""
+
+import atexit
+import contextlib
+import errno
+import os
+import pathlib
+import queue
+import re
+import shutil
+import socket
+import tempfile
+import threading
+import weakref
+
+from typing import ContextManager, List, Optional
+
+from xappt.config import log as logger
+from xappt.constants import SCRATCH_PATH_ENV
+from xappt.utilities.path.temp_path import handle_remove_readonly
+
+__all__ = [
+    'ScratchManager',
+    'get_scratch_manager',
+    'set_scratch_manager',
+    'scratch_path',
+    'shutdown_scratch_managers',
+]
+
+SCRATCH_PREFIX = "xappt-scratch-"
+
+
+def _host_tag() -> str:
+    # no dashes, so that the pid after it can be found
+    return re.sub(r"[^A-Za-z0-9_.]", "_", socket.gethostname()) or "localhost"
+
+
+# identifies the scratch folders created on this host, since pids are only
+# meaningful on the host, or in the container, that they belong to
+HOST_TAG = _host_tag()
+
+# how long to wait for scratch directories to be removed when the process exits
+EXIT_TIMEOUT = 5.0
+
+# managers that have created a scratch folder, and have a cleanup thread running
+_RUNNING_MANAGERS: "weakref.WeakSet[ScratchManager]" = weakref.WeakSet()
+
+
+def default_scratch_root() -> pathlib.Path:
+    """ The volume to create scratch space on. """
+    env_path = os.environ.get(SCRATCH_PATH_ENV, "")
+    if len(env_path):
+        return pathlib.Path(env_path).expanduser()
+    shm = pathlib.Path("/dev/shm")
+    if shm.is_dir() and os.access(shm, os.W_OK | os.X_OK):
+        return shm
+    return pathlib.Path(tempfile.gettempdir())
+
+
+def _directory_size(path: str) -> int:
+    total = 0
+    for root, dirs, files in os.walk(path):
+        for file_name in files:
+            try:
+                total += os.lstat(os.path.join(root, file_name)).st_size
+            except OSError:
+                continue
+    return total
+
+
+def _empty_directory(path: str):
+    for item in os.scandir(path):  # type: os.DirEntry
+        if item.is_dir(follow_symlinks=False):
+            shutil.rmtree(item.path, onerror=handle_remove_readonly)
+        else:
+            os.remove(item.path)
+
+
+class ScratchManager:
+    """ Hand out scratch directories, and recycle them once they're released.
+
+    Each process keeps its scratch directories in its own folder under `root`.
+    Released directories are emptied by a background thread, so removing a
+    large scratch tree doesn't hold up the tool that used it, and up to
+    `pool_size` of the emptied directories are kept to be handed out again.
+
+    If `quota` is set, `acquire` raises `OSError` (ENOSPC) when the scratch
+    directories of this process already use that many bytes. Measuring this
+    means walking the directories that are in use, so a quota is best suited to
+    tools that use a few scratch directories at a time.
+
+    When the process exits, the cleanup thread is given `EXIT_TIMEOUT` seconds
+    to remove the process' scratch folder. Anything left behind by then, or by
+    a process that was killed, is removed by the next manager that starts on
+    the same volume and host. Folder names include `HOST_TAG`, so a volume that
+    is shared between hosts or containers can't lose another host's folders.
+    """
+    def __init__(self, root: Optional[pathlib.Path] = None, *, pool_size: int = 8, quota: Optional[int] = None):
+        if root is None:
+            root = default_scratch_root()
+        self.root: pathlib.Path = root
+        self.pool_size: int = pool_size
+        self.quota: Optional[int] = quota
+        self._reset()
+
+    def _reset(self):
+        self._lock = threading.Lock()
+        self._process_path: Optional[pathlib.Path] = None
+        self._pool: List[pathlib.Path] = []
+        self._cleanup_queue: queue.Queue = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def process_path(self) -> pathlib.Path:
+        """ The folder that holds this process' scratch directories. """
+        with self._lock:
+            if self._process_path is None:
+                self.root.mkdir(parents=True, exist_ok=True)
+                self._process_path = pathlib.Path(tempfile.mkdtemp(prefix=f"{SCRATCH_PREFIX}{HOST_TAG}-{os.getpid()}-",
+                                                                   dir=self.root))
+                logger.debug(f"created scratch folder {self._process_path}")
+                self._start_thread()
+            return self._process_path
+
+    def _start_thread(self):
+        self._thread = threading.Thread(target=self._cleanup_worker, name="xappt-scratch-cleanup", daemon=True)
+        self._thread.start()
+        _RUNNING_MANAGERS.add(self)
+        self._cleanup_queue.put(self._remove_stale_folders)
+
+    def _cleanup_worker(self):
+        while True:
+            task = self._cleanup_queue.get()
+            if task is None:
+                self._cleanup_queue.task_done()
+                return
+            try:
+                task()
+            except OSError as e:
+                logger.warning(f"scratch cleanup failed: {e}")
+            finally:
+                self._cleanup_queue.task_done()
+
+    def _remove_stale_folders(self):
+        """ Remove the scratch folders of processes on this host that are no
+        longer running. """
+        if os.name != "posix":
+            # os.kill can't be used to check for a process on Windows
+            return
+        host_prefix = f"{SCRATCH_PREFIX}{HOST_TAG}-"
+        for item in os.scandir(self.root):  # type: os.DirEntry
+            if not item.name.startswith(host_prefix) or not item.is_dir(follow_symlinks=False):
+                continue
+            try:
+                pid = int(item.name[len(host_prefix):].split("-")[0])
+            except ValueError:
+                continue
+            if pid == os.getpid():
+                continue
+            try:
+                os.kill(pid, 0)
+            except ProcessLookupError:
+                logger.debug(f"removing stale scratch folder {item.path}")
+                shutil.rmtree(item.path, onerror=handle_remove_readonly)
+            except PermissionError:
+                continue  # the process exists, and belongs to someone else
+
+    def usage(self) -> int:
+        """ The number of bytes used by scratch directories that are in use or
+        waiting to be emptied. """
+        return _directory_size(str(self.process_path))
+
+    def acquire(self) -> pathlib.Path:
+        """ Return an empty scratch directory. Pass it to `release` when it's no
+        longer needed. """
+        process_path = self.process_path
+        if self.quota is not None and self.usage() >= self.quota:
+            # directories that have been released may still be waiting to be emptied
+            self.wait()
+            if self.usage() >= self.quota:
+                raise OSError(errno.ENOSPC, f"Scratch quota of {self.quota} bytes exceeded", str(process_path))
+        with self._lock:
+            path = self._pool.pop() if len(self._pool) else None
+        if path is None:
+            path = pathlib.Path(tempfile.mkdtemp(dir=process_path))
+        return path
+
+    def release(self, path: pathlib.Path):
+        """ Hand a scratch directory back. It's emptied in the background. """
+        self._cleanup_queue.put(lambda: self._recycle(path))
+
+    def _recycle(self, path: pathlib.Path):
+        with self._lock:
+            keep = len(self._pool) < self.pool_size
+        if not keep:
+            shutil.rmtree(path, onerror=handle_remove_readonly)
+            return
+        _empty_directory(str(path))
+        with self._lock:
+            if len(self._pool) < self.pool_size:
+                self._pool.append(path)
+                return
+        os.rmdir(path)
+
+    @contextlib.contextmanager
+    def scratch_path(self) -> ContextManager[pathlib.Path]:
+        """ Context manager that acquires a scratch directory, and releases it
+        at the end of the `with` block. """
+        path = self.acquire()
+        try:
+            yield path
+        finally:
+            self.release(path)
+
+    def wait(self):
+        """ Block until every released directory has been emptied. """
+        if self._thread is not None:
+            self._cleanup_queue.join()
+
+    def clear(self):
+        """ Wait for pending cleanup, then remove the pooled directories. """
+        self.wait()
+        with self._lock:
+            pool, self._pool = self._pool, []
+        for path in pool:
+            shutil.rmtree(path, onerror=handle_remove_readonly)
+
+    def shutdown(self, timeout: Optional[float] = None):
+        """ Remove this process' scratch folder, including any directories that
+        are still in use, and stop the cleanup thread. Waits up to `timeout`
+        seconds, or until it's done if `timeout` is None. The manager can be
+        used again afterwards, with a new scratch folder. """
+        with self._lock:
+            thread, process_path = self._thread, self._process_path
+        if thread is None:
+            return
+        self._cleanup_queue.put(lambda: shutil.rmtree(process_path, onerror=handle_remove_readonly))
+        self._cleanup_queue.put(None)
+        thread.join(timeout)
+        if thread.is_alive():
+            logger.debug(f"leaving scratch folder {process_path} to be removed later")
+        _RUNNING_MANAGERS.discard(self)
+        self._reset()
+
+    def _after_fork(self):
+        # the cleanup thread and the scratch folder belong to the parent process
+        self._reset()
+
+
+_scratch_manager: Optional[ScratchManager] = None
+
+
+def get_scratch_manager() -> ScratchManager:
+    global _scratch_manager
+    if _scratch_manager is None:
+        _scratch_manager = ScratchManager()
+    return _scratch_manager
+
+
+def set_scratch_manager(scratch_manager: ScratchManager):
+    global _scratch_manager
+    _scratch_manager = scratch_manager
+
+
+def scratch_path() -> ContextManager[pathlib.Path]:
+    """ Acquire a scratch directory from the default `ScratchManager`. """
+    return get_scratch_manager().scratch_path()
+
+
+@atexit.register
+def shutdown_scratch_managers(timeout: Optional[float] = EXIT_TIMEOUT):
+    """ Shut down every `ScratchManager` that has created a scratch folder. """
+    for manager in list(_RUNNING_MANAGERS):
+        manager.shutdown(timeout)
+
+
+def _after_fork_in_child():
+    for manager in list(_RUNNING_MANAGERS):
+        manager._after_fork()
+    _RUNNING_MANAGERS.clear()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,55 @@
+import json
+import os
+import pathlib
+import threading
+
+from collections import namedtuple
+from typing import List
+
+# `start` is a `time.perf_counter` value, and `duration` is measured in seconds
+ProfileEvent = namedtuple("ProfileEvent", ("name", "category", "start", "duration", "args"))
+
+
+class TraceRecorder:
+    """ Collect `ProfileEvent`s and write them as a Chrome trace event file,
+    which can be loaded with chrome://tracing or https://ui.perfetto.dev.
+
+    >>> recorder = TraceRecorder()
+    >>> recorder.record(ProfileEvent("execute", "tool", 1.0, 0.5, {'tool': 'example'}))
+    >>> recorder.to_trace()['traceEvents'][0]['dur']
+    500000.0
+
+    """
+    def __init__(self):
+        self.events: List[ProfileEvent] = []
+        self._lock = threading.Lock()
+
+    def record(self, event: ProfileEvent):
+        with self._lock:
+            self.events.append(event)
+
+    def to_trace(self) -> dict:
+        pid = os.getpid()
+        trace_events = []
+        with self._lock:
+            for event in self.events:
+                trace_events.append({
+                    'name': event.name,
+                    'cat': event.category,
+                    'ph': "X",
+                    'ts': event.start * 1_000_000,
+                    'dur': event.duration * 1_000_000,
+                    'pid': pid,
+                    'tid': 0,
+                    'args': event.args,
+                })
+        return {'traceEvents': trace_events, 'displayTimeUnit': "ms"}
+
+    def write(self, path: pathlib.Path):
+        with path.open("w") as fp:
+            json.dump(self.to_trace(), fp, default=str)
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,156 @@
+import hashlib
+import json
+import os
+import pathlib
+import time
+
+from collections import namedtuple
+from typing import Any, List, Optional, Sequence
+
+from xappt.config import log as logger
+from xappt.utilities.path.atomic import atomic_write
+from xappt.utilities.path.platform_paths import user_cache_path
+
+CachedResult = namedtuple("CachedResult", ("result", "outputs"))
+
+DEFAULT_MAX_SIZE = 256 * 1024 * 1024  # 256 MiB
+DEFAULT_MAX_AGE = 7 * 24 * 60 * 60  # one week, in seconds
+
+CACHE_ENTRY_SUFFIX = ".json"
+
+
+def file_digest(path: str, *, chunk_size: int = 1024 * 1024) -> str:
+    """ Return the sha256 hex digest of the contents of the file at `path`. """
+    digest = hashlib.sha256()
+    with open(path, "rb") as fp:
+        for chunk in iter(lambda: fp.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _remove_entry(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class ResultCache:
+    """ An on-disk cache of tool results. Each entry is a small JSON file named
+    after its key, holding the tool's return code and the list of interface
+    outputs recorded while it executed. Entries that are older than `max_age`
+    seconds are discarded, and when the cache grows beyond `max_size` bytes the
+    least recently used entries are evicted.
+
+    >>> from xappt.utilities.path.temp_path import temporary_path
+    >>> with temporary_path() as tmp:
+    ...     cache = ResultCache(tmp)
+    ...     key = cache.make_key({'tool': 'example', 'params': {'value': 1}})
+    ...     cache.get(key) is None
+    ...     cache.put(key, 0, [("message", ["hello"], {})])
+    ...     cache.get(key)
+    True
+    CachedResult(result=0, outputs=[('message', ['hello'], {})])
+
+    """
+    def __init__(self, path: Optional[pathlib.Path] = None, *, max_size: Optional[int] = DEFAULT_MAX_SIZE,
+                 max_age: Optional[float] = DEFAULT_MAX_AGE):
+        if path is None:
+            path = user_cache_path().joinpath("xappt", "results")
+        self.path: pathlib.Path = path
+        self.max_size: Optional[int] = max_size
+        self.max_age: Optional[float] = max_age
+
+    @staticmethod
+    def make_key(identity: dict) -> str:
+        """ Build a cache key from a JSON serializable dictionary. Values that
+        can't be serialized are converted with `str`. """
+        identity_str = json.dumps(identity, sort_keys=True, default=str)
+        return hashlib.sha256(identity_str.encode("utf8")).hexdigest()
+
+    def _entry_path(self, key: str) -> pathlib.Path:
+        return self.path.joinpath(f"{key}{CACHE_ENTRY_SUFFIX}")
+
+    def _expired(self, mtime: float, now: float) -> bool:
+        return self.max_age is not None and now - mtime > self.max_age
+
+    def get(self, key: str) -> Optional[CachedResult]:
+        entry_path = self._entry_path(key)
+        try:
+            entry_stat = entry_path.stat()
+        except FileNotFoundError:
+            return None
+
+        if self._expired(entry_stat.st_mtime, time.time()):
+            logger.debug(f"result cache entry {key} has expired")
+            _remove_entry(str(entry_path))
+            return None
+
+        try:
+            with entry_path.open("r") as fp:
+                entry = json.load(fp)
+            result = CachedResult(entry['result'], [tuple(output) for output in entry['outputs']])
+        except (OSError, ValueError, KeyError, TypeError):
+            logger.debug(f"discarding unreadable result cache entry {key}")
+            _remove_entry(str(entry_path))
+            return None
+
+        # touch the entry so that eviction removes the least recently used entries first
+        os.utime(entry_path)
+        return result
+
+    def put(self, key: str, result: int, outputs: Sequence[Sequence[Any]]):
+        """ Save a result. Nothing is cached, and a warning is logged, if the
+        outputs can't be serialized to JSON. """
+        try:
+            contents = json.dumps({'result': result, 'outputs': [list(output) for output in outputs]})
+        except (TypeError, ValueError) as e:
+            logger.warning(f"not caching result {key}, its outputs can't be serialized: {e}")
+            return
+        self.path.mkdir(parents=True, exist_ok=True)
+        atomic_write(self._entry_path(key), contents)
+        self.evict()
+
+    def evict(self):
+        """ Remove expired entries, and then the least recently used entries
+        until the cache fits in `max_size`. """
+        if not self.path.is_dir():
+            return
+
+        now = time.time()
+        entries: List[tuple] = []
+        total_size = 0
+        for item in os.scandir(self.path):  # type: os.DirEntry
+            if not item.name.endswith(CACHE_ENTRY_SUFFIX):
+                continue
+            try:
+                item_stat = item.stat()
+            except FileNotFoundError:
+                continue
+            if self._expired(item_stat.st_mtime, now):
+                _remove_entry(item.path)
+                continue
+            entries.append((item_stat.st_mtime, item_stat.st_size, item.path))
+            total_size += item_stat.st_size
+
+        if self.max_size is None or total_size <= self.max_size:
+            return
+
+        for _, size, path in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            logger.debug(f"evicting result cache entry {path}")
+            _remove_entry(path)
+            total_size -= size
+
+    def clear(self):
+        if not self.path.is_dir():
+            return
+        for item in os.scandir(self.path):  # type: os.DirEntry
+            if item.name.endswith(CACHE_ENTRY_SUFFIX):
+                _remove_entry(item.path)
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
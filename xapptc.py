@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+""" A thin client for the resident xappt server (`xappt --serve`).
+
+The command line, working directory and part of the environment are forwarded
+to the server, its output is streamed back, and its exit code is returned. When
+no server is running the command is run locally instead. So is it when the
+socket's folder can be accessed by other users, or the server is run by one.
+
+This module deliberately lives outside of the `xappt` package, since importing
+anything from `xappt` runs plugin discovery, which is the start up cost that
+the server is there to avoid. The socket path and framing are duplicated from
+`xappt.server` for the same reason.
+"""
+
+import json
+import os
+import socket
+import stat
+import struct
+import sys
+import tempfile
+
+from typing import Optional
+
+SERVER_SOCKET_ENV = "XAPPT_SOCKET"
+SERVER_ENV_ENV = "XAPPT_SERVER_ENV"
+
+FRAME_HEADER = struct.Struct("!I")
+PEER_CREDENTIALS = struct.Struct("3i")
+
+FORWARDED_ENV = ("PATH", "HOME", "USER", "LOGNAME", "SHELL", "LANG", "LANGUAGE", "TZ", "TERM", "COLUMNS", "LINES",
+                 "NO_COLOR", "VIRTUAL_ENV", "PYTHONPATH")
+FORWARDED_ENV_PREFIXES = ("XAPPT_", "LC_")
+
+
+def default_socket_path() -> str:
+    socket_path = os.environ.get(SERVER_SOCKET_ENV)
+    if socket_path:
+        return socket_path
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR", "")
+    if os.path.isabs(runtime_dir) and os.path.isdir(runtime_dir):
+        return os.path.join(runtime_dir, "xappt.sock")
+    return os.path.join(tempfile.gettempdir(), f"xappt-{os.getuid()}", "xappt.sock")
+
+
+def forwarded_environment() -> dict:
+    names = set(FORWARDED_ENV)
+    names.update(name.strip() for name in os.environ.get(SERVER_ENV_ENV, "").split(","))
+    return {name: value for name, value in os.environ.items()
+            if name in names or name.startswith(FORWARDED_ENV_PREFIXES)}
+
+
+def _socket_dir_is_private(socket_path: str) -> bool:
+    try:
+        dir_stat = os.lstat(os.path.dirname(os.path.abspath(socket_path)))
+    except OSError:
+        return False
+    return stat.S_ISDIR(dir_stat.st_mode) and dir_stat.st_uid == os.getuid() and not dir_stat.st_mode & 0o077
+
+
+def _peer_is_current_user(sock: socket.socket) -> bool:
+    if not hasattr(socket, "SO_PEERCRED"):
+        return True  # rely on the socket folder being private
+    credentials = sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, PEER_CREDENTIALS.size)
+    return PEER_CREDENTIALS.unpack(credentials)[1] == os.getuid()
+
+
+def _recv_exact(sock: socket.socket, size: int) -> Optional[bytes]:
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            return None
+        data.extend(chunk)
+    return bytes(data)
+
+
+def _recv_frame(sock: socket.socket) -> Optional[dict]:
+    header = _recv_exact(sock, FRAME_HEADER.size)
+    if header is None:
+        return None
+    payload = _recv_exact(sock, FRAME_HEADER.unpack(header)[0])
+    if payload is None:
+        return None
+    return json.loads(payload.decode("utf8"))
+
+
+def _connect(socket_path: str) -> Optional[socket.socket]:
+    if not _socket_dir_is_private(socket_path):
+        if os.path.exists(socket_path):
+            print(f"ignoring the xappt server at {socket_path}, its folder can be accessed by other users",
+                  file=sys.stderr)
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(socket_path)
+    except OSError:
+        sock.close()
+        return None
+    if not _peer_is_current_user(sock):
+        print(f"ignoring the xappt server at {socket_path}, it's run by another user", file=sys.stderr)
+        sock.close()
+        return None
+    return sock
+
+
+def run_remote(sock: socket.socket, argv) -> int:
+    request = {
+        'argv': list(argv),
+        'env': forwarded_environment(),
+        'cwd': os.getcwd(),
+        'tty': sys.stdout.isatty(),
+    }
+    payload = json.dumps(request).encode("utf8")
+    sock.sendall(FRAME_HEADER.pack(len(payload)) + payload)
+
+    streams = {'stdout': sys.stdout, 'stderr': sys.stderr}
+    while True:
+        response = _recv_frame(sock)
+        if response is None:
+            print("xappt server closed the connection", file=sys.stderr)
+            return 1
+        if 'exit' in response:
+            return response['exit']
+        stream = streams.get(response.get('stream'))
+        if stream is not None:
+            stream.write(response.get('data', ""))
+            stream.flush()
+
+
+def main(*argv) -> int:
+    sock = _connect(default_socket_path())
+    if sock is None:
+        from xappt.cli import cli_main
+        return cli_main(*argv)
+    with sock:
+        return run_remote(sock, argv)
+
+
+def entry_point() -> int:
+    return main(*sys.argv[1:])
+
+
+if __name__ == '__main__':
+    sys.exit(entry_point())